@@ -0,0 +1,228 @@
+"""
+Admission control for the local LLM
+Bounded priority queue in front of Ollama so it never runs more generations than it can serve well
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+# Queue priority per endpoint; lower is served first. Interactive requests
+# overtake bulk work waiting for the same Ollama slots.
+PRIORITIES = {
+    'simplify-jargon': 0,
+    'draft-complaint': 1,
+    'generate-rti': 1,
+    'summarize-document': 2,
+    'background': 3,
+}
+DEFAULT_PRIORITY = 1
+
+_priority = contextvars.ContextVar('llm_priority', default=DEFAULT_PRIORITY)
+
+
+def set_llm_priority(endpoint):
+    """
+    Set the queue priority of LLM calls made while handling this request
+    
+    Stored in a context variable rather than passed down, so it also
+    applies to generations a streaming response starts after the view
+    has returned. Threads started for the request must copy the context.
+    """
+    _priority.set(PRIORITIES.get(endpoint, DEFAULT_PRIORITY))
+
+
+def current_priority():
+    return _priority.get()
+
+
+class AdmissionRejected(Exception):
+    """The LLM queue is full or the wait exceeded its limit; retry after retry_after seconds"""
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued caller; granted a slot by the caller that releases one"""
+    
+    def __init__(self, priority, loop=None):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+    
+    def grant(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+    
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded priority queue
+    
+    At most max_concurrent calls run at once; further callers queue in
+    priority order (FIFO within a priority), from both threads and event
+    loops. A caller is rejected with AdmissionRejected when max_queue
+    callers are already waiting, or when it has waited max_wait seconds.
+    The rejection carries a Retry-After estimate from the queue depth and
+    recent service times.
+    
+    Limits are per process: the bound on Ollama is the number of worker
+    processes times max_concurrent.
+    """
+    
+    def __init__(self, max_concurrent=4, max_queue=50, max_wait=20.0):
+        """
+        Args:
+            max_concurrent: Calls running at once
+            max_queue: Callers allowed to wait for a slot
+            max_wait: Seconds a caller waits before it is rejected
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._service_times = deque(maxlen=100)
+        self._wait_times = deque(maxlen=1000)
+        self._counters = {'admitted': 0, 'queued': 0, 'rejected_full': 0, 'rejected_timeout': 0}
+    
+    def _retry_after(self):
+        """Seconds until a slot is likely free for a new caller (lock held)"""
+        service_time = (
+            sum(self._service_times) / len(self._service_times)
+            if self._service_times else self.max_wait / 2
+        )
+        rounds = (len(self._queue) + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * service_time))
+    
+    def _enter(self, priority, loop=None):
+        """Take a free slot (returns None) or join the queue (returns the waiter)"""
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queue:
+                self._active += 1
+                self._counters['admitted'] += 1
+                self._wait_times.append(0.0)
+                return None
+            if len(self._queue) >= self.max_queue:
+                self._counters['rejected_full'] += 1
+                raise AdmissionRejected("LLM queue is full", self._retry_after())
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+            self._counters['queued'] += 1
+            return waiter
+    
+    def _admitted(self, waiter):
+        with self._lock:
+            self._counters['admitted'] += 1
+            self._wait_times.append(time.monotonic() - waiter.enqueued_at)
+    
+    def _abandon(self, waiter, timed_out=True):
+        """
+        Remove a waiter that gave up
+        
+        Returns:
+            The rejection to raise, or None if the waiter was granted a slot meanwhile
+        """
+        with self._lock:
+            if waiter.granted:
+                return None
+            self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+            heapq.heapify(self._queue)
+            if timed_out:
+                self._counters['rejected_timeout'] += 1
+            return AdmissionRejected("Timed out waiting for the LLM queue", self._retry_after())
+    
+    def _release(self, service_time=None):
+        """Hand the slot to the next waiter, or free it"""
+        with self._lock:
+            if service_time is not None:
+                self._service_times.append(service_time)
+            if self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                waiter.grant()
+            else:
+                self._active -= 1
+    
+    @contextmanager
+    def slot(self, priority=DEFAULT_PRIORITY):
+        """Hold one slot for the duration of the block (blocking wait)"""
+        waiter = self._enter(priority)
+        if waiter is not None:
+            if not waiter.event.wait(self.max_wait):
+                rejection = self._abandon(waiter)
+                if rejection is not None:
+                    raise rejection
+            self._admitted(waiter)
+        
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+    
+    @asynccontextmanager
+    async def aslot(self, priority=DEFAULT_PRIORITY):
+        """Hold one slot for the duration of the block (awaits the wait)"""
+        waiter = self._enter(priority, loop=asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+            except asyncio.TimeoutError:
+                rejection = self._abandon(waiter)
+                if rejection is not None:
+                    raise rejection
+            except asyncio.CancelledError:
+                # Granted while being cancelled: pass the slot on
+                if self._abandon(waiter, timed_out=False) is None:
+                    self._release()
+                raise
+            self._admitted(waiter)
+        
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+    
+    def stats(self):
+        """Queue depth per priority, slots in use, counters and wait-time percentiles"""
+        with self._lock:
+            stats = dict(self._counters)
+            depth = {}
+            for priority, _, _ in self._queue:
+                depth[priority] = depth.get(priority, 0) + 1
+            stats.update({
+                'active': self._active,
+                'max_concurrent': self.max_concurrent,
+                'queue_depth': len(self._queue),
+                'queue_depth_by_priority': depth,
+            })
+            waits = sorted(self._wait_times)
+        
+        for name, percentile in (('wait_p50_ms', 0.5), ('wait_p95_ms', 0.95)):
+            stats[name] = (
+                round(waits[min(int(percentile * len(waits)), len(waits) - 1)] * 1000, 1)
+                if waits else None
+            )
+        return stats
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AiConfig(AppConfig):
+    name = 'ai'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,246 @@
+"""
+Async AI views for ASGI deployments
+Same endpoints, validation and responses as ai.views, with upstream calls awaited
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .translation import get_async_bhashini_client
+from .llm import get_async_llm_client
+from .admission import AdmissionRejected, set_llm_priority
+from .jobs import job_events, submit_job, submitted_payload, wants_job
+from .models import LLMJob
+from .streaming import event_stream_response, sse_response, wants_stream
+from .serializers import (
+    TranslationRequestSerializer,
+    LanguageDetectionRequestSerializer,
+    JargonSimplificationRequestSerializer,
+    ComplaintDraftRequestSerializer,
+    DocumentSummaryRequestSerializer,
+    RTIQueryRequestSerializer,
+    LLMJobOptionsSerializer,
+)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAIView(View):
+    """
+    Base for async AI endpoints
+    
+    DRF's APIView cannot run async handlers, so these are plain Django
+    views. Requests are validated with the DRF serializers of the sync
+    views and errors have the same shape (400 with field errors, 500 with
+    an 'error' message), so clients see no difference.
+    """
+    http_method_names = ['post', 'options']
+    serializer_class = None
+    
+    def validate(self, request):
+        """
+        Parse and validate the request body
+        
+        Returns:
+            (validated_data, None), or (None, error JsonResponse)
+        """
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return None, JsonResponse({'detail': 'JSON parse error'}, status=400)
+        else:
+            data = request.POST
+        
+        self.request_data = data
+        serializer = self.serializer_class(data=data)
+        if not serializer.is_valid():
+            return None, JsonResponse(serializer.errors, status=400)
+        return serializer.validated_data, None
+    
+    async def job_response(self, request, kind, data):
+        """Submit the generation as a background job and answer 202 with where to follow it"""
+        options = LLMJobOptionsSerializer(data=self.request_data)
+        if not options.is_valid():
+            return JsonResponse(options.errors, status=400)
+        
+        job = await sync_to_async(submit_job)(kind, data, options.validated_data.get('callback_url', ''))
+        payload = submitted_payload(request, job)
+        response = JsonResponse(payload, status=202)
+        response['Location'] = payload['status_url']
+        return response
+    
+    @staticmethod
+    def error_response(e):
+        if isinstance(e, AdmissionRejected):
+            response = JsonResponse({'error': str(e), 'retry_after': e.retry_after}, status=429)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+class AsyncTranslateView(AsyncAIView):
+    """
+    Translate text between Indian languages using Bhashini
+    """
+    serializer_class = TranslationRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        client = get_async_bhashini_client()
+        translated = await client.translate(data['text'], data['source_lang'], data['target_lang'])
+        
+        return JsonResponse({
+            'original_text': data['text'],
+            'translated_text': translated,
+            'source_lang': data['source_lang'],
+            'target_lang': data['target_lang']
+        })
+
+
+class AsyncDetectLanguageView(AsyncAIView):
+    """
+    Detect the language of input text
+    """
+    serializer_class = LanguageDetectionRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        client = get_async_bhashini_client()
+        detected_lang = await client.detect_language(data['text'])
+        
+        return JsonResponse({
+            'text': data['text'],
+            'detected_language': detected_lang
+        })
+
+
+class AsyncSimplifyJargonView(AsyncAIView):
+    """
+    Simplify government jargon using LLM (SSE with ?stream=true or Accept: text/event-stream)
+    """
+    serializer_class = JargonSimplificationRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        try:
+            set_llm_priority('simplify-jargon')
+            client = get_async_llm_client()
+            if wants_stream(request):
+                chunks = await client.simplify_jargon(data['text'], data['language'], stream=True)
+                return sse_response(chunks, 'simplified_text')
+            
+            simplified = await client.simplify_jargon(data['text'], data['language'])
+            
+            return JsonResponse({
+                'original_text': data['text'],
+                'simplified_text': simplified
+            })
+        
+        except Exception as e:
+            return self.error_response(e)
+
+
+class AsyncDraftComplaintView(AsyncAIView):
+    """
+    Generate a formal complaint letter using LLM (SSE with ?stream=true or Accept: text/event-stream)
+    """
+    serializer_class = ComplaintDraftRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        if wants_job(request):
+            return await self.job_response(request, 'draft-complaint', data)
+        
+        try:
+            set_llm_priority('draft-complaint')
+            client = get_async_llm_client()
+            if wants_stream(request):
+                return sse_response(await client.draft_complaint_letter(data, stream=True), 'letter')
+            
+            letter = await client.draft_complaint_letter(data)
+            
+            return JsonResponse({'letter': letter})
+        
+        except Exception as e:
+            return self.error_response(e)
+
+
+class AsyncSummarizeDocumentView(AsyncAIView):
+    """
+    Summarize long government documents using LLM
+    """
+    serializer_class = DocumentSummaryRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        if wants_job(request):
+            return await self.job_response(request, 'summarize-document', data)
+        
+        try:
+            set_llm_priority('summarize-document')
+            client = get_async_llm_client()
+            summary = await client.summarize_document(data['document_text'], data['max_points'])
+            
+            return JsonResponse({'summary': summary})
+        
+        except Exception as e:
+            return self.error_response(e)
+
+
+class AsyncGenerateRTIQueryView(AsyncAIView):
+    """
+    Generate an RTI query template using LLM
+    """
+    serializer_class = RTIQueryRequestSerializer
+    
+    async def post(self, request):
+        data, error = self.validate(request)
+        if error:
+            return error
+        
+        if wants_job(request):
+            return await self.job_response(request, 'generate-rti', data)
+        
+        try:
+            set_llm_priority('generate-rti')
+            client = get_async_llm_client()
+            query = await client.generate_rti_query(data['topic'], data['department'])
+            
+            return JsonResponse({'query': query})
+        
+        except Exception as e:
+            return self.error_response(e)
+
+
+class AsyncLLMJobEventsView(AsyncAIView):
+    """
+    Server-Sent Events for a background LLM job: status changes, then done or error
+    
+    ASGI only: under WSGI each subscriber would hold a worker thread for the
+    whole job, so clients there poll the job or receive its webhook.
+    """
+    http_method_names = ['get', 'options']
+    
+    async def get(self, request, job_id):
+        if not await LLMJob.objects.filter(pk=job_id).aexists():
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        return event_stream_response(job_events(job_id))
@@ -0,0 +1,149 @@
+"""
+Circuit breakers for LLM backends
+Track error rate and latency per backend so requests skip one that is down or overloaded
+"""
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised when every configured backend is open"""
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for one backend
+    
+    Closed: calls go through and their outcome and latency are recorded.
+    Once the window holds at least min_calls outcomes and either the
+    failure rate or the rate of calls slower than slow_call_seconds
+    reaches its threshold, the breaker opens and calls are refused for
+    open_seconds. It then lets a single trial call through (half-open):
+    success closes it with a fresh window, failure opens it again. A trial
+    that ends without an outcome (rejected by the queue, cancelled, client
+    gone) must be given back with release().
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, window=20, min_calls=5, error_rate=0.5,
+                 slow_call_seconds=10.0, slow_call_rate=0.8, open_seconds=30.0):
+        """
+        Args:
+            name: Backend name (for stats)
+            window: Number of recent calls considered
+            min_calls: Calls needed in the window before the breaker can trip
+            error_rate: Failure ratio that trips the breaker
+            slow_call_seconds: Latency above which a successful call counts as slow
+            slow_call_rate: Slow-call ratio that trips the breaker
+            open_seconds: Seconds calls are refused before a trial call
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)  # (ok, latency or None)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {'opened': 0, 'rejected': 0}
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+    
+    def allow(self):
+        """
+        Whether a call may go to this backend now
+        
+        In half-open state this claims the single trial call, so only ask
+        when the call will actually be made.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._counters['rejected'] += 1
+            return False
+    
+    def release(self):
+        """
+        Give back a half-open trial claimed by allow() that ended without an outcome
+        
+        A no-op once the trial recorded its success or failure, so callers
+        can release unconditionally when the call is over.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+    
+    def record_success(self, latency=None):
+        """Record a successful call; latency in seconds (None for streams)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((True, latency))
+            self._maybe_trip()
+    
+    def record_failure(self, latency=None):
+        """Record a failed call"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append((False, latency))
+            self._maybe_trip()
+    
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._counters['opened'] += 1
+    
+    def _maybe_trip(self):
+        if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(
+            1 for ok, latency in self._outcomes
+            if ok and latency is not None and latency > self.slow_call_seconds
+        )
+        if failures / calls >= self.error_rate or slow / calls >= self.slow_call_rate:
+            self._open()
+    
+    def latency_percentile(self, percentile=0.95):
+        """Latency percentile of recent successful calls, or None with too few samples"""
+        with self._lock:
+            latencies = sorted(latency for ok, latency in self._outcomes if ok and latency is not None)
+        if len(latencies) < self.min_calls:
+            return None
+        index = min(int(percentile * len(latencies)), len(latencies) - 1)
+        return latencies[index]
+    
+    def stats(self):
+        """State, window error rate and p95 latency"""
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            stats = dict(self._counters)
+            stats.update({
+                'state': self._state,
+                'window_calls': calls,
+                'error_rate': failures / calls if calls else 0.0,
+            })
+        stats['p95_latency'] = self.latency_percentile(0.95)
+        return stats
@@ -0,0 +1,77 @@
+"""
+Graph clustering helpers for grouping similar issues
+"""
+
+
+class UnionFind:
+    """
+    Disjoint-set forest with path halving and union by size
+    """
+    
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+    
+    def find(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+            return item
+        
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def cluster_edges(edges):
+    """
+    Group a similarity graph into connected components
+    
+    Args:
+        edges: Iterable of (id_a, id_b, similarity); duplicates in either
+            direction are counted once
+    
+    Returns:
+        List of cluster dicts (issue_ids, count, avg_similarity), largest first.
+        avg_similarity is the mean over the distinct edges inside the cluster.
+    """
+    unique_edges = {}
+    for a, b, similarity in edges:
+        if a == b:
+            continue
+        key = (a, b) if a < b else (b, a)
+        unique_edges[key] = max(similarity, unique_edges.get(key, similarity))
+    
+    forest = UnionFind()
+    for a, b in unique_edges:
+        forest.union(a, b)
+    
+    clusters = {}
+    for (a, b), similarity in unique_edges.items():
+        root = forest.find(a)
+        cluster = clusters.setdefault(root, {'issue_ids': set(), 'similarity_sum': 0.0, 'edges': 0})
+        cluster['issue_ids'].update((a, b))
+        cluster['similarity_sum'] += similarity
+        cluster['edges'] += 1
+    
+    results = [
+        {
+            'issue_ids': sorted(cluster['issue_ids']),
+            'count': len(cluster['issue_ids']),
+            'avg_similarity': cluster['similarity_sum'] / cluster['edges']
+        }
+        for cluster in clusters.values()
+    ]
+    results.sort(key=lambda c: (-c['count'], -c['avg_similarity']))
+    return results
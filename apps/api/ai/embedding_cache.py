@@ -0,0 +1,90 @@
+"""
+Query embedding cache
+Skips model inference for search queries that were embedded before
+"""
+import hashlib
+import unicodedata
+
+import numpy as np
+
+from .local_cache import LocalCache
+
+
+def normalize_query(text):
+    """Normalize query text so trivially different spellings share a cache entry"""
+    return ' '.join(unicodedata.normalize('NFKC', text).lower().split())
+
+
+class QueryEmbeddingCache(LocalCache):
+    """
+    Two-tier cache of normalized query text -> embedding vector
+    
+    The first tier is an in-process LRU. The optional second tier is Redis,
+    shared by all workers; Redis errors are treated as misses so a Redis
+    outage only costs inference time.
+    """
+    
+    label = 'Query embedding cache'
+    
+    def __init__(self, max_size=10000, redis_url=None, redis_ttl=7 * 24 * 3600, namespace='default'):
+        """
+        Args:
+            max_size: Maximum entries kept in the in-process LRU
+            redis_url: Redis URL for the shared tier (disabled if empty)
+            redis_ttl: Seconds a Redis entry lives
+            namespace: Key prefix, normally the model name, so models never mix
+        """
+        super().__init__(max_size, redis_url=redis_url)
+        self.redis_ttl = redis_ttl
+        self.namespace = namespace
+    
+    def _redis_key(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return f"qemb:{self.namespace}:{digest}"
+    
+    def get(self, key):
+        """
+        Look up a normalized query
+        
+        Returns:
+            Embedding as a float32 numpy array, or None on a miss
+        """
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self._count('local_hits')
+            return embedding
+        
+        payload = self._redis_command('get', self._redis_key(key))
+        if payload:
+            embedding = np.frombuffer(payload, dtype='<f4')
+            self._set_local(key, embedding)
+            self._count('redis_hits')
+            return embedding
+        
+        self._count('misses')
+        return None
+    
+    def set(self, key, embedding):
+        """Store the embedding for a normalized query in both tiers and return the stored array"""
+        embedding = np.array(embedding, dtype='<f4')
+        embedding.setflags(write=False)  # Shared between callers
+        self._set_local(key, embedding)
+        self._redis_command('set', self._redis_key(key), embedding.tobytes(), ex=self.redis_ttl)
+        return embedding
+    
+    def get_or_compute(self, text, compute):
+        """
+        Return the cached embedding for text, computing and storing it on a miss
+        
+        Args:
+            text: Raw query text
+            compute: Callable taking the normalized text and returning its embedding
+        
+        Returns:
+            Embedding as a float32 numpy array
+        """
+        key = normalize_query(text)
+        embedding = self.get(key)
+        if embedding is None:
+            embedding = self.set(key, compute(key))
+        return embedding
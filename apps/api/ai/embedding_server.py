@@ -0,0 +1,146 @@
+"""
+Shared embedding inference server
+Loads one sentence transformer and batches encode requests from all API workers
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from .encoders import parse_service_url
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """Texts waiting to be encoded plus the slot their result is delivered to"""
+    
+    def __init__(self, texts):
+        self.texts = texts
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchingEncoder:
+    """
+    Coalesces concurrent encode calls into shared model forward passes
+    
+    A single worker thread takes the first waiting request, then keeps
+    collecting requests until max_batch_size texts are queued or max_wait
+    seconds have passed, and encodes them all in one call.
+    """
+    
+    def __init__(self, encoder, max_batch_size=64, max_wait=0.005):
+        self.encoder = encoder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='embedding-batcher', daemon=True)
+        self._worker.start()
+    
+    def encode(self, texts):
+        request = _PendingRequest(texts)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = self.encoder.encode(texts, batch_size=self.max_batch_size)
+                offset = 0
+                for request in batch:
+                    request.result = vectors[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+            except Exception as e:
+                logger.exception("Embedding batch of %d texts failed", len(texts))
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+
+class EmbeddingRequestHandler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON encode requests on a persistent connection"""
+    
+    def handle(self):
+        for line in self.rfile:
+            try:
+                texts = json.loads(line)['texts']
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError("texts must be a list of strings")
+                vectors = np.asarray(self.server.batcher.encode(texts), dtype='<f4')
+            except Exception as e:
+                self.wfile.write(json.dumps({'error': str(e)}).encode('utf-8') + b'\n')
+                self.wfile.flush()
+                continue
+            
+            count, dim = vectors.shape if vectors.size else (len(texts), self.server.embedding_dim)
+            header = json.dumps({'count': count, 'dim': dim}).encode('utf-8')
+            self.wfile.write(header + b'\n' + vectors.tobytes())
+            self.wfile.flush()
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(url, encoder, max_batch_size=64, max_wait=0.005):
+    """
+    Build (but do not start) an embedding server
+    
+    Args:
+        url: 'unix:///path/to/socket' or 'tcp://127.0.0.1:port'
+        encoder: Object with encode(texts, batch_size) and embedding_dim
+        max_batch_size: Maximum texts per forward pass
+        max_wait: Seconds to wait for more requests before encoding a batch
+    
+    Returns:
+        socketserver instance; call serve_forever() to run it
+    """
+    family, address = parse_service_url(url)
+    if family == socket.AF_UNIX:
+        if os.path.exists(address):
+            os.unlink(address)
+        server = ThreadingUnixServer(address, EmbeddingRequestHandler)
+    else:
+        server = ThreadingTCPServer(address, EmbeddingRequestHandler)
+    
+    server.batcher = BatchingEncoder(encoder, max_batch_size=max_batch_size, max_wait=max_wait)
+    server.embedding_dim = encoder.embedding_dim
+    return server
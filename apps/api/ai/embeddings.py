@@ -0,0 +1,236 @@
+"""
+Embedding backfill pipeline
+Keeps the pgvector embedding columns of issues and solutions up to date
+"""
+import hashlib
+import logging
+import time
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, CharField, Q
+from django.db.models.expressions import RawSQL
+
+from issues.models import Issue
+from wiki.models import Solution
+from .neighbours import refresh_issue_neighbours, refresh_solution_neighbours
+from .result_cache import get_result_cache
+from .semantic_search import get_search_service, to_vector_literal
+from .versioning import ACTIVE_COLUMN, column_model_name, get_active_version, get_building_version
+
+logger = logging.getLogger(__name__)
+
+
+def issue_embedding_text(row):
+    """Text embedded for an issue"""
+    return f"{row['title']}\n{row['description']}"
+
+
+def solution_embedding_text(row):
+    """Text embedded for a solution"""
+    keywords = ', '.join(str(k) for k in (row['problem_keywords'] or []))
+    return f"{row['title']}\n{row['description']}\n{keywords}".strip()
+
+
+# Embeddable models: source fields, how to turn them into text and what to
+# refresh once new embeddings are written
+EMBEDDING_TARGETS = {
+    'issues': {
+        'model': Issue,
+        'fields': ['title', 'description'],
+        'text': issue_embedding_text,
+        'after_write': refresh_issue_neighbours,
+    },
+    'solutions': {
+        'model': Solution,
+        'fields': ['title', 'description', 'problem_keywords'],
+        'text': solution_embedding_text,
+        'after_write': refresh_solution_neighbours,
+    },
+}
+
+
+def content_hash(text):
+    """Stable hash of the text an embedding is generated from"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def write_embeddings(model, rows, model_name, column=ACTIVE_COLUMN):
+    """
+    Write embeddings back with a single bulk UPDATE
+    
+    Other workers follow a cutover only at their next version check, so the
+    vectors may come from a model the column no longer holds. The column's
+    model is checked under a lock that makes a concurrent swap wait, and
+    such a write is skipped instead of mixing two models in one column.
+    
+    Args:
+        model: Issue or Solution
+        rows: List of (pk, embedding, text_hash) tuples
+        model_name: Model the embeddings were generated with
+        column: Embedding column to write (its hash lives in <column>_hash)
+    
+    Returns:
+        Number of rows written (0 if the column holds another model's vectors)
+    """
+    if not rows:
+        return 0
+    
+    values_sql = ', '.join(['(%s, %s::vector, %s)'] * len(rows))
+    params = []
+    for pk, embedding, text_hash in rows:
+        params.extend([pk, to_vector_literal(embedding), text_hash])
+    
+    table = model._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The lock an UPDATE takes anyway, taken first: column renames wait for this transaction
+        cursor.execute(f"LOCK TABLE {table} IN ROW EXCLUSIVE MODE")
+        if column_model_name(column) != model_name:
+            logger.info("Skipped %s embeddings of %s: %s no longer holds %s", len(rows), table, column, model_name)
+            return 0
+        cursor.execute(f"""
+            UPDATE {table} AS t
+            SET {column} = v.embedding, {column}_hash = v.text_hash
+            FROM (VALUES {values_sql}) AS v(id, embedding, text_hash)
+            WHERE t.id = v.id
+        """, params)
+    
+    if column == ACTIVE_COLUMN:
+        # Raw UPDATEs send no signals; new vectors can change any result list
+        get_result_cache().invalidate('issues' if model is Issue else 'solutions')
+    
+    return len(rows)
+
+
+class EmbeddingBackfill:
+    """
+    Finds rows whose embedding is missing or stale and re-embeds them in batches
+    
+    Rows are walked in primary key order, so a run can be resumed from the
+    last reported id. Rows whose stored hash matches their current text are
+    skipped without running the model, which also makes re-runs cheap.
+    """
+    
+    def __init__(self, target, batch_size=512, encode_batch_size=64, force=False,
+                 updated_since=None, search_service=None, column=ACTIVE_COLUMN):
+        """
+        Args:
+            target: Key of EMBEDDING_TARGETS ('issues' or 'solutions')
+            batch_size: Rows fetched, encoded and written per round trip
+            encode_batch_size: Texts per model forward pass
+            force: Re-embed every row even if its hash is unchanged
+            updated_since: Only consider rows without an embedding or updated after this datetime
+            search_service: SemanticSearchService used for encoding (default:
+                that of the column's version, looked up again for every batch)
+            column: Embedding column to fill; the shadow column of a version
+                being built is filled with that version's search service
+        """
+        if target not in EMBEDDING_TARGETS:
+            raise ValueError(f"Unknown embedding target: {target}")
+        
+        self.target = target
+        self.config = EMBEDDING_TARGETS[target]
+        self.batch_size = batch_size
+        self.encode_batch_size = encode_batch_size
+        self.force = force
+        self.updated_since = updated_since
+        self.search_service = search_service
+        self.column = column
+    
+    def column_version(self):
+        """Version whose vectors belong in the column, or None if no version is building"""
+        if self.column == ACTIVE_COLUMN:
+            return get_active_version()
+        return get_building_version()
+    
+    def get_queryset(self, start_after=0):
+        # Raw column references: shadow columns are not model fields
+        table = self.config['model']._meta.db_table
+        queryset = self.config['model'].objects.filter(pk__gt=start_after).annotate(
+            stored_hash=RawSQL(f"{table}.{self.column}_hash", [], output_field=CharField())
+        )
+        if self.updated_since is not None and self.column != ACTIVE_COLUMN:
+            # Shadow rows that were never embedded are left to the re-embed job
+            queryset = queryset.filter(updated_at__gte=self.updated_since)
+        elif self.updated_since is not None:
+            queryset = queryset.annotate(
+                missing=RawSQL(f"{table}.{self.column} IS NULL", [], output_field=BooleanField())
+            ).filter(
+                Q(missing=True) | Q(updated_at__gte=self.updated_since)
+            )
+        return queryset.order_by('pk').values('pk', 'stored_hash', *self.config['fields'])
+    
+    def run(self, start_after=0, max_rows=None, progress=None):
+        """
+        Embed all missing or stale rows
+        
+        Args:
+            start_after: Resume after this primary key
+            max_rows: Stop after scanning this many rows
+            progress: Optional callable receiving the stats dict after each batch
+        
+        Returns:
+            Stats dict with scanned/embedded counts, last_id and rows_per_sec
+        """
+        stats = {
+            'target': self.target,
+            'column': self.column,
+            'scanned': 0,
+            'embedded': 0,
+            'last_id': start_after,
+            'elapsed': 0.0,
+            'rows_per_sec': 0.0,
+        }
+        started = time.monotonic()
+        
+        while max_rows is None or stats['scanned'] < max_rows:
+            size = self.batch_size
+            if max_rows is not None:
+                size = min(size, max_rows - stats['scanned'])
+            
+            batch = list(self.get_queryset(stats['last_id'])[:size])
+            if not batch:
+                break
+            
+            version = self.column_version()
+            if version is None:
+                break
+            search_service = self.search_service or get_search_service(version)
+            
+            stale = []
+            for row in batch:
+                text = self.config['text'](row)
+                text_hash = content_hash(text)
+                if self.force or row['stored_hash'] != text_hash:
+                    stale.append((row['pk'], text, text_hash))
+            
+            if stale:
+                embeddings = search_service.generate_embeddings(
+                    [text for _, text, _ in stale],
+                    batch_size=self.encode_batch_size
+                )
+                written = write_embeddings(
+                    self.config['model'],
+                    [
+                        (pk, embedding, text_hash)
+                        for (pk, _, text_hash), embedding in zip(stale, embeddings)
+                    ],
+                    search_service.model_name,
+                    column=self.column
+                )
+                if not written:
+                    # A cutover happened since this run's encoder was chosen; the next run continues
+                    break
+                stats['embedded'] += written
+                if self.config['after_write'] and self.column == ACTIVE_COLUMN:
+                    self.config['after_write']([pk for pk, _, _ in stale])
+            
+            stats['scanned'] += len(batch)
+            stats['last_id'] = batch[-1]['pk']
+            stats['elapsed'] = time.monotonic() - started
+            stats['rows_per_sec'] = stats['embedded'] / stats['elapsed'] if stats['elapsed'] else 0.0
+            
+            if progress:
+                progress(dict(stats))
+        
+        return stats
+
@@ -0,0 +1,247 @@
+"""
+Embedding encoders used by the semantic search service
+Runs the sentence transformer in-process (torch or ONNX Runtime) or talks to the shared embedding server
+"""
+import json
+import os
+import socket
+import threading
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+class LocalEncoder:
+    """
+    Runs a sentence transformer model inside the current process
+    """
+    
+    def __init__(self, model_name='all-MiniLM-L6-v2'):
+        # Imported lazily so processes using the embedding server never load torch
+        from sentence_transformers import SentenceTransformer
+        
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.embedding_dim = self.model.get_sentence_embedding_dimension()
+    
+    def encode(self, texts, batch_size=64):
+        """
+        Encode texts into embeddings
+        
+        Args:
+            texts: List of input text strings
+            batch_size: Number of texts per model forward pass
+        
+        Returns:
+            float32 numpy array of shape (len(texts), embedding_dim)
+        """
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+
+class OnnxEncoder:
+    """
+    Runs an exported (optionally int8-quantized) sentence transformer on ONNX Runtime
+    
+    Only needs onnxruntime and tokenizers at runtime, so CPU-only API nodes
+    skip importing torch. The model directory is produced by
+    ``manage.py export_onnx_encoder`` and holds model.onnx, tokenizer.json
+    and encoder.json (pooling settings).
+    """
+    
+    def __init__(self, model_dir, threads=None):
+        """
+        Args:
+            model_dir: Directory written by export_onnx_encoder
+            threads: ONNX Runtime intra-op threads (default: one per core)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        with open(os.path.join(model_dir, 'encoder.json')) as f:
+            config = json.load(f)
+        
+        self.model_dir = model_dir
+        self.model_name = config['model_name']
+        self.embedding_dim = config['dim']
+        self.normalize = config['normalize']
+        
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=config['pad_token_id'], pad_token=config['pad_token'])
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, config['model_file']),
+            options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+    
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        
+        hidden = self.session.run(None, feeds)[0]
+        
+        # Mean pooling over real tokens, as in the sentence transformer
+        mask = attention_mask[..., np.newaxis].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+    
+    def encode(self, texts, batch_size=64):
+        """
+        Encode texts into embeddings
+        
+        Args:
+            texts: List of input text strings
+            batch_size: Number of texts per model forward pass
+        
+        Returns:
+            float32 numpy array of shape (len(texts), embedding_dim)
+        """
+        texts = list(texts)
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(texts), batch_size):
+            chunk = order[start:start + batch_size]
+            embeddings[chunk] = self._encode_batch([texts[i] for i in chunk])
+        
+        return embeddings
+
+
+def create_local_encoder(model_name, backend='torch', onnx_model_dir=None):
+    """
+    Create an in-process encoder
+    
+    Args:
+        model_name: Sentence transformer model name
+        backend: 'torch' (sentence-transformers) or 'onnx' (ONNX Runtime)
+        onnx_model_dir: Exported model directory, required for the onnx backend
+    
+    Returns:
+        LocalEncoder or OnnxEncoder
+    """
+    if backend == 'torch':
+        return LocalEncoder(model_name)
+    if backend == 'onnx':
+        encoder = OnnxEncoder(onnx_model_dir)
+        if encoder.model_name != model_name:
+            # Vectors of different models are not comparable
+            raise ValueError(
+                f"ONNX model in {onnx_model_dir} was exported from {encoder.model_name}, not {model_name}"
+            )
+        return encoder
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def parse_service_url(url):
+    """
+    Parse an embedding server URL
+    
+    Args:
+        url: 'unix:///path/to/socket' or 'tcp://host:port'
+    
+    Returns:
+        (socket family, address) tuple
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'unix':
+        return socket.AF_UNIX, parsed.path
+    if parsed.scheme == 'tcp':
+        return socket.AF_INET, (parsed.hostname or '127.0.0.1', parsed.port or 8765)
+    raise ValueError(f"Unsupported embedding service URL: {url}")
+
+
+class RemoteEncoder:
+    """
+    Client for the shared embedding server (see ai.embedding_server)
+    
+    Each thread keeps one persistent connection. Requests are a JSON line
+    {"texts": [...]}; responses are a JSON header line {"count": n, "dim": d}
+    followed by n * d little-endian float32 values.
+    """
+    
+    def __init__(self, url, timeout=10.0):
+        self.url = url
+        self.family, self.address = parse_service_url(url)
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def _connect(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        self._local.sock = sock
+        self._local.stream = sock.makefile('rwb')
+        return self._local.stream
+    
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.stream.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+        self._local.stream = None
+    
+    def _request(self, texts):
+        stream = getattr(self._local, 'stream', None) or self._connect()
+        stream.write(json.dumps({'texts': texts}).encode('utf-8') + b'\n')
+        stream.flush()
+        
+        header_line = stream.readline()
+        if not header_line:
+            raise ConnectionError("Embedding server closed the connection")
+        
+        header = json.loads(header_line)
+        if 'error' in header:
+            raise RuntimeError(f"Embedding server error: {header['error']}")
+        
+        count, dim = header['count'], header['dim']
+        payload = stream.read(count * dim * 4)
+        if len(payload) != count * dim * 4:
+            raise ConnectionError("Truncated response from embedding server")
+        
+        return np.frombuffer(payload, dtype='<f4').reshape(count, dim)
+    
+    def encode(self, texts, batch_size=None):
+        """
+        Encode texts on the embedding server
+        
+        Args:
+            texts: List of input text strings
+            batch_size: Ignored; the server batches across all clients
+        
+        Returns:
+            float32 numpy array of shape (len(texts), embedding_dim)
+        """
+        texts = list(texts)
+        try:
+            return self._request(texts)
+        except ConnectionError:
+            # Stale keep-alive connection (e.g. server restarted): retry once
+            self._close()
+            return self._request(texts)
+        except OSError:
+            # Timeouts leave the stream mid-response, so it cannot be reused
+            self._close()
+            raise
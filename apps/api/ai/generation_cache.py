@@ -0,0 +1,106 @@
+"""
+LLM generation cache
+Content-addressed cache of generated text, so repeated requests skip the model
+"""
+import asyncio
+import hashlib
+import json
+import unicodedata
+
+from .local_cache import LocalCache
+
+
+def normalize_prompt_input(value):
+    """
+    Normalize a prompt input so trivially different submissions share an entry
+    
+    Unicode is NFKC-normalized and whitespace collapsed. Case is kept: it can
+    matter in names, acronyms and section numbers of government documents.
+    """
+    if isinstance(value, str):
+        return ' '.join(unicodedata.normalize('NFKC', value).split())
+    return value
+
+
+class GenerationCache(LocalCache):
+    """
+    Two-tier cache of (prompt template, inputs, model, temperature) -> generated text
+    
+    The first tier is an in-process LRU with a TTL. The optional second tier
+    is Redis, shared by all workers, with the same TTL; Redis errors are
+    treated as misses.
+    """
+    
+    label = 'Generation cache'
+    
+    def __init__(self, max_size=1000, ttl=24 * 3600, redis_url=None):
+        """
+        Args:
+            max_size: Maximum entries kept in the in-process LRU
+            ttl: Seconds a generation is reused
+            redis_url: Redis URL for the shared tier (disabled if empty)
+        """
+        super().__init__(max_size, ttl=ttl, redis_url=redis_url)
+    
+    @staticmethod
+    def make_key(template, inputs, model, temperature):
+        """
+        Content address of a generation
+        
+        Args:
+            template: Prompt template id; bump its version when the prompt text changes
+            inputs: Dict of normalized template inputs
+            model: Model name
+            temperature: Sampling temperature
+        """
+        payload = json.dumps([template, inputs, model, temperature], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Cached text for a key, or None on a miss"""
+        text = self._get_local(key)
+        if text is not None:
+            self._count('local_hits')
+            return text
+        
+        payload = self._redis_command('get', f"llmgen:{key}")
+        if payload is not None:
+            text = payload.decode('utf-8')
+            self._set_local(key, text)
+            self._count('redis_hits')
+            return text
+        
+        self._count('misses')
+        return None
+    
+    def set(self, key, text):
+        """Store generated text in both tiers"""
+        self._set_local(key, text)
+        self._redis_command('set', f"llmgen:{key}", text.encode('utf-8'), ex=self.ttl)
+    
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached text for key, generating and storing it on a miss
+        
+        Empty generations are not stored, so a failed or truncated answer is
+        retried on the next request.
+        """
+        text = self.get(key)
+        if text is None:
+            text = compute()
+            if text:
+                self.set(key, text)
+        return text
+    
+    async def aget(self, key):
+        """Async get; Redis round trips run in a worker thread, off the event loop"""
+        if self._redis is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key, text):
+        """Async set (see aget)"""
+        if self._redis is None:
+            self.set(key, text)
+        else:
+            await asyncio.to_thread(self.set, key, text)
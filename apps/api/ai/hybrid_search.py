@@ -0,0 +1,164 @@
+"""
+Hybrid lexical + vector search
+Fuses MeiliSearch and pgvector rankings with reciprocal rank fusion
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import meilisearch
+from django.conf import settings
+from django.db import OperationalError
+
+from wiki.models import Solution
+from .semantic_search import get_search_service
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant; larger values flatten the rank contribution
+RRF_K = 60
+
+# Vector candidates only need to be loosely related: fusion does the ranking
+VECTOR_THRESHOLD = 0.3
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+# Lexical lookups run here so they overlap with the vector query in the request
+# thread; query encoding runs here too so the budget can bound it
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hybrid-search')
+_meili_client = None
+
+
+def get_meili_client():
+    """Get or create the MeiliSearch client"""
+    global _meili_client
+    if _meili_client is None:
+        _meili_client = meilisearch.Client(
+            settings.MEILI_URL,
+            settings.MEILI_MASTER_KEY,
+            timeout=settings.HYBRID_SEARCH_TIMEOUT_MS / 1000
+        )
+    return _meili_client
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse ranked lists of ids
+    
+    Args:
+        rankings: Dict of source name -> list of ids, best first
+        k: RRF damping constant
+    
+    Returns:
+        List of (id, score, sources) tuples, best first
+    """
+    scores = {}
+    sources = {}
+    for source, ids in rankings.items():
+        for rank, item_id in enumerate(ids, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+            sources.setdefault(item_id, []).append(source)
+    
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(item_id, score, sources[item_id]) for item_id, score in fused]
+
+
+def _lexical_solution_ids(query, limit):
+    hits = get_meili_client().index('solutions').search(
+        query,
+        {'limit': limit, 'attributesToRetrieve': ['id']}
+    )['hits']
+    return [hit['id'] for hit in hits]
+
+
+def hybrid_search_solutions(query, limit=10, timeout_ms=None):
+    """
+    Search solutions with MeiliSearch and pgvector concurrently and fuse the rankings
+    
+    Both sources share one latency budget. A source that errors or misses
+    the budget is reported in ``sources`` and left out of the fusion, so the
+    response degrades to the other source instead of stalling.
+    
+    Args:
+        query: Search query string
+        limit: Maximum number of results
+        timeout_ms: Latency budget (default: settings.HYBRID_SEARCH_TIMEOUT_MS)
+    
+    Returns:
+        Dict with 'results' (fused solution dicts) and 'sources' (per-source status)
+    """
+    timeout_ms = timeout_ms or settings.HYBRID_SEARCH_TIMEOUT_MS
+    deadline = time.monotonic() + timeout_ms / 1000
+    candidates = limit * 2
+    rankings = {}
+    sources = {}
+    
+    lexical_future = _executor.submit(_lexical_solution_ids, query, candidates)
+    
+    vector_rows = {}
+    try:
+        search_service = get_search_service()
+        query_embedding = _executor.submit(search_service.embed_query, query).result(
+            timeout=max(deadline - time.monotonic(), 0)
+        )
+        # The lookup gets what encoding left of the budget
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            raise FutureTimeoutError()
+        vector_results = search_service.search_solutions_by_embedding(
+            query_embedding,
+            limit=candidates,
+            threshold=VECTOR_THRESHOLD,
+            timeout_ms=remaining_ms
+        )
+        vector_rows = {row['id']: row for row in vector_results}
+        rankings['vector'] = [row['id'] for row in vector_results]
+        sources['vector'] = 'ok'
+    except FutureTimeoutError:
+        sources['vector'] = 'timeout'
+    except OperationalError as e:
+        # psycopg 3 reports the SQLSTATE as sqlstate, psycopg2 as pgcode
+        code = getattr(e.__cause__, 'sqlstate', None) or getattr(e.__cause__, 'pgcode', None)
+        if code != QUERY_CANCELED:
+            logger.warning("Hybrid search vector source failed: %s", e)
+        sources['vector'] = 'timeout' if code == QUERY_CANCELED else 'error'
+    except Exception as e:
+        logger.warning("Hybrid search vector source failed: %s", e)
+        sources['vector'] = 'error'
+    
+    try:
+        remaining = max(deadline - time.monotonic(), 0)
+        rankings['lexical'] = lexical_future.result(timeout=remaining)
+        sources['lexical'] = 'ok'
+    except FutureTimeoutError:
+        lexical_future.cancel()
+        sources['lexical'] = 'timeout'
+    except Exception as e:
+        logger.warning("Hybrid search lexical source failed: %s", e)
+        sources['lexical'] = 'error'
+    
+    fused = reciprocal_rank_fusion(rankings)[:limit]
+    
+    # Lexical-only hits still need their title and description
+    missing = [item_id for item_id, _, _ in fused if item_id not in vector_rows]
+    details = {
+        row['id']: row
+        for row in Solution.objects.filter(id__in=missing).values('id', 'title', 'description')
+    }
+    
+    results = []
+    for item_id, score, matched_by in fused:
+        row = vector_rows.get(item_id) or details.get(item_id)
+        if row is None:
+            continue  # Stale lexical index entry
+        results.append({
+            'id': item_id,
+            'title': row['title'],
+            'description': row['description'],
+            'similarity': vector_rows[item_id]['similarity'] if item_id in vector_rows else None,
+            'score': score,
+            'matched_by': matched_by,
+        })
+    
+    return {'results': results, 'sources': sources}
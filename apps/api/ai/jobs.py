@@ -0,0 +1,171 @@
+"""
+LLM jobs
+Long generations submitted to Celery workers instead of running inside the request
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .admission import set_llm_priority
+from .llm import get_llm_client
+from .models import LLMJob
+from .streaming import sse_event
+
+logger = logging.getLogger(__name__)
+
+# How each job kind calls the LLM client with its validated request data
+JOB_RUNNERS = {
+    'draft-complaint': lambda client, data: client.draft_complaint_letter(data),
+    'summarize-document': lambda client, data: client.summarize_document(data['document_text'], data['max_points']),
+    'generate-rti': lambda client, data: client.generate_rti_query(data['topic'], data['department']),
+}
+
+# Key of the generated text in the synchronous response of each endpoint
+RESULT_FIELDS = {
+    'draft-complaint': 'letter',
+    'summarize-document': 'summary',
+    'generate-rti': 'query',
+}
+
+
+def wants_job(request):
+    """Whether the client asked to run the generation as a background job (?job=true); DRF or plain Django request"""
+    params = getattr(request, 'query_params', request.GET)
+    return params.get('job', '').lower() in ('1', 'true', 'yes')
+
+
+def submit_job(kind, data, callback_url=''):
+    """
+    Store a job and queue it for a Celery worker once the transaction commits
+    
+    Args:
+        kind: Endpoint name (a key of JOB_RUNNERS)
+        data: Validated request data
+        callback_url: Optional URL receiving the finished job
+    
+    Returns:
+        LLMJob
+    """
+    from .tasks import run_llm_job_task
+    
+    job = LLMJob.objects.create(kind=kind, input=dict(data), callback_url=callback_url or '')
+    transaction.on_commit(lambda: run_llm_job_task.delay(str(job.id)))
+    return job
+
+
+def submitted_payload(request, job):
+    """Body of the 202 response to a job submission; events_url only where the event stream is served"""
+    payload = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': request.build_absolute_uri(reverse('llm-job', args=[job.id])),
+    }
+    if settings.AI_ASYNC_VIEWS:
+        payload['events_url'] = request.build_absolute_uri(reverse('llm-job-events', args=[job.id]))
+    return payload
+
+
+def run_job(job_id, client=None):
+    """
+    Run a pending job and record its result or error
+    
+    Args:
+        job_id: LLMJob id
+        client: LLM client (default: the process-wide client)
+    
+    Returns:
+        The finished LLMJob, or None if it was missing or already taken
+    """
+    claimed = LLMJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    )
+    if not claimed:
+        return None  # Redelivered message for a job another worker ran
+    
+    job = LLMJob.objects.get(pk=job_id)
+    set_llm_priority(job.kind)
+    try:
+        job.result = JOB_RUNNERS[job.kind](client or get_llm_client(), job.input)
+        job.status = 'succeeded'
+    except Exception as e:
+        logger.warning("LLM job %s failed: %s", job.id, e)
+        job.error = str(e)
+        job.status = 'failed'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'error', 'status', 'finished_at'])
+    return job
+
+
+def fail_stale_jobs():
+    """
+    Fail jobs left running longer than LLM_JOB_RUNNING_TIMEOUT by a worker that died
+    
+    Returns:
+        Ids of the jobs marked failed
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.LLM_JOB_RUNNING_TIMEOUT)
+    with transaction.atomic():
+        # Row locks: a job finishing meanwhile keeps its result
+        stale = list(
+            LLMJob.objects.select_for_update().filter(status='running', started_at__lt=cutoff)
+            .values_list('pk', flat=True)
+        )
+        LLMJob.objects.filter(pk__in=stale).update(
+            status='failed', error='The worker running the job was lost', finished_at=timezone.now()
+        )
+    if stale:
+        logger.warning("Failed %s LLM jobs left running by a lost worker", len(stale))
+    return stale
+
+
+def job_payload(job):
+    """API representation of a job; the result uses the endpoint's response key"""
+    payload = {
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == 'succeeded':
+        payload[RESULT_FIELDS[job.kind]] = job.result
+    elif job.status == 'failed':
+        payload['error'] = job.error
+    return payload
+
+
+async def job_events(job_id):
+    """
+    Server-Sent Events for a job: ``status`` on every change, then ``done`` or ``error``
+    
+    Polls the job row for up to LLM_JOB_EVENTS_TIMEOUT. Only served under
+    ASGI, where the waits between polls hold no thread; WSGI clients poll
+    the job or receive its webhook.
+    """
+    last_status = None
+    deadline = time.monotonic() + settings.LLM_JOB_EVENTS_TIMEOUT
+    while True:
+        job = await LLMJob.objects.filter(pk=job_id).afirst()
+        if job is None:
+            yield sse_event('error', {'error': 'Job not found'})
+            return
+        
+        if job.status != last_status:
+            last_status = job.status
+            yield sse_event('status', {'job_id': str(job.id), 'status': job.status})
+        
+        if job.finished:
+            yield sse_event('done' if job.status == 'succeeded' else 'error', job_payload(job))
+            return
+        
+        if time.monotonic() > deadline:
+            yield sse_event('error', {'job_id': str(job_id), 'error': 'Timed out waiting for the job'})
+            return
+        await asyncio.sleep(settings.LLM_JOB_EVENTS_POLL_INTERVAL)
@@ -2,125 +2,566 @@
 LLM service using Llama 3 via Ollama or OpenAI
 For jargon simplification and smart drafting
 """
+import asyncio
+import contextvars
+import json
+import logging
+import time
+import weakref
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import httpx
 import requests
-from openai import OpenAI
+from requests.adapters import HTTPAdapter
+from openai import AsyncOpenAI, OpenAI
 from django.conf import settings
 
+from .admission import AdmissionController, AdmissionRejected, current_priority
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .generation_cache import GenerationCache, normalize_prompt_input
+from .llm_metrics import LLMCall, LLMMetrics, collect_usage, current_call, report_usage
+from .single_flight import SingleFlight
+from .summarization import chunk_document, next_reduce_level
+
+logger = logging.getLogger(__name__)
+
+# Runs the calls of hedged generations so the request thread can wait on both
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='llm-hedge')
+
+
+def _simplify_jargon_prompt(text, language):
+    return f"""You are a helpful assistant that simplifies government and legal jargon for common citizens.
+
+Convert the following text into simple, easy-to-understand language that a person with basic education can comprehend. Keep it concise (3-5 bullet points).
+
+Text: {text}
+
+Simplified version:"""
+
+
+def _complaint_letter_prompt(issue_details):
+    return f"""You are a legal assistant helping citizens write formal complaint letters to government officials.
+
+Write a professional complaint letter with the following details:
+- Issue: {issue_details.get('issue', 'Civic problem')}
+- Location: {issue_details.get('location', 'Not specified')}
+- To: {issue_details.get('officer_name', '[Officer Name]')}, {issue_details.get('officer_designation', '[Designation]')}
+
+The letter should:
+1. Be formal and respectful
+2. Clearly state the problem
+3. Reference relevant Citizens Charter clauses (if applicable)
+4. Request specific action
+5. Mention timeline expectations
+
+Letter:"""
+
+
+def _summary_prompt(document_text, max_points):
+    return f"""Summarize the following government document into {max_points} key points that a citizen needs to know:
+
+{document_text}
+
+Summary:"""
+
+
+def _chunk_summary_prompt(section_text):
+    return f"""Summarize the following section of a government document in a few short bullet points. Keep every deadline, amount, eligibility condition and contact detail.
+
+Section:
+{section_text}
+
+Summary:"""
+
+
+def _combine_summaries_prompt(section_summaries, max_points):
+    return f"""The following are summaries of consecutive sections of one government document. Combine them into {max_points} key points that a citizen needs to know:
+
+{section_summaries}
+
+Summary:"""
+
+
+def _action_steps_prompt(solution_text):
+    return f"""Extract clear, actionable steps from the following solution. Format as a numbered list.
+
+Solution: {solution_text}
+
+Steps:"""
+
+
+def _rti_query_prompt(topic, department):
+    return f"""Generate a formal RTI (Right to Information) query for the following:
+
+Topic: {topic}
+Department: {department}
+
+The query should:
+1. Be specific and clear
+2. Reference RTI Act 2005
+3. Request information in a structured format
+4. Include timeline (30 days as per Act)
+
+RTI Query:"""
+
+
+def _parse_steps(response):
+    """Parse a numbered or bulleted list into step strings"""
+    steps = []
+    for line in response.split('\n'):
+        line = line.strip()
+        if line and (line[0].isdigit() or line.startswith('-')):
+            # Remove numbering
+            step = line.lstrip('0123456789.-) ')
+            if step:
+                steps.append(step)
+    
+    return steps
+
+
+def _ollama_usage(data):
+    """Token counts and prompt latency from an Ollama response (or the final chunk of a stream)"""
+    usage = {
+        'prompt_tokens': data.get('prompt_eval_count'),
+        'completion_tokens': data.get('eval_count'),
+    }
+    # Durations are in nanoseconds; loading the model and reading the prompt precede the first token
+    if 'prompt_eval_duration' in data:
+        usage['time_to_first_token'] = (data.get('load_duration', 0) + data['prompt_eval_duration']) / 1e9
+    return usage
 
-class LLMClient:
+
+def _openai_usage(usage):
+    """Token counts from an OpenAI usage object"""
+    if usage is None:
+        return {}
+    return {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+
+
+class BaseLLMClient:
+    """
+    Models, sampling settings and cache keys shared by the sync and async clients
+    """
+    
+    ollama_model = "llama3"
+    openai_model = "gpt-3.5-turbo"
+    temperature = 0.7
+    
+    def _ollama_payload(self, prompt, model, stream):
+        return {
+            "model": model or self.ollama_model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"temperature": self.temperature},
+            # How long Ollama keeps the model loaded after this request
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE
+        }
+    
+    def _request_key(self, template, inputs):
+        """Identity of a generation: its cache key and single-flight key"""
+        model = self.ollama_model if self.use_ollama else self.openai_model
+        return GenerationCache.make_key(template, inputs, model, self.temperature)
+    
+    def _backends(self):
+        """Configured backends, preferred first"""
+        backends = []
+        if self.use_ollama:
+            backends.append('ollama')
+        if self.openai_client:
+            backends.append('openai')
+        if not backends:
+            raise ValueError("OpenAI API key not configured")
+        return backends
+    
+    def _hedge_delay(self, backend):
+        """Seconds to wait on a backend before racing the next one, or None not to hedge"""
+        if not settings.LLM_HEDGE:
+            return None
+        p95 = self.breakers[backend].latency_percentile(0.95)
+        if p95 is None:
+            return None
+        return max(p95, settings.LLM_HEDGE_MIN_DELAY)
+
+
+class LLMClient(BaseLLMClient):
     """
     Client for LLM operations (Llama 3 via Ollama or OpenAI as fallback)
     """
     
-    def __init__(self, use_ollama=True):
+    def __init__(self, use_ollama=True, cache=None, ollama_url=None, single_flight=None, breakers=None,
+                 admission=None, metrics=None):
         self.use_ollama = use_ollama
-        self.ollama_url = "http://localhost:11434"  # Default Ollama URL
+        self.ollama_url = (ollama_url or settings.OLLAMA_URL).rstrip('/')
+        self.ollama_timeout = (settings.OLLAMA_CONNECT_TIMEOUT, settings.OLLAMA_READ_TIMEOUT)
+        self.session = self._build_session()
         self.openai_client = None
+        self.cache = cache
+        self.single_flight = single_flight
+        self.breakers = breakers if breakers is not None else get_circuit_breakers()
+        self.admission = admission
+        self.metrics = metrics if metrics is not None else get_llm_metrics()
         
-        if not use_ollama and settings.OPENAI_API_KEY:
+        # Configured whenever a key is set: the failover target for Ollama
+        if settings.OPENAI_API_KEY:
             self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
     
-    def _call_ollama(self, prompt, model="llama3"):
+    def _build_session(self):
+        """
+        HTTP session with a bounded keep-alive connection pool for Ollama
+        
+        Connections are reused across requests and threads; when all
+        OLLAMA_POOL_SIZE connections are busy, callers wait for one instead
+        of opening more.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.OLLAMA_POOL_SIZE,
+            pool_block=True,
+            max_retries=0
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def _call_ollama(self, prompt, model=None):
         """Call Ollama API"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ollama_url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=30
+                json=self._ollama_payload(prompt, model, stream=False),
+                timeout=self.ollama_timeout
             )
             response.raise_for_status()
-            return response.json().get('response', '')
+            data = response.json()
+            report_usage(_ollama_usage(data))
+            return data.get('response', '')
         except Exception as e:
-            print(f"Ollama error: {e}")
+            logger.warning("Ollama error: %s", e)
             raise
     
-    def _call_openai(self, prompt, model="gpt-3.5-turbo"):
+    def _call_openai(self, prompt, model=None):
         """Call OpenAI API as fallback"""
         if not self.openai_client:
             raise ValueError("OpenAI API key not configured")
         
         try:
             response = self.openai_client.chat.completions.create(
-                model=model,
+                model=model or self.openai_model,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
+                temperature=self.temperature,
                 max_tokens=500
             )
+            report_usage(_openai_usage(response.usage))
             return response.choices[0].message.content
         except Exception as e:
-            print(f"OpenAI error: {e}")
+            logger.warning("OpenAI error: %s", e)
             raise
     
+    def _stream_ollama(self, prompt, model=None, usage=None):
+        """Stream generated text chunks from the Ollama API; token counts are written to usage"""
+        with self.session.post(
+            f"{self.ollama_url}/api/generate",
+            json=self._ollama_payload(prompt, model, stream=True),
+            stream=True,
+            timeout=self.ollama_timeout  # The read timeout bounds the gap between chunks
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    if usage is not None:
+                        usage.update(_ollama_usage(chunk))
+                    break
+    
+    def _stream_openai(self, prompt, model=None, usage=None):
+        """Stream generated text chunks from the OpenAI API; token counts are written to usage"""
+        if not self.openai_client:
+            raise ValueError("OpenAI API key not configured")
+        
+        stream = self.openai_client.chat.completions.create(
+            model=model or self.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            max_tokens=500,
+            stream=True,
+            # The last event then carries the token counts
+            stream_options={"include_usage": True}
+        )
+        for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+            if event.usage is not None and usage is not None:
+                usage.update(_openai_usage(event.usage))
+    
+    def generate_stream(self, prompt, call=None):
+        """
+        Generate text from prompt as a stream of chunks
+        
+        Backends are tried in order, skipping those whose circuit is open.
+        Falls back only if a backend fails before producing any output; a
+        stream that breaks halfway cannot be resumed elsewhere.
+        
+        Args:
+            prompt: Prompt text
+            call: Optional LLMCall receiving the backend, tokens and time to first token
+        """
+        backends = self._backends()
+        last_error = None
+        for backend in backends:
+            breaker = self.breakers[backend]
+            if not breaker.allow():
+                continue
+            
+            stream = self._stream_ollama if backend == 'ollama' else self._stream_openai
+            started = False
+            usage = {}
+            attempt_started = time.monotonic()
+            try:
+                with self._admission_slot(backend):
+                    for chunk in stream(prompt, usage=usage):
+                        if call is not None:
+                            call.first_token()
+                        started = True
+                        yield chunk
+            except AdmissionRejected as e:
+                last_error = e
+                continue
+            except Exception as e:
+                logger.warning("LLM stream error (%s): %s", backend, e)
+                breaker.record_failure()
+                self.metrics.record_attempt(backend, time.monotonic() - attempt_started, usage, ok=False)
+                if started:
+                    raise
+                last_error = e
+                continue
+            else:
+                breaker.record_success()
+                self.metrics.record_attempt(backend, time.monotonic() - attempt_started, usage)
+                if call is not None:
+                    call.served_by(backend, backends[0], usage)
+                return
+            finally:
+                # Queue rejections and abandoned streams leave no outcome
+                breaker.release()
+        
+        raise last_error or CircuitOpenError("All LLM backends are unavailable")
+    
+    def _admission_slot(self, backend):
+        """Queue slot for a call to the local model; remote backends are not queued"""
+        if backend != 'ollama' or self.admission is None:
+            return nullcontext()
+        return self.admission.slot(current_priority())
+    
+    def _call(self, backend, prompt):
+        """Call one backend, recording the outcome, latency and tokens on its breaker and the metrics"""
+        call = self._call_ollama if backend == 'ollama' else self._call_openai
+        breaker = self.breakers[backend]
+        try:
+            # Rejections by the queue are raised here, before anything is recorded on the breaker
+            with self._admission_slot(backend):
+                started = time.monotonic()
+                with collect_usage() as usage:
+                    try:
+                        text = call(prompt)
+                    except Exception:
+                        breaker.record_failure(time.monotonic() - started)
+                        self.metrics.record_attempt(backend, time.monotonic() - started, usage, ok=False)
+                        raise
+            latency = time.monotonic() - started
+            breaker.record_success(latency)
+        finally:
+            breaker.release()
+        self.metrics.record_attempt(backend, latency, usage)
+        
+        llm_call = current_call()
+        if llm_call is not None:
+            llm_call.served_by(backend, self._backends()[0], usage)
+        return text
+    
     def generate(self, prompt):
-        """Generate text from prompt"""
-        if self.use_ollama:
+        """
+        Generate text from prompt
+        
+        Backends are tried in order (Ollama, then OpenAI as fallback),
+        skipping any whose circuit breaker is open, so an unhealthy backend
+        costs no timeout. With LLM_HEDGE, a call still running after the
+        backend's recent p95 latency is raced against the next backend.
+        """
+        backends = self._backends()
+        last_error = None
+        for i, backend in enumerate(backends):
+            if not self.breakers[backend].allow():
+                continue
+            
+            hedge_delay = self._hedge_delay(backend) if i + 1 < len(backends) else None
+            if hedge_delay is not None:
+                return self._generate_hedged(prompt, backend, backends[i + 1], hedge_delay)
+            
             try:
-                return self._call_ollama(prompt)
-            except:
-                # Fallback to OpenAI if Ollama fails
-                if self.openai_client:
-                    return self._call_openai(prompt)
+                return self._call(backend, prompt)
+            except Exception as e:
+                last_error = e
+        
+        raise last_error or CircuitOpenError("All LLM backends are unavailable")
+    
+    def _generate_hedged(self, prompt, primary, secondary, delay):
+        """Call primary; if it has not answered after delay seconds, race secondary against it"""
+        # Copies of the request context carry its queue priority into the executor threads
+        primary_future = _hedge_executor.submit(contextvars.copy_context().run, self._call, primary, prompt)
+        try:
+            return primary_future.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        except Exception:
+            # Failed fast: plain failover
+            if not self.breakers[secondary].allow():
                 raise
-        else:
-            return self._call_openai(prompt)
+            return self._call(secondary, prompt)
+        
+        if not self.breakers[secondary].allow():
+            return primary_future.result()
+        
+        # The losing call runs to completion in the background; its outcome still feeds its breaker
+        pending = {
+            primary_future,
+            _hedge_executor.submit(contextvars.copy_context().run, self._call, secondary, prompt)
+        }
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
     
-    def simplify_jargon(self, text, language='en'):
+    def generate_cached(self, template, inputs, build_prompt, stream=False):
+        """
+        Generate text through the generation cache
+        
+        On a cache miss, concurrent identical requests are coalesced into one
+        generation by the single-flight group. Streams are not coalesced.
+        
+        Args:
+            template: Prompt template id, versioned (e.g. 'simplify_jargon/v1')
+            inputs: Dict of template inputs; normalized before use
+            build_prompt: Callable building the prompt from the normalized inputs
+            stream: Return an iterator of text chunks instead of the full text
+        
+        Returns:
+            Generated text, or an iterator of chunks when streaming
+        """
+        inputs = {name: normalize_prompt_input(value) for name, value in inputs.items()}
+        key = self._request_key(template, inputs)
+        
+        if stream:
+            call = LLMCall(template, stream=True)
+            return self._tracked_stream(call, self._stream_cached(key, build_prompt(**inputs), call))
+        
+        with self.metrics.track(template) as call:
+            if self.cache is not None:
+                text = self.cache.get(key)
+                if text is not None:
+                    call.hit_cache()
+                    return text
+            
+            def compute():
+                text = self.generate(build_prompt(**inputs))
+                # Empty generations are not stored, so they are retried next time
+                if text and self.cache is not None:
+                    self.cache.set(key, text)
+                return text
+            
+            if self.single_flight is None:
+                return compute()
+            return self.single_flight.do(key, compute)
+    
+    def _stream_cached(self, key, prompt, call):
+        """Stream a generation, replaying a cached one as a single chunk"""
+        text = self.cache.get(key) if self.cache is not None else None
+        if text is not None:
+            call.hit_cache()
+            call.first_token()
+            yield text
+            return
+        
+        parts = []
+        for chunk in self.generate_stream(prompt, call=call):
+            parts.append(chunk)
+            yield chunk
+        
+        # Only complete streams reach this point (a disconnect closes the generator)
+        text = ''.join(parts)
+        if text and self.cache is not None:
+            self.cache.set(key, text)
+    
+    def _tracked_stream(self, call, chunks):
+        """Relay a stream, recording its LLMCall once it ends, fails or is closed by a disconnect"""
+        try:
+            yield from chunks
+        except GeneratorExit:
+            call.error = 'disconnected'
+            raise
+        except Exception as e:
+            call.error = type(e).__name__
+            raise
+        finally:
+            self.metrics.record(call)
+    
+    def simplify_jargon(self, text, language='en', stream=False):
         """
         Convert government jargon to plain language
         
         Args:
             text: Complex government text
             language: Target language code
+            stream: Return an iterator of text chunks
         
         Returns:
             Simplified text
         """
-        prompt = f"""You are a helpful assistant that simplifies government and legal jargon for common citizens.
-
-Convert the following text into simple, easy-to-understand language that a person with basic education can comprehend. Keep it concise (3-5 bullet points).
-
-Text: {text}
-
-Simplified version:"""
-        
-        return self.generate(prompt)
+        return self.generate_cached(
+            'simplify_jargon/v1', {'text': text, 'language': language}, _simplify_jargon_prompt, stream=stream
+        )
     
-    def draft_complaint_letter(self, issue_details):
+    def draft_complaint_letter(self, issue_details, stream=False):
         """
         Generate a formal complaint letter
         
         Args:
             issue_details: Dict with keys: issue, location, officer_name, officer_designation
+            stream: Return an iterator of text chunks
         
         Returns:
             Formatted complaint letter
         """
-        prompt = f"""You are a legal assistant helping citizens write formal complaint letters to government officials.
-
-Write a professional complaint letter with the following details:
-- Issue: {issue_details.get('issue', 'Civic problem')}
-- Location: {issue_details.get('location', 'Not specified')}
-- To: {issue_details.get('officer_name', '[Officer Name]')}, {issue_details.get('officer_designation', '[Designation]')}
-
-The letter should:
-1. Be formal and respectful
-2. Clearly state the problem
-3. Reference relevant Citizens Charter clauses (if applicable)
-4. Request specific action
-5. Mention timeline expectations
-
-Letter:"""
+        prompt = _complaint_letter_prompt(issue_details)
         
-        return self.generate(prompt)
+        if stream:
+            call = LLMCall('draft_complaint_letter', stream=True)
+            return self._tracked_stream(call, self.generate_stream(prompt, call=call))
+        with self.metrics.track('draft_complaint_letter'):
+            return self.generate(prompt)
     
     def summarize_document(self, document_text, max_points=5):
         """
         Summarize long government documents
         
+        A document longer than SUMMARY_CHUNK_CHARS is summarized map-reduce
+        style: its paragraph-aligned chunks are summarized concurrently (at
+        most SUMMARY_MAP_CONCURRENCY at a time), section summaries that do
+        not fit one prompt are summarized again in groups, and the rest are
+        combined into the key points. Chunk summaries go through the
+        generation cache, so re-summarizing an edited document only
+        regenerates the chunks that changed.
+        
         Args:
             document_text: Full document text
             max_points: Maximum bullet points
@@ -128,13 +569,39 @@ Letter:"""
         Returns:
             Summarized text
         """
-        prompt = f"""Summarize the following government document into {max_points} key points that a citizen needs to know:
-
-{document_text[:2000]}  # Limit input length
-
-Summary:"""
+        chunks = chunk_document(document_text, settings.SUMMARY_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            return self.generate_cached(
+                'summarize_document/v1',
+                {'document_text': document_text, 'max_points': max_points},
+                _summary_prompt
+            )
+        
+        summaries = self._summarize_sections(chunks)
+        groups = next_reduce_level(summaries, settings.SUMMARY_CHUNK_CHARS)
+        while groups:
+            summaries = self._summarize_sections(groups)
+            groups = next_reduce_level(summaries, settings.SUMMARY_CHUNK_CHARS)
+        
+        return self.generate_cached(
+            'combine_summaries/v1',
+            {'section_summaries': '\n\n'.join(summaries), 'max_points': max_points},
+            _combine_summaries_prompt
+        )
+    
+    def _summarize_sections(self, sections):
+        """Summarize sections concurrently, keeping document order"""
+        def summarize(section):
+            return self.generate_cached('summarize_chunk/v1', {'section_text': section}, _chunk_summary_prompt)
         
-        return self.generate(prompt)
+        workers = min(settings.SUMMARY_MAP_CONCURRENCY, len(sections))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-summary') as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, summarize, section)
+                for section in sections
+            ]
+            summaries = [future.result() for future in futures]
+        return [summary for summary in summaries if summary]
     
     def extract_action_steps(self, solution_text):
         """
@@ -146,25 +613,10 @@ Summary:"""
         Returns:
             List of action steps
         """
-        prompt = f"""Extract clear, actionable steps from the following solution. Format as a numbered list.
-
-Solution: {solution_text}
-
-Steps:"""
-        
-        response = self.generate(prompt)
-        
-        # Parse numbered list
-        steps = []
-        for line in response.split('\n'):
-            line = line.strip()
-            if line and (line[0].isdigit() or line.startswith('-')):
-                # Remove numbering
-                step = line.lstrip('0123456789.-) ')
-                if step:
-                    steps.append(step)
-        
-        return steps
+        response = self.generate_cached(
+            'extract_action_steps/v1', {'solution_text': solution_text}, _action_steps_prompt
+        )
+        return _parse_steps(response)
     
     def generate_rti_query(self, topic, department):
         """
@@ -177,28 +629,465 @@ Steps:"""
         Returns:
             RTI query text
         """
-        prompt = f"""Generate a formal RTI (Right to Information) query for the following:
+        return self.generate_cached(
+            'generate_rti_query/v1', {'topic': topic, 'department': department}, _rti_query_prompt
+        )
 
-Topic: {topic}
-Department: {department}
 
-The query should:
-1. Be specific and clear
-2. Reference RTI Act 2005
-3. Request information in a structured format
-4. Include timeline (30 days as per Act)
-
-RTI Query:"""
+class AsyncLLMClient(BaseLLMClient):
+    """
+    Async LLM client for the ASGI views
+    
+    Same prompts, models, fallback and generation cache as LLMClient, but
+    upstream calls are awaited, so a waiting generation holds a coroutine
+    instead of a worker thread. Ollama connections come from an httpx pool
+    of OLLAMA_POOL_SIZE; requests beyond that wait for a free connection.
+    """
+    
+    def __init__(self, use_ollama=True, cache=None, ollama_url=None, single_flight=None, breakers=None,
+                 admission=None, metrics=None):
+        self.use_ollama = use_ollama
+        self.ollama_url = (ollama_url or settings.OLLAMA_URL).rstrip('/')
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.OLLAMA_READ_TIMEOUT,
+                connect=settings.OLLAMA_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_POOL_SIZE,
+                max_keepalive_connections=settings.OLLAMA_POOL_SIZE
+            )
+        )
+        self.openai_client = None
+        self.cache = cache
+        self.single_flight = single_flight
+        self.breakers = breakers if breakers is not None else get_circuit_breakers()
+        self.admission = admission
+        self.metrics = metrics if metrics is not None else get_llm_metrics()
         
-        return self.generate(prompt)
+        if settings.OPENAI_API_KEY:
+            self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    
+    async def _call_ollama(self, prompt, model=None):
+        """Call Ollama API"""
+        try:
+            response = await self.http.post(
+                f"{self.ollama_url}/api/generate",
+                json=self._ollama_payload(prompt, model, stream=False)
+            )
+            response.raise_for_status()
+            data = response.json()
+            report_usage(_ollama_usage(data))
+            return data.get('response', '')
+        except Exception as e:
+            logger.warning("Ollama error: %s", e)
+            raise
+    
+    async def _call_openai(self, prompt, model=None):
+        """Call OpenAI API as fallback"""
+        if not self.openai_client:
+            raise ValueError("OpenAI API key not configured")
+        
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=model or self.openai_model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                max_tokens=500
+            )
+            report_usage(_openai_usage(response.usage))
+            return response.choices[0].message.content
+        except Exception as e:
+            logger.warning("OpenAI error: %s", e)
+            raise
+    
+    async def _stream_ollama(self, prompt, model=None, usage=None):
+        """Stream generated text chunks from the Ollama API; token counts are written to usage"""
+        async with self.http.stream(
+            'POST',
+            f"{self.ollama_url}/api/generate",
+            json=self._ollama_payload(prompt, model, stream=True)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    if usage is not None:
+                        usage.update(_ollama_usage(chunk))
+                    break
+    
+    async def _stream_openai(self, prompt, model=None, usage=None):
+        """Stream generated text chunks from the OpenAI API; token counts are written to usage"""
+        if not self.openai_client:
+            raise ValueError("OpenAI API key not configured")
+        
+        stream = await self.openai_client.chat.completions.create(
+            model=model or self.openai_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            max_tokens=500,
+            stream=True,
+            # The last event then carries the token counts
+            stream_options={"include_usage": True}
+        )
+        async for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+            if event.usage is not None and usage is not None:
+                usage.update(_openai_usage(event.usage))
+    
+    async def generate_stream(self, prompt, call=None):
+        """Generate text from prompt as an async stream of chunks (see LLMClient.generate_stream)"""
+        backends = self._backends()
+        last_error = None
+        for backend in backends:
+            breaker = self.breakers[backend]
+            if not breaker.allow():
+                continue
+            
+            stream = self._stream_ollama if backend == 'ollama' else self._stream_openai
+            started = False
+            usage = {}
+            attempt_started = time.monotonic()
+            try:
+                async with self._admission_slot(backend):
+                    async for chunk in stream(prompt, usage=usage):
+                        if call is not None:
+                            call.first_token()
+                        started = True
+                        yield chunk
+            except AdmissionRejected as e:
+                last_error = e
+                continue
+            except Exception as e:
+                logger.warning("LLM stream error (%s): %s", backend, e)
+                breaker.record_failure()
+                self.metrics.record_attempt(backend, time.monotonic() - attempt_started, usage, ok=False)
+                if started:
+                    raise
+                last_error = e
+                continue
+            else:
+                breaker.record_success()
+                self.metrics.record_attempt(backend, time.monotonic() - attempt_started, usage)
+                if call is not None:
+                    call.served_by(backend, backends[0], usage)
+                return
+            finally:
+                # Queue rejections and abandoned streams leave no outcome
+                breaker.release()
+        
+        raise last_error or CircuitOpenError("All LLM backends are unavailable")
+    
+    def _admission_slot(self, backend):
+        """Queue slot for a call to the local model; remote backends are not queued"""
+        if backend != 'ollama' or self.admission is None:
+            return nullcontext()
+        return self.admission.aslot(current_priority())
+    
+    async def _call(self, backend, prompt):
+        """Call one backend, recording the outcome, latency and tokens on its breaker and the metrics"""
+        call = self._call_ollama if backend == 'ollama' else self._call_openai
+        breaker = self.breakers[backend]
+        try:
+            async with self._admission_slot(backend):
+                started = time.monotonic()
+                with collect_usage() as usage:
+                    try:
+                        text = await call(prompt)
+                    except Exception:
+                        breaker.record_failure(time.monotonic() - started)
+                        self.metrics.record_attempt(backend, time.monotonic() - started, usage, ok=False)
+                        raise
+            latency = time.monotonic() - started
+            breaker.record_success(latency)
+        finally:
+            # Also reached by a cancelled hedge loser
+            breaker.release()
+        self.metrics.record_attempt(backend, latency, usage)
+        
+        llm_call = current_call()
+        if llm_call is not None:
+            llm_call.served_by(backend, self._backends()[0], usage)
+        return text
+    
+    async def generate(self, prompt):
+        """Generate text from prompt (see LLMClient.generate)"""
+        backends = self._backends()
+        last_error = None
+        for i, backend in enumerate(backends):
+            if not self.breakers[backend].allow():
+                continue
+            
+            hedge_delay = self._hedge_delay(backend) if i + 1 < len(backends) else None
+            if hedge_delay is not None:
+                return await self._generate_hedged(prompt, backend, backends[i + 1], hedge_delay)
+            
+            try:
+                return await self._call(backend, prompt)
+            except Exception as e:
+                last_error = e
+        
+        raise last_error or CircuitOpenError("All LLM backends are unavailable")
+    
+    async def _generate_hedged(self, prompt, primary, secondary, delay):
+        """Call primary; if it has not answered after delay seconds, race secondary against it"""
+        primary_task = asyncio.ensure_future(self._call(primary, prompt))
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            try:
+                return primary_task.result()
+            except Exception:
+                if not self.breakers[secondary].allow():
+                    raise
+                return await self._call(secondary, prompt)
+        
+        if not self.breakers[secondary].allow():
+            return await primary_task
+        
+        pending = {primary_task, asyncio.ensure_future(self._call(secondary, prompt))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing request can be cancelled
+            for task in pending:
+                task.cancel()
+    
+    async def generate_cached(self, template, inputs, build_prompt, stream=False):
+        """
+        Generate text through the generation cache (see LLMClient.generate_cached)
+        
+        Returns:
+            Generated text, or an async iterator of chunks when streaming
+        """
+        inputs = {name: normalize_prompt_input(value) for name, value in inputs.items()}
+        key = self._request_key(template, inputs)
+        
+        if stream:
+            call = LLMCall(template, stream=True)
+            return self._tracked_stream(call, self._stream_cached(key, build_prompt(**inputs), call))
+        
+        with self.metrics.track(template) as call:
+            if self.cache is not None:
+                text = await self.cache.aget(key)
+                if text is not None:
+                    call.hit_cache()
+                    return text
+            
+            async def compute():
+                text = await self.generate(build_prompt(**inputs))
+                if text and self.cache is not None:
+                    await self.cache.aset(key, text)
+                return text
+            
+            if self.single_flight is None:
+                return await compute()
+            return await self.single_flight.ado(key, compute)
+    
+    async def _stream_cached(self, key, prompt, call):
+        """Stream a generation, replaying a cached one as a single chunk"""
+        text = await self.cache.aget(key) if self.cache is not None else None
+        if text is not None:
+            call.hit_cache()
+            call.first_token()
+            yield text
+            return
+        
+        parts = []
+        async for chunk in self.generate_stream(prompt, call=call):
+            parts.append(chunk)
+            yield chunk
+        
+        text = ''.join(parts)
+        if text and self.cache is not None:
+            await self.cache.aset(key, text)
+    
+    async def _tracked_stream(self, call, chunks):
+        """Relay a stream, recording its LLMCall once it ends, fails or is closed by a disconnect"""
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            call.error = 'disconnected'
+            raise
+        except Exception as e:
+            call.error = type(e).__name__
+            raise
+        finally:
+            self.metrics.record(call)
+    
+    async def simplify_jargon(self, text, language='en', stream=False):
+        """Convert government jargon to plain language (see LLMClient.simplify_jargon)"""
+        return await self.generate_cached(
+            'simplify_jargon/v1', {'text': text, 'language': language}, _simplify_jargon_prompt, stream=stream
+        )
+    
+    async def draft_complaint_letter(self, issue_details, stream=False):
+        """Generate a formal complaint letter (see LLMClient.draft_complaint_letter)"""
+        prompt = _complaint_letter_prompt(issue_details)
+        
+        if stream:
+            call = LLMCall('draft_complaint_letter', stream=True)
+            return self._tracked_stream(call, self.generate_stream(prompt, call=call))
+        with self.metrics.track('draft_complaint_letter'):
+            return await self.generate(prompt)
+    
+    async def summarize_document(self, document_text, max_points=5):
+        """Summarize long government documents, map-reduce style (see LLMClient.summarize_document)"""
+        chunks = chunk_document(document_text, settings.SUMMARY_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            return await self.generate_cached(
+                'summarize_document/v1',
+                {'document_text': document_text, 'max_points': max_points},
+                _summary_prompt
+            )
+        
+        summaries = await self._summarize_sections(chunks)
+        groups = next_reduce_level(summaries, settings.SUMMARY_CHUNK_CHARS)
+        while groups:
+            summaries = await self._summarize_sections(groups)
+            groups = next_reduce_level(summaries, settings.SUMMARY_CHUNK_CHARS)
+        
+        return await self.generate_cached(
+            'combine_summaries/v1',
+            {'section_summaries': '\n\n'.join(summaries), 'max_points': max_points},
+            _combine_summaries_prompt
+        )
+    
+    async def _summarize_sections(self, sections):
+        """Summarize sections concurrently, keeping document order"""
+        semaphore = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+        
+        async def summarize(section):
+            async with semaphore:
+                return await self.generate_cached(
+                    'summarize_chunk/v1', {'section_text': section}, _chunk_summary_prompt
+                )
+        
+        summaries = await asyncio.gather(*(summarize(section) for section in sections))
+        return [summary for summary in summaries if summary]
+    
+    async def extract_action_steps(self, solution_text):
+        """Extract actionable steps from a solution description"""
+        response = await self.generate_cached(
+            'extract_action_steps/v1', {'solution_text': solution_text}, _action_steps_prompt
+        )
+        return _parse_steps(response)
+    
+    async def generate_rti_query(self, topic, department):
+        """Generate an RTI query template"""
+        return await self.generate_cached(
+            'generate_rti_query/v1', {'topic': topic, 'department': department}, _rti_query_prompt
+        )
 
 
-# Singleton instance
+# Singleton instances
 _llm_client = None
+_generation_cache = None
+_single_flight = None
+_circuit_breakers = None
+_admission_controller = None
+_llm_metrics = None
+# Async clients hold connections bound to an event loop, so there is one per loop
+_async_llm_clients = weakref.WeakKeyDictionary()
+
+
+def get_generation_cache():
+    """Get or create the generation cache shared by the sync and async clients"""
+    global _generation_cache
+    if _generation_cache is None and settings.LLM_CACHE_SIZE:
+        _generation_cache = GenerationCache(
+            max_size=settings.LLM_CACHE_SIZE,
+            ttl=settings.LLM_CACHE_TTL,
+            redis_url=settings.LLM_CACHE_REDIS_URL
+        )
+    return _generation_cache
+
+
+def get_circuit_breakers():
+    """Get or create the per-backend circuit breakers shared by all clients of this process"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = {
+            backend: CircuitBreaker(
+                backend,
+                window=settings.LLM_BREAKER_WINDOW,
+                min_calls=settings.LLM_BREAKER_MIN_CALLS,
+                error_rate=settings.LLM_BREAKER_ERROR_RATE,
+                slow_call_seconds=settings.LLM_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate=settings.LLM_BREAKER_SLOW_CALL_RATE,
+                open_seconds=settings.LLM_BREAKER_OPEN_SECONDS
+            )
+            for backend in ('ollama', 'openai')
+        }
+    return _circuit_breakers
+
+
+def get_llm_metrics():
+    """Get or create the call accounting shared by all clients of this process"""
+    global _llm_metrics
+    if _llm_metrics is None:
+        _llm_metrics = LLMMetrics()
+    return _llm_metrics
+
+
+def get_admission_controller():
+    """Get or create the queue in front of the local model (None when disabled)"""
+    global _admission_controller
+    if _admission_controller is None and settings.LLM_MAX_CONCURRENCY:
+        _admission_controller = AdmissionController(
+            max_concurrent=settings.LLM_MAX_CONCURRENCY,
+            max_queue=settings.LLM_QUEUE_SIZE,
+            max_wait=settings.LLM_QUEUE_TIMEOUT
+        )
+    return _admission_controller
+
+
+def get_single_flight():
+    """Get or create the single-flight group coalescing identical generations"""
+    global _single_flight
+    if _single_flight is None and settings.LLM_SINGLE_FLIGHT:
+        _single_flight = SingleFlight(
+            redis_url=settings.LLM_SINGLE_FLIGHT_REDIS_URL,
+            lock_ttl=settings.LLM_SINGLE_FLIGHT_LOCK_TTL
+        )
+    return _single_flight
+
 
 def get_llm_client(use_ollama=True):
     """Get or create LLM client instance"""
     global _llm_client
     if _llm_client is None:
-        _llm_client = LLMClient(use_ollama=use_ollama)
+        _llm_client = LLMClient(
+            use_ollama=use_ollama,
+            cache=get_generation_cache(),
+            single_flight=get_single_flight(),
+            admission=get_admission_controller()
+        )
     return _llm_client
+
+
+def get_async_llm_client(use_ollama=True):
+    """Get or create the async LLM client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_llm_clients.get(loop)
+    if client is None:
+        client = AsyncLLMClient(
+            use_ollama=use_ollama,
+            cache=get_generation_cache(),
+            single_flight=get_single_flight(),
+            admission=get_admission_controller()
+        )
+        _async_llm_clients[loop] = client
+    return client
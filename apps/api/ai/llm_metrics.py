@@ -0,0 +1,233 @@
+"""
+LLM call accounting
+Tokens, latency, time to first token, backend, cache hits and fallbacks of every LLM request
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_current_call = contextvars.ContextVar('llm_call', default=None)
+_attempt_usage = contextvars.ContextVar('llm_usage', default=None)
+
+
+def current_call():
+    """The LLMCall of the request being served in this context, or None"""
+    return _current_call.get()
+
+
+@contextmanager
+def collect_usage():
+    """Collect the token counts a backend call reports with report_usage"""
+    usage = {}
+    token = _attempt_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _attempt_usage.reset(token)
+
+
+def report_usage(usage):
+    """Report the token counts of a backend response to the enclosing collect_usage block"""
+    collected = _attempt_usage.get()
+    if collected is not None:
+        collected.update(usage)
+
+
+def _percentile_ms(samples, percentile):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(int(percentile * len(ordered)), len(ordered) - 1)] * 1000, 1)
+
+
+class LLMCall:
+    """
+    Accounting of one LLM request, filled in as it passes the cache and backends
+    
+    backend is 'cache' for a cache hit, and 'shared' when the text came from
+    an identical request in flight at the same time (single-flight follower).
+    Time to first token is measured for streams; for other Ollama calls it
+    is the model load and prompt evaluation time Ollama reports.
+    """
+    
+    def __init__(self, operation, stream=False):
+        self.operation = operation
+        self.stream = stream
+        self.started = time.monotonic()
+        self.backend = None
+        self.fallback = False
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.time_to_first_token = None
+        self.latency = None
+        self.error = None
+        self._lock = threading.Lock()
+    
+    @property
+    def cache_hit(self):
+        return self.backend == 'cache'
+    
+    def hit_cache(self):
+        self.backend = 'cache'
+    
+    def first_token(self):
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.monotonic() - self.started
+    
+    def served_by(self, backend, preferred, usage):
+        """
+        Record the backend whose output answers the request
+        
+        Only the first backend to succeed counts: the loser of a hedged race
+        finishing later does not overwrite it.
+        """
+        with self._lock:
+            if self.backend is not None:
+                return
+            self.backend = backend
+            self.fallback = backend != preferred
+            self.prompt_tokens = usage.get('prompt_tokens')
+            self.completion_tokens = usage.get('completion_tokens')
+            if self.time_to_first_token is None:
+                self.time_to_first_token = usage.get('time_to_first_token')
+    
+    def as_dict(self):
+        return {
+            'operation': self.operation,
+            'stream': self.stream,
+            'backend': self.backend,
+            'cache_hit': self.cache_hit,
+            'fallback': self.fallback,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'ttft_ms': round(self.time_to_first_token * 1000, 1) if self.time_to_first_token is not None else None,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error': self.error,
+        }
+
+
+class LLMMetrics:
+    """
+    Per-process aggregates of LLM requests and backend calls
+    
+    Requests are counted per operation (prompt template): cache hits,
+    fallbacks, errors, tokens, and latency and time-to-first-token
+    percentiles. Backend calls are counted per backend, including calls
+    that lost a hedged race or failed over, since they cost tokens too.
+    Every request is also logged on its own line.
+    """
+    
+    def __init__(self, samples=1000):
+        """
+        Args:
+            samples: Recent latencies kept per operation and backend for percentiles
+        """
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._backends = {}
+    
+    @contextmanager
+    def track(self, operation):
+        """
+        Account the LLM request made in this block
+        
+        A block nested in another (e.g. generate inside generate_cached)
+        joins the outer request instead of counting a second one.
+        """
+        call = _current_call.get()
+        if call is not None:
+            yield call
+            return
+        
+        call = LLMCall(operation)
+        token = _current_call.set(call)
+        try:
+            yield call
+        except Exception as e:
+            call.error = type(e).__name__
+            raise
+        finally:
+            _current_call.reset(token)
+            self.record(call)
+    
+    def record(self, call):
+        """Add a finished request to the aggregates and log it"""
+        call.latency = time.monotonic() - call.started
+        if call.backend is None and call.error is None:
+            call.backend = 'shared'
+        
+        with self._lock:
+            stats = self._operations.get(call.operation)
+            if stats is None:
+                stats = self._operations[call.operation] = {
+                    'requests': 0, 'errors': 0, 'cache_hits': 0, 'shared': 0, 'fallbacks': 0,
+                    'prompt_tokens': 0, 'completion_tokens': 0,
+                    'latencies': deque(maxlen=self.samples), 'ttfts': deque(maxlen=self.samples),
+                }
+            stats['requests'] += 1
+            stats['errors'] += call.error is not None
+            stats['cache_hits'] += call.cache_hit
+            stats['shared'] += call.backend == 'shared'
+            stats['fallbacks'] += call.fallback
+            stats['prompt_tokens'] += call.prompt_tokens or 0
+            stats['completion_tokens'] += call.completion_tokens or 0
+            if call.error is None:
+                stats['latencies'].append(call.latency)
+                if call.time_to_first_token is not None:
+                    stats['ttfts'].append(call.time_to_first_token)
+        
+        fields = call.as_dict()
+        logger.info(
+            "LLM call %s", ' '.join(f"{name}={value}" for name, value in fields.items()),
+            extra={'llm_call': fields}
+        )
+    
+    def record_attempt(self, backend, latency, usage, ok=True):
+        """Add one backend call (successful or not) to the per-backend aggregates"""
+        with self._lock:
+            stats = self._backends.get(backend)
+            if stats is None:
+                stats = self._backends[backend] = {
+                    'calls': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                    'latencies': deque(maxlen=self.samples),
+                }
+            stats['calls'] += 1
+            stats['errors'] += not ok
+            stats['prompt_tokens'] += usage.get('prompt_tokens') or 0
+            stats['completion_tokens'] += usage.get('completion_tokens') or 0
+            if ok:
+                stats['latencies'].append(latency)
+    
+    def stats(self):
+        """Counters and latency percentiles per operation and per backend"""
+        with self._lock:
+            operations = {
+                name: dict(stats, latencies=list(stats['latencies']), ttfts=list(stats['ttfts']))
+                for name, stats in self._operations.items()
+            }
+            backends = {
+                name: dict(stats, latencies=list(stats['latencies']))
+                for name, stats in self._backends.items()
+            }
+        
+        for stats in operations.values():
+            latencies, ttfts = stats.pop('latencies'), stats.pop('ttfts')
+            stats.update({
+                'latency_p50_ms': _percentile_ms(latencies, 0.5),
+                'latency_p95_ms': _percentile_ms(latencies, 0.95),
+                'ttft_p50_ms': _percentile_ms(ttfts, 0.5),
+                'ttft_p95_ms': _percentile_ms(ttfts, 0.95),
+            })
+        for stats in backends.values():
+            latencies = stats.pop('latencies')
+            stats.update({
+                'latency_p50_ms': _percentile_ms(latencies, 0.5),
+                'latency_p95_ms': _percentile_ms(latencies, 0.95),
+            })
+        return {'operations': operations, 'backends': backends}
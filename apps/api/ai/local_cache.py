@@ -0,0 +1,97 @@
+"""
+Shared cache scaffolding
+In-process LRU with an optional TTL, hit/miss counters and an optional Redis connection
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    Base class of the AI caches
+    
+    Keeps an in-process LRU of key -> value, optionally expiring entries
+    after ``ttl`` seconds, and counts lookups for ``stats()``. Subclasses add
+    their key and value logic and decide what, if anything, lives in Redis;
+    ``_redis_command`` treats Redis errors as a missing value so a Redis
+    outage never fails a request.
+    """
+    
+    # Log prefix of Redis errors
+    label = 'Cache'
+    # Counters reported by stats(); lookups are hit or miss counters
+    counters = ('local_hits', 'redis_hits', 'misses', 'redis_errors')
+    hit_counters = ('local_hits', 'redis_hits')
+    miss_counters = ('misses',)
+    
+    def __init__(self, max_size, ttl=None, redis_url=None):
+        """
+        Args:
+            max_size: Maximum entries kept in the in-process LRU
+            ttl: Seconds a local entry lives (forever if None)
+            redis_url: Redis URL (disabled if empty)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.counters, 0)
+        
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.05, socket_connect_timeout=0.05)
+    
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+    
+    def _get_local(self, key):
+        """Locally cached value of a key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def _set_local(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def _redis_command(self, name, *args, **kwargs):
+        """
+        Run a Redis command
+        
+        Returns:
+            The command's reply, or None if Redis is disabled or failed
+        """
+        if self._redis is None:
+            return None
+        try:
+            return getattr(self._redis, name)(*args, **kwargs)
+        except Exception as e:
+            logger.warning("%s Redis error: %s", self.label, e)
+            self._count('redis_errors')
+            return None
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        hits = sum(stats[name] for name in self.hit_counters)
+        lookups = hits + sum(stats[name] for name in self.miss_counters)
+        stats['hit_ratio'] = hits / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand
+
+from ai.embeddings import EmbeddingBackfill, EMBEDDING_TARGETS
+
+
+class Command(BaseCommand):
+    help = 'Embed issues and solutions whose embedding is missing or stale'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            type=str,
+            default='all',
+            choices=['all', *EMBEDDING_TARGETS],
+            help='What to embed: all, issues, solutions'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=512,
+            help='Rows fetched, encoded and written per batch'
+        )
+        parser.add_argument(
+            '--encode-batch-size',
+            type=int,
+            default=64,
+            help='Texts per model forward pass'
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help='Resume after this primary key (printed as last_id on each batch)'
+        )
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            default=None,
+            help='Stop after scanning this many rows'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-embed every row even if its text is unchanged'
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue the backfill on the Celery worker instead of running it here'
+        )
+    
+    def handle(self, *args, **options):
+        targets = list(EMBEDDING_TARGETS) if options['target'] == 'all' else [options['target']]
+        
+        if options['run_async']:
+            from ai.tasks import backfill_embeddings_task
+            result = backfill_embeddings_task.delay(
+                targets=targets,
+                batch_size=options['batch_size'],
+                force=options['force']
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued embedding backfill task {result.id}"))
+            return
+        
+        for target in targets:
+            self.stdout.write(f"Embedding {target}...")
+            backfill = EmbeddingBackfill(
+                target,
+                batch_size=options['batch_size'],
+                encode_batch_size=options['encode_batch_size'],
+                force=options['force']
+            )
+            stats = backfill.run(
+                start_after=options['start_after'],
+                max_rows=options['max_rows'],
+                progress=self.report_progress
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{target}: embedded {stats['embedded']} of {stats['scanned']} rows "
+                f"in {stats['elapsed']:.1f}s ({stats['rows_per_sec']:.1f} rows/sec)"
+            ))
+    
+    def report_progress(self, stats):
+        self.stdout.write(
+            f"  scanned={stats['scanned']} embedded={stats['embedded']} "
+            f"last_id={stats['last_id']} rows/sec={stats['rows_per_sec']:.1f}"
+        )
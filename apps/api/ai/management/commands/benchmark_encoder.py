@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.encoders import create_local_encoder
+
+SAMPLE_QUERIES = [
+    "pothole on main road",
+    "no water supply for three days",
+    "street light not working near school",
+    "garbage not collected in sector 4",
+    "how to apply for ration card",
+    "सड़क पर गड्ढा",
+    "बिजली कटौती की शिकायत",
+    "drainage overflowing after rain, mosquitoes breeding and the ward office is not responding",
+]
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark single-query and batch embedding latency of the torch and onnx backends'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', nargs='+', choices=['torch', 'onnx'], default=['torch', 'onnx'])
+        parser.add_argument('--iterations', type=int, default=100, help='Single-query encodes per backend')
+        parser.add_argument('--batch-size', type=int, default=64, help='Texts per batch encode')
+    
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return np.percentile(timings, 50), np.percentile(timings, 95)
+    
+    def handle(self, *args, **options):
+        model_name = settings.EMBEDDING_MODEL_NAME
+        batch = (SAMPLE_QUERIES * (options['batch_size'] // len(SAMPLE_QUERIES) + 1))[:options['batch_size']]
+        outputs = {}
+        
+        self.stdout.write(f"{'backend':<8} {'load s':>7} {'1q p50 ms':>10} {'1q p95 ms':>10} {'batch p50 ms':>13} {'texts/s':>9}")
+        for backend in options['backends']:
+            start = time.perf_counter()
+            encoder = create_local_encoder(model_name, backend, settings.EMBEDDING_ONNX_MODEL_DIR)
+            load = time.perf_counter() - start
+            encoder.encode(SAMPLE_QUERIES)  # Warm up
+            
+            queries = iter(SAMPLE_QUERIES * options['iterations'])
+            single_p50, single_p95 = self._time(lambda: encoder.encode([next(queries)]), options['iterations'])
+            batch_p50, _ = self._time(lambda: encoder.encode(batch, batch_size=options['batch_size']), 10)
+            outputs[backend] = np.asarray(encoder.encode(SAMPLE_QUERIES))
+            
+            self.stdout.write(
+                f"{backend:<8} {load:>7.2f} {single_p50:>10.2f} {single_p95:>10.2f} "
+                f"{batch_p50:>13.2f} {len(batch) / (batch_p50 / 1000):>9.0f}"
+            )
+        
+        if len(outputs) == 2:
+            torch_out, onnx_out = outputs['torch'], outputs['onnx']
+            cosine = (torch_out * onnx_out).sum(axis=1) / (
+                np.linalg.norm(torch_out, axis=1) * np.linalg.norm(onnx_out, axis=1)
+            )
+            self.stdout.write(f"torch/onnx cosine: min {cosine.min():.4f}, mean {cosine.mean():.4f}")
@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from django.core.management.base import BaseCommand
+
+from ai.llm import LLMClient
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate like Ollama, instantly, over keep-alive HTTP/1.1"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.connections.add(self.client_address)
+        body = json.dumps({'response': 'ok', 'done': True}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request overhead of unpooled requests.post vs the pooled Ollama session against a local stub'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per client')
+    
+    def _run(self, call, count):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        return np.array(timings)
+    
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        server.daemon_threads = True
+        server.connections = set()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        count = options['requests']
+        
+        try:
+            payload = {'model': 'llama3', 'prompt': 'ping', 'stream': False}
+            
+            def unpooled():
+                # The pre-pool code path: a fresh connection per generation
+                response = requests.post(f"{url}/api/generate", json=payload, timeout=30)
+                response.raise_for_status()
+                return response.json()
+            
+            client = LLMClient(ollama_url=url)
+            results = {}
+            for name, call in (('unpooled', unpooled), ('pooled', lambda: client._call_ollama('ping'))):
+                call()  # Warm up
+                server.connections.clear()
+                results[name] = (self._run(call, count), len(server.connections))
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        self.stdout.write(f"{count} requests per client against {url}")
+        self.stdout.write(f"{'client':<9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'connections':>12}")
+        for name, (timings, connections) in results.items():
+            self.stdout.write(
+                f"{name:<9} {timings.mean():>8.3f} {np.percentile(timings, 50):>8.3f} "
+                f"{np.percentile(timings, 95):>8.3f} {connections:>12}"
+            )
+        saved = results['unpooled'][0].mean() - results['pooled'][0].mean()
+        self.stdout.write(self.style.SUCCESS(f"Pooling saves {saved:.3f} ms per request"))
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from ai.quantization import INDEX_PREFIXES, PRECISIONS, index_name
+from ai.semantic_search import get_search_service
+
+
+class Command(BaseCommand):
+    help = 'Compare recall@k, index size and latency of the float32, halfvec and binary indexes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=sorted(INDEX_PREFIXES), default='wiki_solution')
+        parser.add_argument('--queries', type=int, default=200, help='Number of sampled query vectors')
+        parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    
+    def _sample_queries(self, table, count):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT embedding::text
+                FROM {table}
+                WHERE embedding IS NOT NULL
+                ORDER BY random()
+                LIMIT %s
+            """, [count])
+            return [row[0] for row in cursor.fetchall()]
+    
+    def _exact_neighbours(self, table, vector_str, k):
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Force a sequential scan so the ground truth is exact
+            cursor.execute("SET LOCAL enable_indexscan = off")
+            cursor.execute(f"""
+                SELECT id
+                FROM {table}
+                WHERE embedding IS NOT NULL
+                ORDER BY embedding <=> %s::vector
+                LIMIT %s
+            """, [vector_str, k])
+            return {row[0] for row in cursor.fetchall()}
+    
+    def _index_size(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_relation_size(to_regclass(%s))", [name])
+            return cursor.fetchone()[0]
+    
+    def handle(self, *args, **options):
+        table, k = options['table'], options['k']
+        service = get_search_service()
+        
+        queries = self._sample_queries(table, options['queries'])
+        if not queries:
+            self.stdout.write(self.style.WARNING(f"No embeddings in {table}"))
+            return
+        truth = [self._exact_neighbours(table, query, k) for query in queries]
+        
+        self.stdout.write(f"{len(queries)} queries against {table}, k={k}")
+        self.stdout.write(f"{'precision':<10} {'recall@k':>9} {'index MB':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        
+        for precision in PRECISIONS:
+            size = self._index_size(index_name(table, precision))
+            if size is None:
+                self.stdout.write(f"{precision:<10} (index missing, run `embedding_index create`)")
+                continue
+            
+            recalls = []
+            latencies = []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                rows = service._nearest_neighbours(table, ['id'], query, k, -1, precision=precision)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(expected & {row[0] for row in rows}) / len(expected))
+            
+            self.stdout.write(
+                f"{precision:<10} {np.mean(recalls):>9.3f} {size / 2 ** 20:>9.1f} "
+                f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f}"
+            )
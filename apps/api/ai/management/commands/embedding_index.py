@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ai.quantization import INDEX_PREFIXES, PRECISIONS, create_index_sql, drop_index_sql
+from ai.versioning import get_active_version
+
+
+class Command(BaseCommand):
+    help = 'Create or drop reduced-precision (halfvec/binary) HNSW indexes on the embedding columns'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['create', 'drop'])
+        parser.add_argument(
+            '--precision',
+            choices=[name for name, spec in PRECISIONS.items() if spec['index']],
+            required=True,
+            help='Index precision to build or remove'
+        )
+        parser.add_argument(
+            '--table',
+            choices=sorted(INDEX_PREFIXES) + ['all'],
+            default='all',
+            help='Table to index (default: all)'
+        )
+        parser.add_argument('--m', type=int, default=16, help='HNSW max connections per layer')
+        parser.add_argument('--ef-construction', type=int, default=64, help='HNSW build candidate list size')
+    
+    def handle(self, *args, **options):
+        if not connection.get_autocommit():
+            raise CommandError("CONCURRENTLY index operations cannot run inside a transaction")
+        
+        tables = sorted(INDEX_PREFIXES) if options['table'] == 'all' else [options['table']]
+        # Read from the version record: no need to load the model for its dimensions
+        dim = get_active_version().dimensions
+        
+        with connection.cursor() as cursor:
+            for table in tables:
+                if options['action'] == 'create':
+                    sql = create_index_sql(table, options['precision'], dim, options['m'], options['ef_construction'])
+                else:
+                    sql = drop_index_sql(table, options['precision'])
+                self.stdout.write(sql)
+                cursor.execute(sql)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['action'].capitalize()}d {options['precision']} index on {', '.join(tables)}"
+        ))
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai import versioning
+from ai.embeddings import EmbeddingBackfill, EMBEDDING_TARGETS
+from ai.encoders import create_local_encoder
+from ai.models import EmbeddingVersion
+from ai.neighbours import rebuild_issue_neighbours, rebuild_solution_neighbours
+from ai.semantic_search import get_search_service
+
+
+class Command(BaseCommand):
+    help = 'Roll out a new embedding model: start, reembed, build-index, activate, rollback, drop-shadow, status'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['start', 'reembed', 'build-index', 'activate', 'rollback', 'drop-shadow', 'status']
+        )
+        parser.add_argument('--model', type=str, help='Model name for start')
+        parser.add_argument(
+            '--dimensions',
+            type=int,
+            default=None,
+            help='Embedding dimensions for start (default: load the model and ask it)'
+        )
+        parser.add_argument(
+            '--service-url',
+            type=str,
+            default='',
+            help='Embedding server running the new model (default: load it in-process)'
+        )
+        parser.add_argument('--batch-size', type=int, default=512, help='Rows per re-embed batch')
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue the re-embed on the Celery worker instead of running it here'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Activate even if not every row is re-embedded'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            getattr(self, 'handle_' + options['action'].replace('-', '_'))(options)
+        except ValueError as e:
+            raise CommandError(str(e))
+    
+    def handle_start(self, options):
+        if not options['model']:
+            raise CommandError("--model is required")
+        dimensions = options['dimensions'] or create_local_encoder(options['model']).embedding_dim
+        version = versioning.start_version(options['model'], dimensions, options['service_url'])
+        self.stdout.write(self.style.SUCCESS(f"Started {version}; next: `embedding_version reembed`"))
+    
+    def handle_reembed(self, options):
+        building = versioning.get_building_version()
+        if building is None:
+            raise CommandError("No embedding version is building")
+        
+        if options['run_async']:
+            from ai.tasks import reembed_version_task
+            result = reembed_version_task.delay(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Queued re-embed task {result.id}"))
+            return
+        
+        search_service = get_search_service(building)
+        for target in EMBEDDING_TARGETS:
+            self.stdout.write(f"Re-embedding {target} with {building.model_name}...")
+            stats = EmbeddingBackfill(
+                target,
+                batch_size=options['batch_size'],
+                search_service=search_service,
+                column=versioning.NEXT_COLUMN
+            ).run(progress=lambda s: self.stdout.write(
+                f"  scanned={s['scanned']} embedded={s['embedded']} last_id={s['last_id']}"
+            ))
+            self.stdout.write(self.style.SUCCESS(f"{target}: embedded {stats['embedded']} of {stats['scanned']} rows"))
+    
+    def handle_build_index(self, options):
+        versioning.build_next_index()
+        self.stdout.write(self.style.SUCCESS("Built HNSW indexes on the shadow columns"))
+    
+    def handle_activate(self, options):
+        version = versioning.activate_version(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Activated {version}"))
+        self.refresh_neighbours()
+    
+    def handle_rollback(self, options):
+        version = versioning.rollback_version()
+        self.stdout.write(self.style.SUCCESS(f"Rolled back to {version}"))
+        self.refresh_neighbours()
+    
+    def handle_drop_shadow(self, options):
+        versioning.drop_shadow_columns()
+        self.stdout.write(self.style.SUCCESS("Dropped the shadow embedding columns"))
+    
+    def handle_status(self, options):
+        for version in EmbeddingVersion.objects.all():
+            self.stdout.write(str(version))
+        if versioning.get_building_version() is not None:
+            for table, progress in versioning.version_progress().items():
+                self.stdout.write(
+                    f"  {table}: {progress['embedded']}/{progress['total']} re-embedded, "
+                    f"index {'built' if progress['indexed'] else 'missing'}"
+                )
+    
+    def refresh_neighbours(self):
+        # Neighbour lists were computed with the other model's vectors
+        self.stdout.write("Rebuilding similar-solution neighbour lists...")
+        done = rebuild_solution_neighbours()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt neighbour lists for {done} solutions"))
+        self.stdout.write("Rebuilding issue neighbour lists...")
+        done = rebuild_issue_neighbours()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt neighbour lists for {done} issues"))
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.onnx_export import export_onnx_encoder
+
+
+class Command(BaseCommand):
+    help = 'Export the embedding model to ONNX (int8-quantized) for the onnx backend'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            type=str,
+            default=settings.EMBEDDING_MODEL_NAME,
+            help='Sentence transformer model name'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=settings.EMBEDDING_ONNX_MODEL_DIR,
+            help='Output directory (default: EMBEDDING_ONNX_MODEL_DIR)'
+        )
+        parser.add_argument(
+            '--no-quantize',
+            action='store_true',
+            help='Keep float32 weights instead of dynamic int8 quantization'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"Exporting {options['model']}...")
+        path = export_onnx_encoder(options['model'], options['output'], quantize=not options['no_quantize'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from ai.neighbours import rebuild_issue_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed issue neighbour table that issue clusters are read from'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=None,
+            help='Neighbours kept per issue (default: ISSUE_NEIGHBOURS_K)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Issues recomputed per transaction'
+        )
+    
+    def handle(self, *args, **options):
+        done = rebuild_issue_neighbours(
+            k=options['k'],
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f"  {count} issues done")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt neighbour lists for {done} issues"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from ai.neighbours import rebuild_solution_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed similar-solutions neighbour table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=None,
+            help='Neighbours kept per solution (default: SIMILAR_SOLUTIONS_K)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Solutions recomputed per transaction'
+        )
+    
+    def handle(self, *args, **options):
+        done = rebuild_solution_neighbours(
+            k=options['k'],
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f"  {count} solutions done")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt neighbour lists for {done} solutions"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ai.solution_digests import refresh_solution_digests
+
+
+class Command(BaseCommand):
+    help = 'Precompute the simplified text and action steps of new and edited solutions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate every digest, not only stale ones'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Solutions loaded per batch'
+        )
+    
+    def handle(self, *args, **options):
+        stats = refresh_solution_digests(
+            force=options['force'],
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f"  {count} solutions done")
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {stats['generated']} digests ({stats['failed']} failed)"
+        ))
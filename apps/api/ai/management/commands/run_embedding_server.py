@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai.embedding_server import create_server
+from ai.encoders import create_local_encoder
+
+
+class Command(BaseCommand):
+    help = 'Run the shared embedding server used by all API workers'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            default=settings.EMBEDDING_SERVICE_URL or 'unix:///tmp/jgt-embeddings.sock',
+            help='Address to listen on: unix:///path/to/socket or tcp://127.0.0.1:8765'
+        )
+        parser.add_argument(
+            '--model',
+            type=str,
+            default=settings.EMBEDDING_MODEL_NAME,
+            help='Sentence transformer model name'
+        )
+        parser.add_argument(
+            '--backend',
+            choices=['torch', 'onnx'],
+            default=settings.EMBEDDING_BACKEND,
+            help='Inference backend (onnx needs `manage.py export_onnx_encoder` first)'
+        )
+        parser.add_argument(
+            '--onnx-model-dir',
+            type=str,
+            default=settings.EMBEDDING_ONNX_MODEL_DIR,
+            help='Exported ONNX model directory for the onnx backend'
+        )
+        parser.add_argument(
+            '--max-batch-size',
+            type=int,
+            default=64,
+            help='Maximum texts encoded in one forward pass'
+        )
+        parser.add_argument(
+            '--max-wait-ms',
+            type=float,
+            default=5.0,
+            help='Time to wait for concurrent requests before encoding a batch'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"Loading {options['model']} ({options['backend']})...")
+        encoder = create_local_encoder(options['model'], options['backend'], options['onnx_model_dir'])
+        
+        server = create_server(
+            options['url'],
+            encoder,
+            max_batch_size=options['max_batch_size'],
+            max_wait=options['max_wait_ms'] / 1000
+        )
+        self.stdout.write(self.style.SUCCESS(f"Embedding server listening on {options['url']}"))
+        
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
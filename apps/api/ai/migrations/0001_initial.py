@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-16 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=200, unique=True)),
+                ('dimensions', models.PositiveIntegerField()),
+                ('service_url', models.CharField(blank=True, help_text='Embedding server running this model (blank: load it in-process)', max_length=200)),
+                ('status', models.CharField(choices=[('building', 'Building'), ('active', 'Active'), ('retired', 'Retired')], default='building', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['building', 'active'])), fields=('status',), name='unique_building_or_active_embedding_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-16 18:40
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('draft-complaint', 'Draft complaint letter'), ('summarize-document', 'Summarize document'), ('generate-rti', 'Generate RTI query')], max_length=30)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('input', models.JSONField(help_text='Validated request data')),
+                ('result', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('callback_url', models.URLField(blank=True, help_text='Receives the finished job as a JSON POST')),
+                ('callback_status', models.PositiveSmallIntegerField(blank=True, help_text='HTTP status of the last webhook delivery', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='llmjob_status_created_idx')],
+            },
+        ),
+    ]
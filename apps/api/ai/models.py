@@ -0,0 +1,89 @@
+import uuid
+
+from django.db import models
+
+
+class EmbeddingVersion(models.Model):
+    """
+    An embedding model whose vectors are (or are being) stored for issues and solutions
+
+    The active version's vectors live in the ``embedding`` columns. A version
+    being built fills the ``embedding_next`` shadow columns until it is
+    activated, which swaps the two column sets (see ai.versioning).
+    """
+    STATUS_CHOICES = [
+        ('building', 'Building'),
+        ('active', 'Active'),
+        ('retired', 'Retired'),
+    ]
+
+    model_name = models.CharField(max_length=200, unique=True)
+    dimensions = models.PositiveIntegerField()
+    service_url = models.CharField(
+        max_length=200, blank=True,
+        help_text="Embedding server running this model (blank: load it in-process)"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='building')
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status'],
+                condition=models.Q(status__in=['building', 'active']),
+                name='unique_building_or_active_embedding_version'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} ({self.dimensions}d, {self.status})"
+
+
+class LLMJob(models.Model):
+    """
+    An LLM generation submitted to run in a Celery worker instead of the request
+
+    Clients poll the job, follow its event stream, or receive the result at
+    callback_url when it finishes.
+    """
+    KIND_CHOICES = [
+        ('draft-complaint', 'Draft complaint letter'),
+        ('summarize-document', 'Summarize document'),
+        ('generate-rti', 'Generate RTI query'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    FINISHED_STATUSES = ('succeeded', 'failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    input = models.JSONField(help_text="Validated request data")
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    callback_url = models.URLField(blank=True, help_text="Receives the finished job as a JSON POST")
+    callback_status = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="HTTP status of the last webhook delivery"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='llmjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATUSES
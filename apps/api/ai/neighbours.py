@@ -0,0 +1,210 @@
+"""
+Precomputed neighbour lists
+Keeps wiki.SolutionNeighbour and issues.IssueNeighbour in sync with the embeddings
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+from .clustering import cluster_edges
+
+# Neighbour tables: embedded table, neighbour table, its source column and
+# the setting with the number of neighbours kept per row
+NEIGHBOUR_TABLES = {
+    'solutions': ('wiki_solution', 'wiki_solutionneighbour', 'solution_id', 'SIMILAR_SOLUTIONS_K'),
+    'issues': ('issues_issue', 'issues_issueneighbour', 'issue_id', 'ISSUE_NEIGHBOURS_K'),
+}
+
+
+def _recompute(cursor, source, ids, k):
+    """Replace the top-k neighbour rows of the given rows using the HNSW index"""
+    table, neighbour_table, source_column, _ = NEIGHBOUR_TABLES[source]
+    cursor.execute(
+        f"DELETE FROM {neighbour_table} WHERE {source_column} = ANY(%s)",
+        [ids]
+    )
+    cursor.execute(f"""
+        INSERT INTO {neighbour_table} ({source_column}, neighbour_id, similarity, rank)
+        SELECT
+            src.id,
+            nn.id,
+            1 - nn.distance,
+            row_number() OVER (PARTITION BY src.id ORDER BY nn.distance)
+        FROM {table} src
+        CROSS JOIN LATERAL (
+            SELECT
+                t.id,
+                t.embedding <=> src.embedding as distance
+            FROM {table} t
+            WHERE t.embedding IS NOT NULL
+                AND t.id != src.id
+            ORDER BY t.embedding <=> src.embedding
+            LIMIT %s
+        ) nn
+        WHERE src.id = ANY(%s)
+            AND src.embedding IS NOT NULL
+    """, [k, ids])
+
+
+def _refresh(source, ids, k=None):
+    """
+    Incrementally refresh neighbour lists after rows were (re-)embedded
+    
+    Besides the changed rows themselves, this refreshes the lists that
+    referenced them (they may have moved away) and the lists of their new
+    neighbours (they may now belong there). Similarity is symmetric, so a
+    row's new neighbours are the lists it is most likely to enter.
+    
+    Returns:
+        Number of neighbour lists recomputed
+    """
+    _, neighbour_table, source_column, k_setting = NEIGHBOUR_TABLES[source]
+    k = k or getattr(settings, k_setting)
+    changed = sorted(set(ids))
+    if not changed:
+        return 0
+    
+    ef_search = max(getattr(settings, 'SEMANTIC_SEARCH_EF_SEARCH', 40), k)
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL hnsw.ef_search = %s" % int(ef_search))
+        
+        cursor.execute(
+            f"SELECT DISTINCT {source_column} FROM {neighbour_table} WHERE neighbour_id = ANY(%s)",
+            [changed]
+        )
+        affected = {row[0] for row in cursor.fetchall()}
+        
+        _recompute(cursor, source, changed, k)
+        
+        cursor.execute(
+            f"SELECT DISTINCT neighbour_id FROM {neighbour_table} WHERE {source_column} = ANY(%s)",
+            [changed]
+        )
+        affected.update(row[0] for row in cursor.fetchall())
+        affected.difference_update(changed)
+        
+        if affected:
+            _recompute(cursor, source, sorted(affected), k)
+    
+    return len(changed) + len(affected)
+
+
+def _rebuild(source, k=None, batch_size=500, progress=None):
+    """Recompute every neighbour list of a table from scratch, one batch per transaction"""
+    table, _, _, k_setting = NEIGHBOUR_TABLES[source]
+    k = k or getattr(settings, k_setting)
+    ef_search = max(getattr(settings, 'SEMANTIC_SEARCH_EF_SEARCH', 40), k)
+    last_id = 0
+    done = 0
+    
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id
+                FROM {table}
+                WHERE id > %s
+                    AND embedding IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+            """, [last_id, batch_size])
+            batch = [row[0] for row in cursor.fetchall()]
+            if not batch:
+                break
+            
+            cursor.execute("SET LOCAL hnsw.ef_search = %s" % int(ef_search))
+            _recompute(cursor, source, batch, k)
+        
+        last_id = batch[-1]
+        done += len(batch)
+        if progress:
+            progress(done)
+    
+    return done
+
+
+def refresh_solution_neighbours(solution_ids, k=None):
+    """
+    Incrementally refresh solution neighbour lists after solutions were (re-)embedded
+    
+    Args:
+        solution_ids: IDs of solutions whose embedding changed
+        k: Neighbours kept per solution (default: settings.SIMILAR_SOLUTIONS_K)
+    
+    Returns:
+        Number of neighbour lists recomputed
+    """
+    return _refresh('solutions', solution_ids, k)
+
+
+def rebuild_solution_neighbours(k=None, batch_size=500, progress=None):
+    """
+    Recompute every solution neighbour list from scratch
+    
+    Args:
+        k: Neighbours kept per solution
+        batch_size: Solutions per batch
+        progress: Optional callable receiving the number of lists done so far
+    
+    Returns:
+        Number of neighbour lists recomputed
+    """
+    return _rebuild('solutions', k, batch_size, progress)
+
+
+def refresh_issue_neighbours(issue_ids, k=None):
+    """
+    Incrementally refresh issue neighbour lists after issues were (re-)embedded
+    
+    Args:
+        issue_ids: IDs of issues whose embedding changed
+        k: Neighbours kept per issue (default: settings.ISSUE_NEIGHBOURS_K)
+    
+    Returns:
+        Number of neighbour lists recomputed
+    """
+    return _refresh('issues', issue_ids, k)
+
+
+def rebuild_issue_neighbours(k=None, batch_size=500, progress=None):
+    """
+    Recompute every issue neighbour list from scratch
+    
+    Args:
+        k: Neighbours kept per issue
+        batch_size: Issues per batch
+        progress: Optional callable receiving the number of lists done so far
+    
+    Returns:
+        Number of neighbour lists recomputed
+    """
+    return _rebuild('issues', k, batch_size, progress)
+
+
+def cluster_similar_issues(min_similarity=0.8):
+    """
+    Find clusters of similar reported issues for collective action
+    
+    Reads the precomputed issue neighbour lists (the kNN graph), so a request
+    costs one scan of that table instead of an index lookup per issue, and
+    merges connected components with union-find. Neighbour lists cover every
+    embedded issue; the status filter is applied when reading them.
+    
+    Args:
+        min_similarity: Minimum similarity to consider issues related
+    
+    Returns:
+        List of issue clusters
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT n.issue_id, n.neighbour_id, n.similarity
+            FROM issues_issueneighbour n
+            JOIN issues_issue src ON src.id = n.issue_id
+            JOIN issues_issue nn ON nn.id = n.neighbour_id
+            WHERE n.similarity > %s
+                AND src.status = 'reported'
+                AND nn.status = 'reported'
+        """, [min_similarity])
+        edges = [(row[0], row[1], float(row[2])) for row in cursor.fetchall()]
+    
+    return cluster_edges(edges)
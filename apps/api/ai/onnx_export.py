@@ -0,0 +1,86 @@
+"""
+ONNX export of sentence transformer models
+Produces the model directory loaded by ai.encoders.OnnxEncoder
+"""
+import json
+import os
+
+
+def export_onnx_encoder(model_name, output_dir, quantize=True, opset=17):
+    """
+    Export a sentence transformer's transformer to ONNX, optionally int8-quantized
+    
+    Pooling and normalization are not part of the graph; they are recorded
+    in encoder.json and applied by OnnxEncoder in numpy.
+    
+    Args:
+        model_name: Sentence transformer model name
+        output_dir: Directory to write model.onnx, tokenizer.json and encoder.json to
+        quantize: Apply dynamic int8 quantization to the weights
+        opset: ONNX opset version
+    
+    Returns:
+        Path of the model file OnnxEncoder will load
+    """
+    # Export-time dependencies only; the API nodes just need onnxruntime
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+    
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer = model[0]
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    if not pooling.pooling_mode_mean_tokens:
+        raise ValueError(f"{model_name} does not use mean pooling")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(output_dir)  # Writes tokenizer.json for fast tokenizers
+    
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+        
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.auto_model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).last_hidden_state
+    
+    sample = tokenizer(['export sample'], return_tensors='pt')
+    fp32_path = os.path.join(output_dir, 'model_fp32.onnx')
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ('input_ids', 'attention_mask', 'token_type_ids')}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model.eval()),
+            (sample['input_ids'], sample['attention_mask'], sample['token_type_ids']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask', 'token_type_ids'],
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    
+    model_file = 'model_fp32.onnx'
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        
+        model_file = 'model_int8.onnx'
+        quantize_dynamic(fp32_path, os.path.join(output_dir, model_file), weight_type=QuantType.QInt8)
+    
+    with open(os.path.join(output_dir, 'encoder.json'), 'w') as f:
+        json.dump({
+            'model_name': model_name,
+            'model_file': model_file,
+            'dim': model.get_sentence_embedding_dimension(),
+            'max_seq_length': model.max_seq_length,
+            'normalize': any(isinstance(module, Normalize) for module in model),
+            'pad_token': tokenizer.pad_token,
+            'pad_token_id': tokenizer.pad_token_id,
+        }, f, indent=2)
+    
+    return os.path.join(output_dir, model_file)
@@ -0,0 +1,72 @@
+"""
+Reduced-precision vector indexes
+Half-precision and binary-quantized HNSW indexes over the float32 embedding column
+"""
+
+# Index-side representation of each precision. The float32 column stays the
+# source of truth and is used to re-rank the candidates the index returns.
+#   distance: ORDER BY expression served by the index ({dim} and {query} filled in)
+#   index: expression and operator class of the HNSW index
+#   candidates: over-fetch factor before full-precision re-ranking
+PRECISIONS = {
+    'float32': {
+        'distance': 'embedding <=> {query}::vector',
+        'index': None,  # Created by the migrations
+        'candidates': 1,
+    },
+    'halfvec': {
+        'distance': 'embedding::halfvec({dim}) <=> {query}::halfvec({dim})',
+        'index': '(embedding::halfvec({dim})) halfvec_cosine_ops',
+        'candidates': 2,
+    },
+    'binary': {
+        'distance': 'binary_quantize(embedding)::bit({dim}) <~> binary_quantize({query}::vector)',
+        'index': '(binary_quantize(embedding)::bit({dim})) bit_hamming_ops',
+        'candidates': 10,
+    },
+}
+
+# Index names per table (float32 indexes come from the model Meta)
+INDEX_PREFIXES = {
+    'issues_issue': 'issue_embedding',
+    'wiki_solution': 'solution_embedding',
+}
+
+
+def index_name(table, precision):
+    """Name of the HNSW index for a table and precision"""
+    if precision == 'float32':
+        return f"{INDEX_PREFIXES[table]}_hnsw_idx"
+    return f"{INDEX_PREFIXES[table]}_{precision}_hnsw_idx"
+
+
+def distance_sql(precision, dim, query='%s'):
+    """
+    ORDER BY expression for an index-served lookup at the given precision
+    
+    Args:
+        precision: float32, halfvec or binary
+        dim: Embedding dimensions
+        query: SQL for the query vector (default: a query parameter placeholder)
+    """
+    return PRECISIONS[precision]['distance'].format(dim=dim, query=query)
+
+
+def create_index_sql(table, precision, dim, m=16, ef_construction=64):
+    """CREATE INDEX statement for a reduced-precision HNSW index"""
+    expression = PRECISIONS[precision]['index']
+    if expression is None:
+        raise ValueError("float32 indexes are managed by migrations")
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(table, precision)} "
+        f"ON {table} USING hnsw ({expression.format(dim=dim)}) "
+        f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+    )
+
+
+def drop_index_sql(table, precision, concurrently=True):
+    """DROP INDEX statement for a reduced-precision HNSW index"""
+    if PRECISIONS[precision]['index'] is None:
+        raise ValueError("float32 indexes are managed by migrations")
+    concurrently_sql = 'CONCURRENTLY ' if concurrently else ''
+    return f"DROP INDEX {concurrently_sql}IF EXISTS {index_name(table, precision)}"
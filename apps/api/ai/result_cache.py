@@ -0,0 +1,110 @@
+"""
+Semantic search result cache
+Serves repeated searches without a database round trip until a relevant write invalidates them
+"""
+import hashlib
+
+import numpy as np
+from django.conf import settings
+
+from .local_cache import LocalCache
+
+# Tables whose rows each result kind is built from
+RESULT_SOURCES = {
+    'solutions': ('solutions',),
+    'issues': ('issues',),
+}
+
+
+class SearchResultCache(LocalCache):
+    """
+    In-process LRU of search results, invalidated by per-source generation counters
+    
+    Vector results cannot be invalidated entry by entry (any new row may
+    enter any result list), so every write to a source bumps its generation
+    and entries computed under an older generation count as misses. With
+    Redis the counters are shared, so a write on one worker invalidates the
+    cache of every worker. While Redis cannot be reached, writes elsewhere
+    would go unnoticed, so searches bypass the cache.
+    """
+    
+    label = 'Search result cache'
+    counters = ('hits', 'misses', 'stale', 'invalidations', 'redis_errors')
+    hit_counters = ('hits',)
+    miss_counters = ('misses', 'stale')
+    
+    def __init__(self, max_size=5000, ttl=3600, redis_url=None):
+        """
+        Args:
+            max_size: Maximum entries kept in the in-process LRU
+            ttl: Seconds an entry may be served even without invalidation
+            redis_url: Redis URL for shared generation counters (disabled if empty)
+        """
+        super().__init__(max_size, ttl=ttl, redis_url=redis_url)
+        self._generations = {}
+    
+    def _generation(self, sources):
+        """Current generation of each source, as a tuple (None if the shared counters are unreachable)"""
+        if self._redis is not None:
+            values = self._redis_command('mget', [f"srcache:gen:{source}" for source in sources])
+            return tuple(int(value or 0) for value in values) if values is not None else None
+        with self._lock:
+            return tuple(self._generations.get(source, 0) for source in sources)
+    
+    @staticmethod
+    def make_key(kind, embedding, *params):
+        """Cache key from the result kind, the query embedding and the search parameters"""
+        digest = hashlib.sha1(np.asarray(embedding, dtype='<f4').tobytes()).hexdigest()
+        return (kind, digest) + params
+    
+    def get_or_compute(self, kind, embedding, params, compute):
+        """
+        Return cached results for a search, running it on a miss
+        
+        Args:
+            kind: Key of RESULT_SOURCES
+            embedding: Query embedding
+            params: Tuple of the other search parameters (limit, threshold, ...)
+            compute: Callable running the search
+        
+        Returns:
+            List of result dicts (copies, safe to modify)
+        """
+        key = self.make_key(kind, embedding, *params)
+        # Read before computing: a write during compute must invalidate this entry
+        generation = self._generation(RESULT_SOURCES[kind])
+        if generation is None:
+            return compute()
+        
+        entry = self._get_local(key)
+        if entry is not None and entry[0] == generation:
+            self._count('hits')
+            return [dict(result) for result in entry[1]]
+        self._count('stale' if entry is not None else 'misses')
+        
+        results = compute()
+        self._set_local(key, (generation, [dict(result) for result in results]))
+        return results
+    
+    def invalidate(self, source):
+        """Invalidate every cached result built from a source ('issues' or 'solutions')"""
+        with self._lock:
+            self._generations[source] = self._generations.get(source, 0) + 1
+            self._counters['invalidations'] += 1
+        
+        self._redis_command('incr', f"srcache:gen:{source}")
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    """Get or create the process-wide search result cache"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = SearchResultCache(
+            max_size=settings.SEARCH_RESULT_CACHE_SIZE,
+            ttl=settings.SEARCH_RESULT_CACHE_TTL,
+            redis_url=settings.SEARCH_RESULT_CACHE_REDIS_URL
+        )
+    return _result_cache
@@ -1,10 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .semantic_search import get_search_service
+from .semantic_search import BATCH_SEARCH_MAX_LIMIT, get_search_service
+from .serializers import BatchSearchQuerySerializer
+from .neighbours import cluster_similar_issues
+from .result_cache import get_result_cache
+from .hybrid_search import hybrid_search_solutions
 
 
 class SemanticSearchView(APIView):
@@ -35,6 +40,34 @@ class SemanticSearchView(APIView):
                 required=False,
                 description='Maximum results (default: 10)'
             ),
+            openapi.Parameter(
+                'mode',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='vector (default) or hybrid (MeiliSearch + vector, solutions only)'
+            ),
+            openapi.Parameter(
+                'lat',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description='Latitude; with lng, restricts issue search to a radius'
+            ),
+            openapi.Parameter(
+                'lng',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description='Longitude'
+            ),
+            openapi.Parameter(
+                'radius',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description='Radius in km for issue search near lat/lng (default: 2)'
+            ),
         ],
         responses={200: 'List of search results with similarity scores'}
     )
@@ -42,6 +75,7 @@ class SemanticSearchView(APIView):
         query = request.query_params.get('query')
         search_type = request.query_params.get('type', 'solutions')
         limit = int(request.query_params.get('limit', 10))
+        mode = request.query_params.get('mode', 'vector')
         
         if not query:
             return Response(
@@ -49,12 +83,56 @@ class SemanticSearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if mode not in ('vector', 'hybrid'):
+            return Response(
+                {'error': 'Invalid mode. Use "vector" or "hybrid"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
             search_service = get_search_service()
             
+            if mode == 'hybrid':
+                if search_type != 'solutions':
+                    return Response(
+                        {'error': 'Hybrid mode only supports type "solutions"'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                hybrid = hybrid_search_solutions(query, limit=limit)
+                return Response({
+                    'query': query,
+                    'type': search_type,
+                    'mode': mode,
+                    'sources': hybrid['sources'],
+                    'count': len(hybrid['results']),
+                    'results': hybrid['results']
+                })
+            
             if search_type == 'solutions':
                 results = search_service.search_solutions(query, limit=limit)
             elif search_type == 'issues':
+                lat = request.query_params.get('lat')
+                lng = request.query_params.get('lng')
+                if lat and lng:
+                    try:
+                        lat, lng = float(lat), float(lng)
+                        radius_km = float(request.query_params.get('radius', 2))
+                    except ValueError:
+                        return Response(
+                            {'error': 'lat, lng and radius must be numbers'},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    nearby = search_service.search_issues_near(
+                        query, lat, lng, radius_km=radius_km, limit=limit
+                    )
+                    return Response({
+                        'query': query,
+                        'type': search_type,
+                        'mode': mode,
+                        'plan': nearby['plan'],
+                        'count': len(nearby['results']),
+                        'results': nearby['results']
+                    })
                 results = search_service.search_issues(query, limit=limit)
             else:
                 return Response(
@@ -65,6 +143,7 @@ class SemanticSearchView(APIView):
             return Response({
                 'query': query,
                 'type': search_type,
+                'mode': mode,
                 'count': len(results),
                 'results': results
             })
@@ -76,6 +155,89 @@ class SemanticSearchView(APIView):
             )
 
 
+class BatchSemanticSearchView(APIView):
+    """
+    Run several semantic searches in one request
+    
+    All queries are embedded in one model forward pass and looked up in one
+    database round trip, replacing one /search/ call per widget on a page.
+    """
+    
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['queries'],
+            properties={
+                'queries': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        required=['query'],
+                        properties={
+                            'query': openapi.Schema(type=openapi.TYPE_STRING),
+                            'type': openapi.Schema(
+                                type=openapi.TYPE_STRING,
+                                description='solutions, issues or categories (default: solutions)'
+                            ),
+                            'limit': openapi.Schema(
+                                type=openapi.TYPE_INTEGER,
+                                description=f'1-{BATCH_SEARCH_MAX_LIMIT} (default: 10)'
+                            ),
+                        }
+                    )
+                ),
+            }
+        ),
+        responses={200: 'Search results grouped per query, in request order'}
+    )
+    def post(self, request):
+        queries = request.data.get('queries')
+        max_queries = settings.BATCH_SEARCH_MAX_QUERIES
+        
+        if not isinstance(queries, list) or not queries:
+            return Response(
+                {'error': 'queries must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(queries) > max_queries:
+            return Response(
+                {'error': f'At most {max_queries} queries per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = BatchSearchQuerySerializer(data=queries, many=True)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Invalid queries', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = serializer.validated_data
+        
+        try:
+            search_service = get_search_service()
+            grouped = search_service.batch_search(items)
+            
+            return Response({
+                'count': len(items),
+                'results': [
+                    {
+                        'query': item['query'],
+                        'type': item['type'],
+                        'count': len(results),
+                        'results': results
+                    }
+                    for item, results in zip(items, grouped)
+                ]
+            })
+        
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class SimilarSolutionsView(APIView):
     """
     Find solutions similar to a given solution
@@ -141,8 +303,7 @@ class IssueClustersView(APIView):
         min_similarity = float(request.query_params.get('min_similarity', 0.8))
         
         try:
-            search_service = get_search_service()
-            clusters = search_service.cluster_similar_issues(min_similarity=min_similarity)
+            clusters = cluster_similar_issues(min_similarity=min_similarity)
             
             return Response({
                 'min_similarity': min_similarity,
@@ -155,3 +316,17 @@ class IssueClustersView(APIView):
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class SearchCacheStatsView(APIView):
+    """
+    Hit ratios of the search caches in this worker process
+    """
+    
+    @swagger_auto_schema(responses={200: 'Query embedding and search result cache counters'})
+    def get(self, request):
+        query_cache = get_search_service().query_cache
+        return Response({
+            'query_embedding_cache': query_cache.stats() if query_cache else None,
+            'search_result_cache': get_result_cache().stats(),
+        })
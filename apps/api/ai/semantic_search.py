@@ -2,9 +2,39 @@
 Semantic Search Service using pgvector
 Enables intelligent search across solutions and issues
 """
-from sentence_transformers import SentenceTransformer
+import math
+
 import numpy as np
-from django.db import connection
+from django.conf import settings
+from django.db import connection, transaction
+
+from issues.models import Issue
+from .embedding_cache import QueryEmbeddingCache, normalize_query
+from .encoders import RemoteEncoder, create_local_encoder
+from .quantization import PRECISIONS, distance_sql
+from .result_cache import get_result_cache
+from .versioning import get_active_version
+
+
+# Batch search targets: table and the status column (solutions have none).
+# Categories are ranked from their best-matching solutions.
+BATCH_SEARCH_TARGETS = {
+    'solutions': ('wiki_solution', 'NULL::varchar AS status'),
+    'issues': ('issues_issue', 'status'),
+    'categories': ('wiki_solution', 'NULL::varchar AS status'),
+}
+
+# Solutions fetched per requested category
+CATEGORY_CANDIDATES_PER_RESULT = 5
+
+# Largest per-query limit of a batch search; more would exceed the capped HNSW
+# candidate list and silently return fewer results than asked for
+BATCH_SEARCH_MAX_LIMIT = 50
+
+
+def to_vector_literal(embedding):
+    """Format an embedding as a pgvector text literal"""
+    return '[' + ','.join(map(str, embedding)) + ']'
 
 
 class SemanticSearchService:
@@ -12,15 +42,31 @@ class SemanticSearchService:
     Semantic search using sentence embeddings and pgvector
     """
     
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', service_url=None, query_cache=None, encoder=None,
+                 backend='torch', onnx_model_dir=None, embedding_dim=384, result_cache=None):
         """
         Initialize with a sentence transformer model
         
         Args:
             model_name: HuggingFace model name (default: lightweight multilingual model)
+            service_url: Shared embedding server URL; the model is loaded in-process if empty
+            query_cache: Optional QueryEmbeddingCache for search queries
+            encoder: Explicit encoder instance, overriding model_name and service_url
+            backend: In-process inference backend: 'torch' or 'onnx'
+            onnx_model_dir: Exported ONNX model directory for the onnx backend
+            embedding_dim: Dimensions of the model's embeddings
+            result_cache: Optional SearchResultCache for search results
         """
-        self.model = SentenceTransformer(model_name)
-        self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+        if encoder is not None:
+            self.encoder = encoder
+        elif service_url:
+            self.encoder = RemoteEncoder(service_url)
+        else:
+            self.encoder = create_local_encoder(model_name, backend, onnx_model_dir)
+        self.model_name = model_name
+        self.query_cache = query_cache
+        self.result_cache = result_cache
+        self.embedding_dim = embedding_dim
     
     def generate_embedding(self, text):
         """
@@ -32,10 +78,136 @@ class SemanticSearchService:
         Returns:
             numpy array of embedding vector
         """
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        embedding = self.encoder.encode([text])[0]
         return embedding
     
-    def search_solutions(self, query, limit=10, threshold=0.7):
+    def generate_embeddings(self, texts, batch_size=64):
+        """
+        Generate vector embeddings for many texts in batched forward passes
+        
+        Args:
+            texts: List of input text strings
+            batch_size: Number of texts per model forward pass
+        
+        Returns:
+            numpy array of shape (len(texts), embedding_dim)
+        """
+        return self.encoder.encode(texts, batch_size=batch_size)
+    
+    def embed_query(self, query):
+        """
+        Embedding for a search query, served from the query cache when possible
+        
+        Args:
+            query: Search query string
+        
+        Returns:
+            numpy array of embedding vector
+        """
+        if self.query_cache is None:
+            return self.generate_embedding(query)
+        return self.query_cache.get_or_compute(query, self.generate_embedding)
+    
+    def embed_queries(self, queries):
+        """
+        Embeddings for several search queries in one model forward pass
+        
+        Cached queries are served from the query cache; the remaining unique
+        queries are encoded together and stored in the cache.
+        
+        Args:
+            queries: List of search query strings
+        
+        Returns:
+            List of numpy embedding vectors, one per query
+        """
+        if self.query_cache is None:
+            keys = list(queries)
+        else:
+            keys = [normalize_query(query) for query in queries]
+        
+        embeddings = {}
+        unique = list(dict.fromkeys(keys))
+        if self.query_cache is not None:
+            for key in unique:
+                embedding = self.query_cache.get(key)
+                if embedding is not None:
+                    embeddings[key] = embedding
+        
+        missing = [key for key in unique if key not in embeddings]
+        if missing:
+            for key, embedding in zip(missing, self.generate_embeddings(missing)):
+                if self.query_cache is not None:
+                    embedding = self.query_cache.set(key, embedding)
+                embeddings[key] = embedding
+        
+        return [embeddings[key] for key in keys]
+    
+    def _nearest_neighbours(self, table, columns, vector_str, limit, threshold, timeout_ms=None,
+                            precision=None):
+        """
+        Index-backed top-k lookup with the similarity threshold applied afterwards
+        
+        The innermost query only orders by distance and limits, which is the
+        shape the HNSW index can serve; filtering on similarity inside it would
+        force a sequential scan over every embedding. With a reduced-precision
+        index the candidates are over-fetched and re-ranked with the float32
+        embeddings before the limit is applied.
+        
+        Args:
+            table: Table holding an indexed ``embedding`` column
+            columns: Columns to return ahead of the similarity score
+            vector_str: Query vector in pgvector text format
+            limit: Number of nearest neighbours to fetch
+            threshold: Minimum similarity threshold (0-1)
+            timeout_ms: Optional statement timeout for the lookup
+            precision: Index to search: float32, halfvec or binary
+                (default: settings.EMBEDDING_INDEX_PRECISION)
+        
+        Returns:
+            List of row tuples ending with the similarity score
+        """
+        precision = precision or settings.EMBEDDING_INDEX_PRECISION
+        column_sql = ', '.join(columns)
+        candidates = limit * PRECISIONS[precision]['candidates']
+        # Candidate list size for HNSW; must cover the candidates requested (pgvector caps it at 1000)
+        ef_search = min(max(getattr(settings, 'SEMANTIC_SEARCH_EF_SEARCH', 40), candidates), 1000)
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL hnsw.ef_search = %s" % int(ef_search))
+            if timeout_ms:
+                cursor.execute("SET LOCAL statement_timeout = %s" % int(timeout_ms))
+            cursor.execute(f"""
+                SELECT {column_sql}, similarity
+                FROM (
+                    SELECT
+                        {column_sql},
+                        1 - (embedding <=> %s::vector) as similarity
+                    FROM (
+                        SELECT {column_sql}, embedding
+                        FROM {table}
+                        WHERE embedding IS NOT NULL
+                        ORDER BY {distance_sql(precision, self.embedding_dim)}
+                        LIMIT %s
+                    ) candidates
+                    ORDER BY embedding <=> %s::vector
+                    LIMIT %s
+                ) nearest
+                WHERE similarity > %s
+                ORDER BY similarity DESC
+            """, [vector_str, vector_str, candidates, vector_str, limit, threshold])
+            
+            return cursor.fetchall()
+    
+    def _cached_results(self, kind, query_embedding, params, lookup):
+        """Serve a search from the result cache, running lookup on a miss"""
+        if self.result_cache is None:
+            return lookup()
+        # Results differ per index precision, so it is part of the key
+        params = params + (settings.EMBEDDING_INDEX_PRECISION,)
+        return self.result_cache.get_or_compute(kind, query_embedding, params, lookup)
+    
+    def search_solutions(self, query, limit=10, threshold=0.7, timeout_ms=None):
         """
         Semantic search for solutions
         
@@ -43,42 +215,39 @@ class SemanticSearchService:
             query: Search query string
             limit: Maximum number of results
             threshold: Minimum similarity threshold (0-1)
+            timeout_ms: Optional database timeout for the vector lookup
         
         Returns:
             List of (solution_id, title, similarity_score) tuples
         """
-        # Generate query embedding
-        query_embedding = self.generate_embedding(query)
-        
-        # Convert to PostgreSQL vector format
-        vector_str = '[' + ','.join(map(str, query_embedding)) + ']'
+        return self.search_solutions_by_embedding(self.embed_query(query), limit, threshold, timeout_ms)
+    
+    def search_solutions_by_embedding(self, query_embedding, limit=10, threshold=0.7, timeout_ms=None):
+        """
+        Semantic search for solutions with an already encoded query (see search_solutions)
         
-        # Perform similarity search using pgvector
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    id,
-                    title,
-                    description,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM wiki_solution
-                WHERE embedding IS NOT NULL
-                    AND 1 - (embedding <=> %s::vector) > %s
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s
-            """, [vector_str, vector_str, threshold, vector_str, limit])
+        Lets a caller with a latency budget bound the encoding separately.
+        """
+        def lookup():
+            # Convert to PostgreSQL vector format
+            vector_str = to_vector_literal(query_embedding)
             
-            results = cursor.fetchall()
+            rows = self._nearest_neighbours(
+                'wiki_solution', ['id', 'title', 'description'],
+                vector_str, limit, threshold, timeout_ms=timeout_ms
+            )
+            
+            return [
+                {
+                    'id': row[0],
+                    'title': row[1],
+                    'description': row[2],
+                    'similarity': float(row[3])
+                }
+                for row in rows
+            ]
         
-        return [
-            {
-                'id': row[0],
-                'title': row[1],
-                'description': row[2],
-                'similarity': float(row[3])
-            }
-            for row in results
-        ]
+        return self._cached_results('solutions', query_embedding, (limit, threshold), lookup)
     
     def search_issues(self, query, limit=10, threshold=0.7):
         """
@@ -92,41 +261,331 @@ class SemanticSearchService:
         Returns:
             List of issue dictionaries with similarity scores
         """
-        query_embedding = self.generate_embedding(query)
-        vector_str = '[' + ','.join(map(str, query_embedding)) + ']'
+        query_embedding = self.embed_query(query)
         
-        with connection.cursor() as cursor:
+        def lookup():
+            vector_str = to_vector_literal(query_embedding)
+            
+            rows = self._nearest_neighbours(
+                'issues_issue', ['id', 'title', 'description', 'status'],
+                vector_str, limit, threshold
+            )
+            
+            return [
+                {
+                    'id': row[0],
+                    'title': row[1],
+                    'description': row[2],
+                    'status': row[3],
+                    'similarity': float(row[4])
+                }
+                for row in rows
+            ]
+        
+        return self._cached_results('issues', query_embedding, (limit, threshold), lookup)
+    
+    def search_issues_near(self, query, lat, lng, radius_km=2, limit=10, threshold=0.7):
+        """
+        Semantic search for issues within a radius of a point
+        
+        The plan depends on how many embedded issues lie inside the radius,
+        counted (up to a cap) through the GiST index on location:
+        - spatial_first: few nearby issues (rural areas); rank all of them exactly
+        - vector_first: many nearby issues (city centres); take enough HNSW
+          candidates to expect ``limit`` hits inside the radius, then filter
+        
+        Args:
+            query: Search query string
+            lat: Latitude of the centre point
+            lng: Longitude of the centre point
+            radius_km: Search radius in kilometres
+            limit: Maximum number of results
+            threshold: Minimum similarity threshold (0-1)
+        
+        Returns:
+            Dict with 'plan' and 'results' (issue dictionaries with similarity and distance)
+        """
+        vector_str = to_vector_literal(self.embed_query(query))
+        radius_m = float(radius_km) * 1000
+        
+        # Bounding box lets the geometry GiST index prune before the exact geography test
+        lat_delta = radius_m / 111320.0
+        lng_delta = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 0.01))
+        spatial_sql = """
+            location && ST_MakeEnvelope(%s, %s, %s, %s, 4326)
+            AND ST_DWithin(location::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s)
+        """
+        spatial_params = [lng - lng_delta, lat - lat_delta, lng + lng_delta, lat + lat_delta, lng, lat, radius_m]
+        select_sql = """
+            id,
+            title,
+            description,
+            status,
+            1 - (embedding <=> %s::vector) as similarity,
+            ST_Distance(location::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) as distance_m
+        """
+        select_params = [vector_str, lng, lat]
+        max_rows = settings.GEO_SEARCH_SPATIAL_FIRST_MAX_ROWS
+        max_candidates = settings.GEO_SEARCH_MAX_VECTOR_CANDIDATES
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT count(*) FROM (
+                    SELECT 1 FROM issues_issue
+                    WHERE embedding IS NOT NULL AND {spatial_sql}
+                    LIMIT %s
+                ) nearby
+            """, spatial_params + [max_rows])
+            nearby = cursor.fetchone()[0]
+            
+            candidates = None
+            if nearby >= max_rows:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = 'issues_issue'::regclass")
+                total = max(cursor.fetchone()[0], nearby)
+                # nearby is capped, so this over-fetches rather than under-fetches
+                candidates = int(math.ceil(2 * limit * total / nearby))
+            
+            if candidates is not None and candidates <= max_candidates:
+                plan = 'vector_first'
+                cursor.execute("SET LOCAL hnsw.ef_search = %s" % int(max(candidates, limit)))
+                cursor.execute(f"""
+                    SELECT id, title, description, status, similarity, distance_m
+                    FROM (
+                        SELECT {select_sql}, location
+                        FROM issues_issue
+                        WHERE embedding IS NOT NULL
+                        ORDER BY embedding <=> %s::vector
+                        LIMIT %s
+                    ) nearest
+                    WHERE similarity > %s AND {spatial_sql}
+                    ORDER BY similarity DESC
+                    LIMIT %s
+                """, select_params + [vector_str, candidates, threshold] + spatial_params + [limit])
+            else:
+                plan = 'spatial_first'
+                cursor.execute(f"""
+                    SELECT id, title, description, status, similarity, distance_m
+                    FROM (
+                        SELECT {select_sql}
+                        FROM issues_issue
+                        WHERE embedding IS NOT NULL AND {spatial_sql}
+                    ) nearby
+                    WHERE similarity > %s
+                    ORDER BY similarity DESC
+                    LIMIT %s
+                """, select_params + spatial_params + [threshold, limit])
+            
+            rows = cursor.fetchall()
+        
+        return {
+            'plan': plan,
+            'results': [
+                {
+                    'id': row[0],
+                    'title': row[1],
+                    'description': row[2],
+                    'status': row[3],
+                    'similarity': float(row[4]),
+                    'distance_m': float(row[5])
+                }
+                for row in rows
+            ]
+        }
+    
+    def find_duplicate_issues(self, embedding, category_id, lat, lng, radius_m=150, threshold=0.85,
+                              limit=5, timeout_ms=None):
+        """
+        Open issues of the same category near a point that describe the same problem
+        
+        The radius is small, so the spatial filter always leaves few enough
+        rows to compare exactly; no HNSW lookup is involved.
+        
+        Args:
+            embedding: Embedding of the new issue's title and description
+            category_id: Category of the new issue
+            lat: Latitude of the new issue
+            lng: Longitude of the new issue
+            radius_m: Search radius in metres
+            threshold: Minimum similarity to count as a duplicate (0-1)
+            limit: Maximum number of candidates
+            timeout_ms: Optional statement timeout for the lookup
+        
+        Returns:
+            List of candidate issue dicts, most similar first
+        """
+        vector_str = to_vector_literal(embedding)
+        lat_delta = radius_m / 111320.0
+        lng_delta = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 0.01))
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            if timeout_ms:
+                cursor.execute("SET LOCAL statement_timeout = %s" % int(timeout_ms))
             cursor.execute("""
-                SELECT 
-                    id,
-                    title,
-                    description,
-                    status,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM issues_issue
-                WHERE embedding IS NOT NULL
-                    AND 1 - (embedding <=> %s::vector) > %s
-                ORDER BY embedding <=> %s::vector
+                SELECT id, title, status, upvotes, created_at, similarity, distance_m
+                FROM (
+                    SELECT
+                        id,
+                        title,
+                        status,
+                        upvotes,
+                        created_at,
+                        1 - (embedding <=> %s::vector) as similarity,
+                        ST_Distance(location::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) as distance_m
+                    FROM issues_issue
+                    WHERE embedding IS NOT NULL
+                        AND category_id = %s
+                        AND status = ANY(%s)
+                        AND location && ST_MakeEnvelope(%s, %s, %s, %s, 4326)
+                        AND ST_DWithin(location::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s)
+                ) nearby
+                WHERE similarity > %s
+                ORDER BY similarity DESC
                 LIMIT %s
-            """, [vector_str, vector_str, threshold, vector_str, limit])
-            
-            results = cursor.fetchall()
+            """, [
+                vector_str, lng, lat,
+                category_id, Issue.OPEN_STATUSES,
+                lng - lng_delta, lat - lat_delta, lng + lng_delta, lat + lat_delta,
+                lng, lat, radius_m,
+                threshold, limit
+            ])
+            rows = cursor.fetchall()
         
         return [
             {
                 'id': row[0],
                 'title': row[1],
-                'description': row[2],
-                'status': row[3],
-                'similarity': float(row[4])
+                'status': row[2],
+                'upvotes': row[3],
+                'created_at': row[4],
+                'similarity': float(row[5]),
+                'distance_m': float(row[6])
             }
-            for row in results
+            for row in rows
         ]
     
+    def batch_search(self, items, threshold=0.7, timeout_ms=None):
+        """
+        Run several semantic searches with one forward pass and one database round trip
+        
+        All query vectors of a table go into one VALUES list joined laterally
+        to an index-backed top-k lookup, and the tables are combined with
+        UNION ALL, so N searches cost one statement instead of N.
+        
+        Args:
+            items: List of dicts with 'query', 'type' (solutions, issues or
+                categories) and optional 'limit' and 'threshold'
+            threshold: Default minimum similarity threshold (0-1)
+            timeout_ms: Optional statement timeout for the lookup
+        
+        Returns:
+            List of result lists, in the order of items
+        """
+        if not items:
+            return []
+        
+        embeddings = self.embed_queries([item['query'] for item in items])
+        precision = settings.EMBEDDING_INDEX_PRECISION
+        factor = PRECISIONS[precision]['candidates']
+        distance = distance_sql(precision, self.embedding_dim, query='q.query_embedding')
+        
+        by_table = {}
+        limits = []
+        for slot, (item, embedding) in enumerate(zip(items, embeddings)):
+            limit = max(1, min(int(item.get('limit', 10)), BATCH_SEARCH_MAX_LIMIT))
+            limits.append(limit)
+            if item['type'] == 'categories':
+                limit *= CATEGORY_CANDIDATES_PER_RESULT
+            by_table.setdefault(BATCH_SEARCH_TARGETS[item['type']], []).append(
+                (slot, to_vector_literal(embedding), limit, item.get('threshold', threshold))
+            )
+        
+        branches = []
+        params = []
+        max_limit = 0
+        for (table, status_sql), lookups in by_table.items():
+            values = ', '.join(['(%s::int, %s::vector, %s::int, %s::float)'] * len(lookups))
+            for lookup in lookups:
+                params.extend(lookup)
+                max_limit = max(max_limit, lookup[2])
+            branches.append(f"""
+                SELECT q.slot, nearest.*
+                FROM (VALUES {values}) q(slot, query_embedding, fetch_limit, threshold)
+                CROSS JOIN LATERAL (
+                    SELECT
+                        id, title, description, status, category_id,
+                        1 - (embedding <=> q.query_embedding) as similarity
+                    FROM (
+                        SELECT id, title, description, {status_sql}, category_id, embedding
+                        FROM {table}
+                        WHERE embedding IS NOT NULL
+                        ORDER BY {distance}
+                        LIMIT q.fetch_limit * {int(factor)}
+                    ) candidates
+                    ORDER BY embedding <=> q.query_embedding
+                    LIMIT q.fetch_limit
+                ) nearest
+                WHERE nearest.similarity > q.threshold
+            """)
+        
+        union_sql = ' UNION ALL '.join(f"({branch})" for branch in branches)
+        ef_search = min(max(getattr(settings, 'SEMANTIC_SEARCH_EF_SEARCH', 40), max_limit * factor), 1000)
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL hnsw.ef_search = %s" % int(ef_search))
+            if timeout_ms:
+                cursor.execute("SET LOCAL statement_timeout = %s" % int(timeout_ms))
+            cursor.execute(f"""
+                SELECT
+                    hit.slot, hit.id, hit.title, hit.description, hit.status, hit.similarity,
+                    c.id, c.name, c.slug
+                FROM ({union_sql}) hit
+                LEFT JOIN wiki_category c ON c.id = hit.category_id
+                ORDER BY hit.slot, hit.similarity DESC
+            """, params)
+            rows = cursor.fetchall()
+        
+        results = [[] for _ in items]
+        for slot, hit_id, title, description, hit_status, similarity, category_id, name, slug in rows:
+            search_type = items[slot]['type']
+            if search_type == 'categories':
+                results[slot].append((category_id, name, slug, float(similarity)))
+                continue
+            hit = {'id': hit_id, 'title': title, 'description': description}
+            if search_type == 'issues':
+                hit['status'] = hit_status
+            hit['similarity'] = float(similarity)
+            results[slot].append(hit)
+        
+        for slot, item in enumerate(items):
+            if item['type'] == 'categories':
+                results[slot] = self._rank_categories(results[slot], limits[slot])
+        
+        return results
+    
+    def _rank_categories(self, solution_hits, limit):
+        """Group (category_id, name, slug, similarity) solution hits into ranked categories"""
+        categories = {}
+        for category_id, name, slug, similarity in solution_hits:
+            category = categories.setdefault(category_id, {
+                'id': category_id,
+                'name': name,
+                'slug': slug,
+                'similarity': similarity,
+                'solution_count': 0
+            })
+            category['similarity'] = max(category['similarity'], similarity)
+            category['solution_count'] += 1
+        
+        ranked = sorted(categories.values(), key=lambda c: (-c['similarity'], -c['solution_count']))
+        return ranked[:limit]
+    
     def find_similar_solutions(self, solution_id, limit=5):
         """
         Find solutions similar to a given solution
         
+        Served from the precomputed SolutionNeighbour table; falls back to a
+        live index lookup for solutions whose list has not been built yet.
+        
         Args:
             solution_id: ID of the reference solution
             limit: Maximum number of similar solutions
@@ -136,22 +595,46 @@ class SemanticSearchService:
         """
         with connection.cursor() as cursor:
             cursor.execute("""
-                SELECT 
-                    s2.id,
-                    s2.title,
-                    s2.description,
-                    1 - (s1.embedding <=> s2.embedding) as similarity
-                FROM wiki_solution s1
-                CROSS JOIN wiki_solution s2
-                WHERE s1.id = %s
-                    AND s2.id != %s
-                    AND s1.embedding IS NOT NULL
-                    AND s2.embedding IS NOT NULL
-                ORDER BY s1.embedding <=> s2.embedding
+                SELECT
+                    s.id,
+                    s.title,
+                    s.description,
+                    n.similarity
+                FROM wiki_solutionneighbour n
+                JOIN wiki_solution s ON s.id = n.neighbour_id
+                WHERE n.solution_id = %s
+                ORDER BY n.rank
                 LIMIT %s
-            """, [solution_id, solution_id, limit])
+            """, [solution_id, limit])
             
             results = cursor.fetchall()
+            
+            if not results:
+                cursor.execute("""
+                    SELECT
+                        nn.id,
+                        nn.title,
+                        nn.description,
+                        1 - nn.distance as similarity
+                    FROM wiki_solution ref
+                    CROSS JOIN LATERAL (
+                        SELECT
+                            s.id,
+                            s.title,
+                            s.description,
+                            s.embedding <=> ref.embedding as distance
+                        FROM wiki_solution s
+                        WHERE s.embedding IS NOT NULL
+                            AND s.id != ref.id
+                        ORDER BY s.embedding <=> ref.embedding
+                        LIMIT %s
+                    ) nn
+                    WHERE ref.id = %s
+                        AND ref.embedding IS NOT NULL
+                    ORDER BY nn.distance
+                """, [limit, solution_id])
+                
+                results = cursor.fetchall()
         
         return [
             {
@@ -162,78 +645,40 @@ class SemanticSearchService:
             }
             for row in results
         ]
-    
-    def cluster_similar_issues(self, min_similarity=0.8):
-        """
-        Find clusters of similar issues for collective action
-        
-        Args:
-            min_similarity: Minimum similarity to consider issues related
-        
-        Returns:
-            List of issue clusters
-        """
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    i1.id as issue1_id,
-                    i2.id as issue2_id,
-                    i1.title as issue1_title,
-                    i2.title as issue2_title,
-                    1 - (i1.embedding <=> i2.embedding) as similarity
-                FROM issues_issue i1
-                CROSS JOIN issues_issue i2
-                WHERE i1.id < i2.id
-                    AND i1.embedding IS NOT NULL
-                    AND i2.embedding IS NOT NULL
-                    AND 1 - (i1.embedding <=> i2.embedding) > %s
-                    AND i1.status = 'reported'
-                    AND i2.status = 'reported'
-                ORDER BY similarity DESC
-            """, [min_similarity])
-            
-            results = cursor.fetchall()
-        
-        # Group into clusters
-        clusters = {}
-        for row in results:
-            issue1_id, issue2_id = row[0], row[1]
-            similarity = float(row[4])
-            
-            # Find existing cluster or create new one
-            cluster_key = None
-            for key, cluster in clusters.items():
-                if issue1_id in cluster['issue_ids'] or issue2_id in cluster['issue_ids']:
-                    cluster_key = key
-                    break
-            
-            if cluster_key:
-                clusters[cluster_key]['issue_ids'].update([issue1_id, issue2_id])
-                clusters[cluster_key]['avg_similarity'] = (
-                    clusters[cluster_key]['avg_similarity'] + similarity
-                ) / 2
-            else:
-                clusters[len(clusters)] = {
-                    'issue_ids': {issue1_id, issue2_id},
-                    'avg_similarity': similarity
-                }
-        
-        return [
-            {
-                'issue_ids': list(cluster['issue_ids']),
-                'count': len(cluster['issue_ids']),
-                'avg_similarity': cluster['avg_similarity']
-            }
-            for cluster in clusters.values()
-        ]
 
 
 # Singleton instance
-_search_service = None
+_search_services = {}
 
-def get_search_service():
-    """Get or create semantic search service instance"""
-    global _search_service
-    if _search_service is None:
-        _search_service = SemanticSearchService()
-    return _search_service
+def get_search_service(version=None):
+    """
+    Get or create the semantic search service for an embedding version
+    
+    Args:
+        version: EmbeddingVersion to encode with (default: the active one)
+    """
+    version = version or get_active_version()
+    service = _search_services.get(version.model_name)
+    if service is None:
+        if version.model_name == settings.EMBEDDING_MODEL_NAME:
+            service_url = version.service_url or settings.EMBEDDING_SERVICE_URL
+            backend = settings.EMBEDDING_BACKEND
+        else:
+            # The exported ONNX model belongs to EMBEDDING_MODEL_NAME
+            service_url = version.service_url
+            backend = 'torch'
+        service = SemanticSearchService(
+            model_name=version.model_name,
+            service_url=service_url,
+            backend=backend,
+            onnx_model_dir=settings.EMBEDDING_ONNX_MODEL_DIR,
+            embedding_dim=version.dimensions,
+            result_cache=get_result_cache() if settings.SEARCH_RESULT_CACHE_SIZE else None,
+            query_cache=QueryEmbeddingCache(
+                max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+                redis_url=settings.QUERY_EMBEDDING_CACHE_REDIS_URL,
+                namespace=version.model_name
+            )
+        )
+        _search_services[version.model_name] = service
+    return service
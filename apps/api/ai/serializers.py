@@ -1,5 +1,10 @@
+from urllib.parse import urlparse
+
+from django.conf import settings
 from rest_framework import serializers
 
+from .semantic_search import BATCH_SEARCH_MAX_LIMIT, BATCH_SEARCH_TARGETS
+
 
 class TranslationRequestSerializer(serializers.Serializer):
     text = serializers.CharField()
@@ -55,7 +60,7 @@ class ComplaintDraftResponseSerializer(serializers.Serializer):
 
 
 class DocumentSummaryRequestSerializer(serializers.Serializer):
-    document_text = serializers.CharField()
+    document_text = serializers.CharField(max_length=settings.SUMMARY_MAX_DOCUMENT_CHARS)
     max_points = serializers.IntegerField(default=5, min_value=1, max_value=10)
 
 
@@ -70,3 +75,25 @@ class RTIQueryRequestSerializer(serializers.Serializer):
 
 class RTIQueryResponseSerializer(serializers.Serializer):
     query = serializers.CharField()
+
+
+class BatchSearchQuerySerializer(serializers.Serializer):
+    query = serializers.CharField()
+    type = serializers.ChoiceField(choices=list(BATCH_SEARCH_TARGETS), default='solutions')
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=BATCH_SEARCH_MAX_LIMIT)
+
+
+class LLMJobOptionsSerializer(serializers.Serializer):
+    callback_url = serializers.URLField(required=False, allow_blank=True)
+    
+    def validate_callback_url(self, value):
+        if value and urlparse(value).hostname not in settings.LLM_JOB_WEBHOOK_HOSTS:
+            raise serializers.ValidationError("Callback host is not in LLM_JOB_WEBHOOK_HOSTS")
+        return value
+
+
+class LLMJobSubmittedSerializer(serializers.Serializer):
+    job_id = serializers.UUIDField()
+    status = serializers.CharField()
+    status_url = serializers.URLField()
+    events_url = serializers.URLField(required=False, help_text="Served under ASGI only")
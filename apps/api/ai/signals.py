@@ -0,0 +1,35 @@
+"""
+Signal handlers keeping AI caches consistent with issue and solution writes
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from issues.models import Issue
+from wiki.models import Solution
+from .result_cache import get_result_cache
+
+# Fields that appear in (or decide) search results; saves limited to other
+# fields, such as view and vote counters, leave cached results valid
+RESULT_FIELDS = {
+    Issue: {'title', 'description', 'status', 'embedding'},
+    Solution: {'title', 'description', 'embedding'},
+}
+
+RESULT_SOURCE = {
+    Issue: 'issues',
+    Solution: 'solutions',
+}
+
+
+def invalidate_search_results(sender, instance, update_fields=None, **kwargs):
+    """Invalidate cached search results that the saved or deleted row may belong to"""
+    if update_fields and not RESULT_FIELDS[sender].intersection(update_fields):
+        return
+    # After commit, so a concurrent search cannot re-cache the old rows
+    transaction.on_commit(lambda: get_result_cache().invalidate(RESULT_SOURCE[sender]))
+
+
+def connect_signals():
+    for model in RESULT_SOURCE:
+        post_save.connect(invalidate_search_results, sender=model, dispatch_uid=f'search-results-save-{model.__name__}')
+        post_delete.connect(invalidate_search_results, sender=model, dispatch_uid=f'search-results-delete-{model.__name__}')
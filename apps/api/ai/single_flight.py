@@ -0,0 +1,235 @@
+"""
+Single-flight coalescing of identical in-flight calls
+Concurrent callers with the same key share one upstream call instead of each making their own
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock only if it still holds our token, so a leader whose lock
+# expired cannot release the lock of the worker that took over
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    """One in-flight call that followers in this process wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one
+    
+    Within a process the first caller (the leader) runs the call and the
+    others wait for its result or exception. With Redis configured, the
+    leader also takes a lock shared by all workers and publishes its
+    result under a short-lived key; leaders of other workers wait on that
+    key instead of calling upstream themselves. If the remote leader dies
+    or its lock expires without a result, the waiting worker runs the call
+    itself. Redis errors fall back to in-process coalescing only.
+    
+    Results shared through Redis must be strings.
+    """
+    
+    def __init__(self, redis_url=None, lock_ttl=60, result_ttl=30, poll_interval=0.05, prefix='llmflight'):
+        """
+        Args:
+            redis_url: Redis URL for cross-worker coalescing (disabled if empty)
+            lock_ttl: Seconds a leader's lock lives; longer than the slowest call
+            result_ttl: Seconds a published result stays readable for followers
+            poll_interval: Seconds between follower checks of the result key
+            prefix: Redis key prefix
+        """
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'leaders': 0, 'coalesced': 0, 'remote_waits': 0,
+            'remote_hits': 0, 'remote_takeovers': 0, 'redis_errors': 0
+        }
+        
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.1, socket_connect_timeout=0.1)
+    
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+    
+    def do(self, key, fn):
+        """
+        Run fn once for all concurrent callers with this key
+        
+        Args:
+            key: Identity of the call (e.g. a generation cache key)
+            fn: Callable producing the result
+        
+        Returns:
+            The leader's result; its exception is raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters['leaders'] += 1
+            else:
+                self._counters['coalesced'] += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = self._run_shared(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def ado(self, key, fn):
+        """
+        Async do: fn returns an awaitable
+        
+        The call runs as a task of its own, so a caller that disconnects
+        does not cancel it for the callers still waiting.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._tasks.get(flight_key)
+        if task is None:
+            task = loop.create_task(self._arun_shared(key, fn))
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(flight_key, None))
+            self._count('leaders')
+        else:
+            self._count('coalesced')
+        return await asyncio.shield(task)
+    
+    # Cross-worker coordination
+    
+    def _keys(self, key):
+        return f"{self.prefix}:lock:{key}", f"{self.prefix}:result:{key}"
+    
+    def _try_lock(self, key):
+        """Lock token if this worker became the leader, None if another worker leads"""
+        lock_key, _ = self._keys(key)
+        token = uuid.uuid4().hex
+        if self._redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+            return token
+        return None
+    
+    def _finish(self, key, token, result):
+        """Publish the leader's result (None if it failed) and release its lock"""
+        lock_key, result_key = self._keys(key)
+        try:
+            if result:
+                self._redis.set(result_key, result.encode('utf-8'), px=int(self.result_ttl * 1000))
+            self._redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning("Single-flight Redis error: %s", e)
+            self._count('redis_errors')
+    
+    def _poll(self, key):
+        """(published result or None, whether the remote leader still holds the lock)"""
+        lock_key, result_key = self._keys(key)
+        payload, locked = self._redis.pipeline().get(result_key).exists(lock_key).execute()
+        return (payload.decode('utf-8') if payload is not None else None), bool(locked)
+    
+    def _run_shared(self, key, fn):
+        if self._redis is None:
+            return fn()
+        
+        try:
+            token = self._try_lock(key)
+            if token is None:
+                self._count('remote_waits')
+                deadline = time.monotonic() + self.lock_ttl
+                while True:
+                    result, locked = self._poll(key)
+                    if result is not None:
+                        self._count('remote_hits')
+                        return result
+                    if not locked or time.monotonic() > deadline:
+                        break
+                    time.sleep(self.poll_interval)
+                # The remote leader failed or produced nothing: take over
+                self._count('remote_takeovers')
+                token = self._try_lock(key)
+        except Exception as e:
+            logger.warning("Single-flight Redis error: %s", e)
+            self._count('redis_errors')
+            return fn()
+        
+        result = None
+        try:
+            result = fn()
+            return result
+        finally:
+            # Released on failure too, so remote followers take over at once
+            if token is not None:
+                self._finish(key, token, result)
+    
+    async def _arun_shared(self, key, fn):
+        if self._redis is None:
+            return await fn()
+        
+        # Redis round trips run in worker threads; waits between polls do not
+        try:
+            token = await asyncio.to_thread(self._try_lock, key)
+            if token is None:
+                self._count('remote_waits')
+                deadline = time.monotonic() + self.lock_ttl
+                while True:
+                    result, locked = await asyncio.to_thread(self._poll, key)
+                    if result is not None:
+                        self._count('remote_hits')
+                        return result
+                    if not locked or time.monotonic() > deadline:
+                        break
+                    await asyncio.sleep(self.poll_interval)
+                self._count('remote_takeovers')
+                token = await asyncio.to_thread(self._try_lock, key)
+        except Exception as e:
+            logger.warning("Single-flight Redis error: %s", e)
+            self._count('redis_errors')
+            return await fn()
+        
+        result = None
+        try:
+            result = await fn()
+            return result
+        finally:
+            if token is not None:
+                await asyncio.to_thread(self._finish, key, token, result)
+    
+    def stats(self):
+        """Leader/follower counters and calls currently in flight"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._calls) + len(self._tasks)
+        return stats
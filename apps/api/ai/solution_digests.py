@@ -0,0 +1,115 @@
+"""
+Precomputed solution digests
+Keeps wiki.SolutionDigest (plain-language text and action steps) in sync with solutions
+"""
+import logging
+
+from django.db import connection
+
+from wiki.models import Solution, SolutionDigest
+from .admission import set_llm_priority
+from .llm import get_llm_client
+
+logger = logging.getLogger(__name__)
+
+
+def solution_digest_text(solution):
+    """Text a solution's digest is generated from"""
+    steps = '\n'.join(f"{i}. {step}" for i, step in enumerate(solution.steps or [], 1))
+    return f"{solution.title}\n{solution.description}\n{steps}".strip()
+
+
+def stale_solution_ids(last_id=0, limit=50, force=False):
+    """
+    IDs of solutions without a digest, or edited since theirs was generated
+    
+    Args:
+        last_id: Only return IDs above this one
+        limit: Maximum IDs returned
+        force: Return every solution
+    
+    Returns:
+        List of IDs in ascending order
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT s.id
+            FROM wiki_solution s
+            LEFT JOIN wiki_solutiondigest d ON d.solution_id = s.id
+            WHERE s.id > %s
+                AND (%s OR d.id IS NULL OR d.source_updated_at != s.updated_at OR d.language != s.language)
+            ORDER BY s.id
+            LIMIT %s
+        """, [last_id, force, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def build_solution_digest(solution, client=None):
+    """
+    Generate and store the digest of one solution
+    
+    The digest records the updated_at it was generated from, so a solution
+    edited while its digest was being generated is picked up again by the
+    next run.
+    
+    Args:
+        solution: Solution
+        client: LLM client (default: the process-wide client)
+    
+    Returns:
+        SolutionDigest
+    """
+    client = client or get_llm_client()
+    text = solution_digest_text(solution)
+    digest, _ = SolutionDigest.objects.update_or_create(
+        solution=solution,
+        defaults={
+            'language': solution.language,
+            'simplified_text': client.simplify_jargon(text, language=solution.language),
+            'action_steps': client.extract_action_steps(text),
+            'source_updated_at': solution.updated_at,
+        }
+    )
+    return digest
+
+
+def refresh_solution_digests(force=False, batch_size=50, client=None, progress=None):
+    """
+    Generate digests for new and edited solutions, batch by batch
+    
+    Generations queue behind interactive requests (background priority). A
+    solution whose generation fails keeps its old digest and is retried on
+    the next run.
+    
+    Args:
+        force: Regenerate every digest
+        batch_size: Solutions loaded per batch
+        client: LLM client (default: the process-wide client)
+        progress: Optional callable receiving the number of solutions done so far
+    
+    Returns:
+        Dict with the number of digests generated and failed
+    """
+    set_llm_priority('background')
+    client = client or get_llm_client()
+    stats = {'generated': 0, 'failed': 0}
+    last_id = 0
+    
+    while True:
+        batch = stale_solution_ids(last_id, batch_size, force)
+        if not batch:
+            break
+        
+        for solution in Solution.objects.filter(pk__in=batch).order_by('pk'):
+            try:
+                build_solution_digest(solution, client)
+                stats['generated'] += 1
+            except Exception as e:
+                logger.warning("Digest of solution %s failed: %s", solution.pk, e)
+                stats['failed'] += 1
+        
+        last_id = batch[-1]
+        if progress:
+            progress(stats['generated'] + stats['failed'])
+    
+    return stats
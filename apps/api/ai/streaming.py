@@ -0,0 +1,97 @@
+"""
+Server-Sent Events helpers for streaming LLM output
+"""
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views accept ``Accept: text/event-stream`` during content negotiation
+    
+    The streaming response is built by sse_response; this renderer only
+    handles non-streamed errors sent to an event-stream client.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data).encode(self.charset)
+
+
+def wants_stream(request):
+    """Whether the client asked for SSE (Accept header or ?stream=true); DRF or plain Django request"""
+    params = getattr(request, 'query_params', request.GET)
+    if params.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None:
+        return renderer.format == 'sse'
+    return EventStreamRenderer.media_type in request.headers.get('Accept', '')
+
+
+def sse_event(event, data):
+    """Format one SSE event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _error_payload(e):
+    payload = {'error': str(e)}
+    if getattr(e, 'retry_after', None):
+        payload['retry_after'] = e.retry_after  # The LLM queue was full
+    return payload
+
+
+def _events(chunks, result_field):
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event('token', {'text': chunk})
+    except Exception as e:
+        yield sse_event('error', _error_payload(e))
+        return
+    yield sse_event('done', {result_field: ''.join(parts)})
+
+
+async def _async_events(chunks, result_field):
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event('token', {'text': chunk})
+    except Exception as e:
+        yield sse_event('error', _error_payload(e))
+        return
+    yield sse_event('done', {result_field: ''.join(parts)})
+
+
+def sse_response(chunks, result_field):
+    """
+    Relay text chunks to the client as Server-Sent Events
+    
+    Emits a ``token`` event per chunk, then ``done`` with the full text
+    under result_field (the key of the non-streaming JSON response), or
+    ``error`` if generation fails midway.
+    
+    Args:
+        chunks: Iterator or async iterator of text chunks (async under ASGI)
+        result_field: Name of the full-text field in the done event
+    
+    Returns:
+        StreamingHttpResponse
+    """
+    if hasattr(chunks, '__aiter__'):
+        return event_stream_response(_async_events(chunks, result_field))
+    return event_stream_response(_events(chunks, result_field))
+
+
+def event_stream_response(events):
+    """StreamingHttpResponse for an iterator (or async iterator) of formatted SSE events"""
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
@@ -0,0 +1,118 @@
+"""
+Document chunking for map-reduce summarization
+Splits long documents into paragraph-aligned chunks that fit one LLM prompt
+"""
+import hashlib
+import re
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Sentence ends, including the Devanagari danda
+SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+# About one paragraph in this many ends a chunk once it has reached min_chars
+BOUNDARY_DIVISOR = 4
+
+
+def split_paragraphs(text):
+    """Non-empty paragraphs of a text, separated by blank lines"""
+    paragraphs = (paragraph.strip() for paragraph in PARAGRAPH_BREAK.split(text))
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+
+def _split_oversized(paragraph, max_chars):
+    """Split a paragraph longer than max_chars at sentence ends (hard-splitting overlong sentences)"""
+    parts = []
+    for sentence in SENTENCE_END.split(paragraph):
+        parts.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+    
+    pieces = []
+    current = ''
+    for part in parts:
+        if current and len(current) + 1 + len(part) > max_chars:
+            pieces.append(current)
+            current = part
+        else:
+            current = f"{current} {part}" if current else part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _is_boundary(paragraph):
+    digest = hashlib.sha256(paragraph.encode('utf-8')).digest()
+    return digest[0] % BOUNDARY_DIVISOR == 0
+
+
+def chunk_document(text, max_chars, min_chars=None):
+    """
+    Split a document into chunks of whole paragraphs
+    
+    Chunk boundaries are content-defined: once a chunk holds min_chars, it
+    ends after a paragraph whose hash selects it as a boundary (or earlier,
+    when the next paragraph would overflow max_chars). An edit therefore
+    only changes the chunks around it; later boundaries fall on the same
+    paragraphs as before, so their cached summaries are reused.
+    
+    Args:
+        text: Document text
+        max_chars: Maximum chunk length
+        min_chars: Length before a chunk may end at a boundary (default: max_chars / 2)
+    
+    Returns:
+        List of chunk texts
+    """
+    min_chars = min_chars if min_chars is not None else max_chars // 2
+    chunks = []
+    current = []
+    size = 0
+    
+    for paragraph in split_paragraphs(text):
+        pieces = _split_oversized(paragraph, max_chars) if len(paragraph) > max_chars else [paragraph]
+        for piece in pieces:
+            if current and size + len(piece) > max_chars:
+                chunks.append('\n\n'.join(current))
+                current, size = [], 0
+            
+            current.append(piece)
+            size += len(piece) + 2
+            
+            if size >= min_chars and _is_boundary(piece):
+                chunks.append('\n\n'.join(current))
+                current, size = [], 0
+    
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def next_reduce_level(summaries, max_chars):
+    """
+    Group partial summaries for another summarization round
+    
+    Args:
+        summaries: Partial summaries, in document order
+        max_chars: Maximum length of one group
+    
+    Returns:
+        List of joined groups to summarize again, or None when the summaries
+        already fit one prompt (or cannot be grouped any further)
+    """
+    if sum(len(summary) + 2 for summary in summaries) <= max_chars:
+        return None
+    
+    groups = []
+    current = []
+    size = 0
+    for summary in summaries:
+        if current and size + len(summary) > max_chars:
+            groups.append('\n\n'.join(current))
+            current, size = [], 0
+        current.append(summary)
+        size += len(summary) + 2
+    if current:
+        groups.append('\n\n'.join(current))
+    
+    if len(groups) == len(summaries):
+        return None
+    return groups
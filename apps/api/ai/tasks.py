@@ -0,0 +1,159 @@
+"""
+Celery tasks for AI services
+"""
+from datetime import timedelta
+
+import requests
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .embeddings import EmbeddingBackfill, EMBEDDING_TARGETS
+from .jobs import fail_stale_jobs, job_payload, run_job
+from .models import LLMJob
+from .semantic_search import get_search_service
+from .solution_digests import refresh_solution_digests
+from .versioning import NEXT_COLUMN, get_building_version
+
+
+@shared_task
+def backfill_embeddings_task(targets=None, batch_size=512, force=False, updated_within_minutes=None):
+    """
+    Embed issues and solutions whose embedding is missing or stale
+    
+    Args:
+        targets: List of EMBEDDING_TARGETS keys (default: all)
+        batch_size: Rows per fetch/encode/write batch
+        force: Re-embed every row
+        updated_within_minutes: Only look at rows without an embedding or
+            updated in this window (used by the periodic schedule)
+    
+    Returns:
+        List of stats dicts, one per target and column
+    """
+    updated_since = None
+    if updated_within_minutes:
+        updated_since = timezone.now() - timedelta(minutes=updated_within_minutes)
+    targets = targets or list(EMBEDDING_TARGETS)
+    
+    stats = [
+        EmbeddingBackfill(
+            target,
+            batch_size=batch_size,
+            force=force,
+            updated_since=updated_since
+        ).run()
+        for target in targets
+    ]
+    
+    building = get_building_version()
+    if building is not None:
+        # Dual-write: edits made while a new model is being rolled out reach both columns
+        stats.extend(
+            EmbeddingBackfill(
+                target,
+                batch_size=batch_size,
+                force=force,
+                updated_since=updated_since,
+                search_service=get_search_service(building),
+                column=NEXT_COLUMN
+            ).run()
+            for target in targets
+        )
+    
+    return stats
+
+
+@shared_task
+def reembed_version_task(batch_size=512):
+    """
+    Fill the shadow columns of the embedding version being built
+    
+    Resumable by nature: rows already embedded with an up-to-date hash are
+    skipped, so the task can simply be queued again after an interruption.
+    
+    Returns:
+        List of stats dicts, one per target
+    """
+    building = get_building_version()
+    if building is None:
+        return []
+    
+    search_service = get_search_service(building)
+    return [
+        EmbeddingBackfill(
+            target,
+            batch_size=batch_size,
+            search_service=search_service,
+            column=NEXT_COLUMN
+        ).run()
+        for target in EMBEDDING_TARGETS
+    ]
+
+
+@shared_task
+def run_llm_job_task(job_id):
+    """
+    Run a submitted LLM job, then queue its webhook
+    
+    Returns:
+        Final job status, or None if the job was already taken
+    """
+    job = run_job(job_id)
+    if job is None:
+        return None
+    
+    if job.callback_url:
+        deliver_llm_job_webhook_task.delay(job_id)
+    return job.status
+
+
+@shared_task(
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5
+)
+def deliver_llm_job_webhook_task(job_id):
+    """
+    POST a finished job to its callback URL, retrying with backoff on errors
+    
+    Returns:
+        HTTP status of the delivery
+    """
+    job = LLMJob.objects.get(pk=job_id)
+    response = requests.post(job.callback_url, json=job_payload(job), timeout=10)
+    LLMJob.objects.filter(pk=job_id).update(callback_status=response.status_code)
+    response.raise_for_status()
+    return response.status_code
+
+
+@shared_task
+def purge_llm_jobs_task():
+    """
+    Fail jobs orphaned by a lost worker, then delete finished jobs older than LLM_JOB_RETENTION_DAYS
+    
+    Returns:
+        Dict with the number of jobs failed and deleted
+    """
+    failed = fail_stale_jobs()
+    for job_id in LLMJob.objects.filter(pk__in=failed).exclude(callback_url='').values_list('pk', flat=True):
+        deliver_llm_job_webhook_task.delay(str(job_id))
+    
+    cutoff = timezone.now() - timedelta(days=settings.LLM_JOB_RETENTION_DAYS)
+    deleted, _ = LLMJob.objects.filter(
+        status__in=LLMJob.FINISHED_STATUSES,
+        finished_at__lt=cutoff
+    ).delete()
+    return {'failed': len(failed), 'deleted': deleted}
+
+
+@shared_task
+def refresh_solution_digests_task(force=False, batch_size=50):
+    """
+    Precompute the digests of new and edited solutions
+    
+    Returns:
+        Dict with the number of digests generated and failed
+    """
+    return refresh_solution_digests(force=force, batch_size=batch_size)
@@ -0,0 +1,1159 @@
+"""
+Unit tests for AI module
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest import skipUnless
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+from rest_framework.test import APIClient
+from wiki.models import Category, Solution, SolutionDigest, SolutionNeighbour
+from issues.models import Issue, IssueNeighbour
+from ai.embeddings import EmbeddingBackfill, write_embeddings
+from ai.embedding_server import BatchingEncoder
+from ai.embedding_cache import QueryEmbeddingCache
+from ai.result_cache import SearchResultCache
+from ai.generation_cache import GenerationCache
+from ai.summarization import chunk_document
+from ai.single_flight import SingleFlight
+from ai.circuit_breaker import CircuitBreaker
+from ai.admission import AdmissionController, AdmissionRejected
+from ai.llm import AsyncLLMClient, LLMClient
+from ai.llm_metrics import LLMMetrics, report_usage
+from ai.streaming import sse_response
+from ai.encoders import create_local_encoder
+from ai.clustering import cluster_edges
+from ai.neighbours import cluster_similar_issues
+from ai.hybrid_search import reciprocal_rank_fusion
+from ai.semantic_search import SemanticSearchService
+from ai import hybrid_search, semantic_search, versioning
+from ai.jobs import job_events, job_payload, run_job
+from ai.solution_digests import refresh_solution_digests
+from ai.models import LLMJob
+from ai.tasks import purge_llm_jobs_task
+
+# Model of the embedding versions rolled out in tests
+NEXT_MODEL = 'multilingual-test-model'
+
+
+class FakeSearchService:
+    """Stands in for SemanticSearchService without loading a model"""
+    
+    embedding_dim = 384
+    
+    def __init__(self, model_name=None):
+        self.model_name = model_name or settings.EMBEDDING_MODEL_NAME
+        self.encoded = []
+    
+    def generate_embedding(self, text):
+        return self.generate_embeddings([text])[0]
+    
+    def generate_embeddings(self, texts, batch_size=64):
+        self.encoded.extend(texts)
+        return [[float(len(text) % 7 + 1)] * self.embedding_dim for text in texts]
+
+
+class FakeEncoder:
+    """Encoder interface on top of FakeSearchService"""
+    
+    def __init__(self, service):
+        self.service = service
+    
+    def encode(self, texts, batch_size=64):
+        return self.service.generate_embeddings(texts, batch_size=batch_size)
+
+
+class SlowEncoder(FakeEncoder):
+    """FakeEncoder taking delay seconds per call, like a model loading on first use"""
+    
+    def __init__(self, service, delay):
+        super().__init__(service)
+        self.delay = delay
+    
+    def encode(self, texts, batch_size=64):
+        time.sleep(self.delay)
+        return super().encode(texts, batch_size=batch_size)
+
+
+class FakeDigestClient:
+    """LLM client stand-in counting digest generations"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def simplify_jargon(self, text, language='en', stream=False):
+        self.calls += 1
+        return "- Complain to the Jal Board"
+    
+    def extract_action_steps(self, solution_text):
+        return ["Take photo of dirty water", "Submit form A-12"]
+
+
+class RejectingAdmission:
+    """Admission controller stand-in whose queue is always full"""
+    
+    def slot(self, priority):
+        raise AdmissionRejected("LLM queue is full", retry_after=5)
+
+
+class EmbeddingBackfillTest(TestCase):
+    """Test the embedding backfill pipeline"""
+    
+    def setUp(self):
+        self.category = Category.objects.create(name="Water", slug="water")
+        self.issues = [
+            Issue.objects.create(
+                title=f"No water supply {i}",
+                description="Taps have been dry for a week",
+                category=self.category,
+                location=Point(77.2, 28.6, srid=4326)
+            )
+            for i in range(5)
+        ]
+        self.service = FakeSearchService()
+    
+    def test_backfill_embeds_missing_rows(self):
+        """Test rows without an embedding are embedded"""
+        stats = EmbeddingBackfill('issues', batch_size=2, search_service=self.service).run()
+        
+        self.assertEqual(stats['scanned'], 5)
+        self.assertEqual(stats['embedded'], 5)
+        self.assertEqual(stats['last_id'], self.issues[-1].pk)
+        self.assertFalse(Issue.objects.filter(embedding__isnull=True).exists())
+    
+    def test_backfill_skips_unchanged_rows(self):
+        """Test a second run only re-embeds rows whose text changed"""
+        EmbeddingBackfill('issues', search_service=self.service).run()
+        
+        issue = self.issues[0]
+        issue.description = "Water supply is contaminated"
+        issue.save()
+        
+        stats = EmbeddingBackfill('issues', search_service=FakeSearchService()).run()
+        self.assertEqual(stats['embedded'], 1)
+    
+    def test_backfill_resumes_after_id(self):
+        """Test a run can resume from the last processed id"""
+        stats = EmbeddingBackfill('issues', search_service=self.service).run(
+            start_after=self.issues[2].pk
+        )
+        self.assertEqual(stats['scanned'], 2)
+    
+    def test_solution_backfill_refreshes_neighbours(self):
+        """Test embedding solutions fills the precomputed neighbour table"""
+        solutions = [
+            Solution.objects.create(title=f"Report water leak {i}", description="Call the Jal Board", category=self.category)
+            for i in range(3)
+        ]
+        EmbeddingBackfill('solutions', search_service=self.service).run()
+        
+        neighbours = SolutionNeighbour.objects.filter(solution=solutions[0])
+        self.assertEqual(neighbours.count(), 2)
+        self.assertEqual(list(neighbours.values_list('rank', flat=True)), [1, 2])
+    
+    def test_issue_clusters_are_read_from_neighbour_lists(self):
+        """Test embedding issues fills their kNN graph and clusters are built from it"""
+        EmbeddingBackfill('issues', search_service=self.service).run()
+        Issue.objects.filter(pk=self.issues[0].pk).update(status='resolved')
+        
+        self.assertEqual(IssueNeighbour.objects.filter(issue=self.issues[1]).count(), 4)
+        clusters = cluster_similar_issues(min_similarity=0.8)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(sorted(clusters[0]['issue_ids']), [issue.pk for issue in self.issues[1:]])
+
+
+class NearestNeighbourTest(TestCase):
+    """Test the index-backed top-k lookup against exact search"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Water", slug="water")
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(20, 384))
+        self.ids = []
+        for i, vector in enumerate(self.vectors):
+            solution = Solution.objects.create(title=f"Solution {i}", description="", category=category)
+            self.ids.append(solution.id)
+        write_embeddings(
+            Solution,
+            [(pk, vector, '') for pk, vector in zip(self.ids, self.vectors)],
+            settings.EMBEDDING_MODEL_NAME
+        )
+        self.query = self.vectors[0] + 0.5 * self.vectors[1]
+        self.service = SemanticSearchService(encoder=FakeEncoder(FakeSearchService()))
+    
+    def exact_top(self, limit):
+        """(id, similarity) of the limit most similar solutions by brute force"""
+        similarities = self.vectors @ self.query / (
+            np.linalg.norm(self.vectors, axis=1) * np.linalg.norm(self.query)
+        )
+        order = np.argsort(-similarities)[:limit]
+        return [(self.ids[i], float(similarities[i])) for i in order]
+    
+    def lookup(self, limit, threshold):
+        vector_str = '[' + ','.join(map(str, self.query)) + ']'
+        rows = self.service._nearest_neighbours(
+            'wiki_solution', ['id'], vector_str, limit, threshold, precision='float32'
+        )
+        return [(row[0], row[1]) for row in rows]
+    
+    def test_results_match_exact_search(self):
+        """Test the top-k above the threshold equals brute-force ranking"""
+        rows = self.lookup(5, -1)
+        
+        exact = self.exact_top(5)
+        self.assertEqual([pk for pk, _ in rows], [pk for pk, _ in exact])
+        for (_, similarity), (_, expected) in zip(rows, exact):
+            self.assertAlmostEqual(similarity, expected, places=4)
+    
+    def test_threshold_applies_after_limit(self):
+        """Test the threshold trims the top-k: rows below it are dropped, rows past the limit never return"""
+        exact = self.exact_top(3)
+        # Between the second and third best
+        threshold = (exact[1][1] + exact[2][1]) / 2
+        
+        self.assertEqual([pk for pk, _ in self.lookup(3, threshold)], [pk for pk, _ in exact[:2]])
+        self.assertEqual([pk for pk, _ in self.lookup(3, -1)], [pk for pk, _ in exact])
+        self.assertEqual([pk for pk, _ in self.lookup(1, -1)], [exact[0][0]])
+
+
+class GeoSemanticSearchTest(TestCase):
+    """Test semantic issue search constrained to a radius"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Roads", slug="roads")
+        self.near = Issue.objects.create(
+            title="Pothole", description="Deep pothole near the market",
+            category=category, location=Point(77.2160, 28.6280, srid=4326)
+        )
+        self.far = Issue.objects.create(
+            title="Pothole", description="Deep pothole near the station",
+            category=category, location=Point(72.8777, 19.0760, srid=4326)
+        )
+        fake = FakeSearchService()
+        EmbeddingBackfill('issues', search_service=fake).run()
+        self.service = SemanticSearchService(encoder=FakeEncoder(fake))
+    
+    def test_only_issues_inside_radius_are_returned(self):
+        """Test sparse areas use the spatial-first plan and respect the radius"""
+        nearby = self.service.search_issues_near(
+            "pothole", 28.6277, 77.2156, radius_km=2, threshold=-1
+        )
+        
+        self.assertEqual(nearby['plan'], 'spatial_first')
+        self.assertEqual([issue['id'] for issue in nearby['results']], [self.near.id])
+        self.assertLess(nearby['results'][0]['distance_m'], 2000)
+
+
+class DuplicateIssueTest(TestCase):
+    """Test near-duplicate detection for new reports"""
+    
+    def setUp(self):
+        self.drains = Category.objects.create(name="Drainage", slug="drainage")
+        roads = Category.objects.create(name="Roads", slug="roads")
+        location = Point(77.2160, 28.6280, srid=4326)
+        self.open_issue = Issue.objects.create(
+            title="Drain overflowing", description="Sewage on the street",
+            category=self.drains, location=location
+        )
+        Issue.objects.create(
+            title="Drain overflowing", description="Sewage on the street",
+            category=self.drains, location=location, status='resolved'
+        )
+        Issue.objects.create(
+            title="Drain overflowing", description="Sewage on the street",
+            category=roads, location=location
+        )
+        self.fake = FakeSearchService()
+        EmbeddingBackfill('issues', search_service=self.fake).run()
+        self.service = SemanticSearchService(encoder=FakeEncoder(self.fake))
+    
+    def test_only_open_issues_in_category_nearby(self):
+        """Test resolved issues and other categories are not duplicates"""
+        embedding = self.fake.generate_embedding("Drain overflowing\nSewage on the street")
+        duplicates = self.service.find_duplicate_issues(embedding, self.drains.id, 28.6281, 77.2161)
+        
+        self.assertEqual([issue['id'] for issue in duplicates], [self.open_issue.id])
+        self.assertLess(duplicates[0]['distance_m'], 150)
+    
+    def test_far_away_issue_is_not_duplicate(self):
+        """Test the same problem elsewhere in the city is a separate issue"""
+        embedding = self.fake.generate_embedding("Drain overflowing\nSewage on the street")
+        duplicates = self.service.find_duplicate_issues(embedding, self.drains.id, 28.6500, 77.2300)
+        
+        self.assertEqual(duplicates, [])
+    
+    def post_report(self, query='', **extra):
+        """Report the same drain problem through the API, with the fake model serving embeddings"""
+        services = semantic_search._search_services
+        model_name = versioning.get_active_version().model_name
+        previous = services.get(model_name)
+        services[model_name] = self.service
+        try:
+            return APIClient().post(f'/api/issues/issues/{query}', {
+                'title': 'Drain overflowing',
+                'description': 'Sewage on the street',
+                'category_id': self.drains.id,
+                'location': {'type': 'Point', 'coordinates': [77.2161, 28.6281]},
+                **extra
+            }, format='json')
+        finally:
+            if previous is None:
+                services.pop(model_name, None)
+            else:
+                services[model_name] = previous
+    
+    def test_create_returns_conflict_when_checking(self):
+        """Test an opted-in report of an open issue nearby is answered with its duplicates"""
+        response = self.post_report('?check_duplicates=true')
+        
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([issue['id'] for issue in response.data['duplicates']], [self.open_issue.id])
+        self.assertEqual(Issue.objects.count(), 3)
+    
+    def test_create_allows_duplicate(self):
+        """Test allow_duplicate, or not opting in, creates the issue with its embedding"""
+        response = self.post_report('?check_duplicates=true', allow_duplicate=True)
+        self.assertEqual(response.status_code, 201)
+        
+        response = self.post_report()
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(Issue.objects.get(pk=response.data['id']).embedding)
+    
+    @override_settings(DUPLICATE_CHECK_TIMEOUT_MS=50)
+    def test_slow_encoding_fails_open(self):
+        """Test a report is created without waiting for an encoding over the budget"""
+        self.service = SemanticSearchService(encoder=SlowEncoder(self.fake, 0.5))
+        started = time.monotonic()
+        response = self.post_report('?check_duplicates=true')
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertIsNone(Issue.objects.get(pk=response.data['id']).embedding)
+
+
+class BatchSearchTest(TestCase):
+    """Test multi-query semantic search"""
+    
+    def setUp(self):
+        self.category = Category.objects.create(name="Water", slug="water")
+        self.solution = Solution.objects.create(title="Fix leak", description="Call the Jal Board", category=self.category)
+        self.issue = Issue.objects.create(
+            title="Leak", description="Pipe burst on main road",
+            category=self.category, location=Point(77.2, 28.6, srid=4326)
+        )
+        EmbeddingBackfill('solutions', search_service=FakeSearchService()).run()
+        EmbeddingBackfill('issues', search_service=FakeSearchService()).run()
+        self.fake = FakeSearchService()
+        self.service = SemanticSearchService(encoder=FakeEncoder(self.fake))
+    
+    def test_results_grouped_per_query(self):
+        """Test each query gets its own results, in request order"""
+        results = self.service.batch_search([
+            {'query': 'water leak', 'type': 'issues'},
+            {'query': 'water leak', 'type': 'solutions'},
+            {'query': 'who handles water', 'type': 'categories', 'limit': 3},
+        ], threshold=-1)
+        
+        self.assertEqual([hit['id'] for hit in results[0]], [self.issue.id])
+        self.assertEqual(results[0][0]['status'], self.issue.status)
+        self.assertEqual([hit['id'] for hit in results[1]], [self.solution.id])
+        self.assertEqual(results[2][0]['slug'], 'water')
+        self.assertEqual(results[2][0]['solution_count'], 1)
+    
+    def test_queries_encoded_once(self):
+        """Test repeated queries share one embedding in a single forward pass"""
+        self.service.batch_search([
+            {'query': 'water leak', 'type': 'issues'},
+            {'query': 'water leak', 'type': 'solutions'},
+        ])
+        
+        self.assertEqual(self.fake.encoded, ['water leak'])
+    
+    def test_category_limit_is_clamped(self):
+        """Test categories are ranked with the same clamped limit their candidates were fetched with"""
+        roads = Category.objects.create(name="Roads", slug="roads")
+        Solution.objects.create(title="Fill pothole", description="Report to PWD", category=roads)
+        EmbeddingBackfill('solutions', search_service=FakeSearchService()).run()
+        
+        results = self.service.batch_search([
+            {'query': 'who handles water', 'type': 'categories', 'limit': 0},
+        ], threshold=-1)
+        
+        self.assertEqual(len(results[0]), 1)
+    
+    def test_invalid_limit_is_rejected(self):
+        """Test a non-positive or oversized per-query limit is a 400, not a database error"""
+        for limit in (-1, 'ten', 500):
+            response = APIClient().post('/api/ai/search/batch/', {
+                'queries': [{'query': 'water leak', 'type': 'issues', 'limit': limit}]
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+class QuantizedSearchTest(TestCase):
+    """Test reduced-precision candidate search with float32 re-ranking"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Water", slug="water")
+        for i in range(4):
+            Solution.objects.create(title=f"Fix leak {i}", description="Call the Jal Board", category=category)
+        fake = FakeSearchService()
+        EmbeddingBackfill('solutions', search_service=fake).run()
+        self.service = SemanticSearchService(encoder=FakeEncoder(fake))
+    
+    def test_precisions_return_float32_similarity(self):
+        """Test every precision re-ranks with the full-precision similarity"""
+        vector_str = '[' + ','.join(['1.0'] * 384) + ']'
+        baseline = self.service._nearest_neighbours('wiki_solution', ['id'], vector_str, 3, -1, precision='float32')
+        
+        for precision in ('halfvec', 'binary'):
+            rows = self.service._nearest_neighbours('wiki_solution', ['id'], vector_str, 3, -1, precision=precision)
+            self.assertEqual(len(rows), 3)
+            self.assertEqual([round(row[1], 5) for row in rows], [round(row[1], 5) for row in baseline])
+
+
+class EmbeddingVersionTest(TestCase):
+    """Test re-embedding into the shadow columns of a new model version"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Water", slug="water")
+        self.solutions = [
+            Solution.objects.create(title=f"Fix leak {i}", description="Call the Jal Board", category=category)
+            for i in range(3)
+        ]
+        EmbeddingBackfill('solutions', search_service=FakeSearchService()).run()
+    
+    def test_reembed_fills_shadow_column_only(self):
+        """Test the new version's vectors do not touch the serving column"""
+        version = versioning.start_version(NEXT_MODEL, 384)
+        self.assertEqual(version.status, 'building')
+        
+        stats = EmbeddingBackfill(
+            'solutions', search_service=FakeSearchService(NEXT_MODEL), column=versioning.NEXT_COLUMN
+        ).run()
+        
+        self.assertEqual(stats['embedded'], 3)
+        progress = versioning.version_progress()['wiki_solution']
+        self.assertEqual(progress['embedded'], progress['total'])
+        self.assertFalse(progress['indexed'])
+        with self.assertRaises(ValueError):
+            versioning.activate_version()
+    
+    def test_catch_up_reembeds_rows_edited_during_rollout(self):
+        """Test a solution edited after the re-embed job passed it gets a new shadow vector"""
+        versioning.start_version(NEXT_MODEL, 384)
+        EmbeddingBackfill(
+            'solutions', search_service=FakeSearchService(NEXT_MODEL), column=versioning.NEXT_COLUMN
+        ).run()
+        self.solutions[0].description = "Call the Jal Board helpline"
+        self.solutions[0].save()
+        
+        stats = versioning.catch_up_version(search_service=FakeSearchService(NEXT_MODEL))
+        
+        self.assertEqual(stats['solutions']['embedded'], 1)
+    
+    def test_vectors_of_another_model_are_not_written(self):
+        """Test a worker still encoding with the previous model cannot fill a column"""
+        versioning.start_version(NEXT_MODEL, 384)
+        
+        stats = EmbeddingBackfill(
+            'solutions', search_service=FakeSearchService(), column=versioning.NEXT_COLUMN
+        ).run()
+        
+        self.assertEqual(stats['embedded'], 0)
+        self.assertEqual(versioning.version_progress()['wiki_solution']['embedded'], 0)
+    
+    def test_only_one_version_builds_at_a_time(self):
+        """Test a second rollout is refused while one is building"""
+        versioning.start_version(NEXT_MODEL, 384)
+        with self.assertRaises(ValueError):
+            versioning.start_version('another-test-model', 768)
+
+
+class LLMJobTest(TestCase):
+    """Test background LLM jobs record their result"""
+    
+    def setUp(self):
+        self.client = LLMClient(use_ollama=True)
+        self.client.generate = lambda prompt: "Under Section 6(1) of the RTI Act, 2005..."
+        self.job = LLMJob.objects.create(
+            kind='generate-rti',
+            input={'topic': 'Ward road budget', 'department': 'Municipal Corporation'}
+        )
+    
+    def test_job_result_uses_endpoint_response_key(self):
+        """Test a finished job carries the same field as the synchronous response"""
+        run_job(self.job.id, client=self.client)
+        self.job.refresh_from_db()
+        
+        self.assertEqual(self.job.status, 'succeeded')
+        self.assertEqual(job_payload(self.job)['query'], "Under Section 6(1) of the RTI Act, 2005...")
+    
+    def test_job_runs_once(self):
+        """Test a redelivered task does not run a job again"""
+        run_job(self.job.id, client=self.client)
+        
+        self.assertIsNone(run_job(self.job.id, client=self.client))
+    
+    def collect_events(self):
+        """Run the job's event stream to its end"""
+        async def collect():
+            return [event async for event in job_events(self.job.id)]
+        return async_to_sync(collect)()
+    
+    @override_settings(LLM_JOB_EVENTS_TIMEOUT=0, LLM_JOB_EVENTS_POLL_INTERVAL=0)
+    def test_events_end_with_result(self):
+        """Test the event stream of a finished job carries its status and result"""
+        run_job(self.job.id, client=self.client)
+        events = self.collect_events()
+        
+        self.assertEqual([event.split('\n')[0] for event in events], ['event: status', 'event: done'])
+        self.assertIn('"query": "Under Section 6(1) of the RTI Act, 2005..."', events[1])
+    
+    @override_settings(LLM_JOB_EVENTS_TIMEOUT=0, LLM_JOB_EVENTS_POLL_INTERVAL=0)
+    def test_events_time_out_on_pending_job(self):
+        """Test the event stream of a job nobody runs ends with an error"""
+        events = self.collect_events()
+        
+        self.assertEqual([event.split('\n')[0] for event in events], ['event: status', 'event: error'])
+    
+    @override_settings(LLM_JOB_RUNNING_TIMEOUT=60)
+    def test_job_of_lost_worker_is_failed(self):
+        """Test a job left running past the timeout is failed by the periodic sweep"""
+        LLMJob.objects.filter(pk=self.job.pk).update(
+            status='running', started_at=timezone.now() - timedelta(minutes=5)
+        )
+        
+        self.assertEqual(purge_llm_jobs_task()['failed'], 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertIsNotNone(self.job.finished_at)
+
+
+class SolutionDigestTest(TestCase):
+    """Test the solution digest precomputation"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Water", slug="water")
+        self.solutions = [
+            Solution.objects.create(
+                title=f"Dirty water supply {i}",
+                description="Contaminated water in the taps",
+                steps=["Take photo of dirty water", "Submit form A-12"],
+                category=category
+            )
+            for i in range(3)
+        ]
+        self.client = FakeDigestClient()
+    
+    def test_refresh_generates_missing_digests(self):
+        """Test every solution gets a digest tied to its current version"""
+        stats = refresh_solution_digests(batch_size=2, client=self.client)
+        
+        self.assertEqual(stats, {'generated': 3, 'failed': 0})
+        digest = SolutionDigest.objects.get(solution=self.solutions[0])
+        self.assertEqual(digest.source_updated_at, self.solutions[0].updated_at)
+        self.assertEqual(digest.action_steps, ["Take photo of dirty water", "Submit form A-12"])
+    
+    def test_refresh_regenerates_only_edited_solutions(self):
+        """Test a second run only regenerates solutions updated since their digest"""
+        refresh_solution_digests(client=self.client)
+        
+        solution = self.solutions[1]
+        solution.description = "Water smells of sewage"
+        solution.save()
+        
+        client = FakeDigestClient()
+        refresh_solution_digests(client=client)
+        self.assertEqual(client.calls, 1)
+
+
+class BatchingEncoderTest(SimpleTestCase):
+    """Test the embedding server's request batching"""
+    
+    def test_concurrent_requests_share_forward_pass(self):
+        """Test concurrent encode calls are coalesced and split back correctly"""
+        service = FakeSearchService()
+        calls = []
+        
+        class Encoder:
+            def encode(self, texts, batch_size=64):
+                calls.append(len(texts))
+                return service.generate_embeddings(texts)
+        
+        batcher = BatchingEncoder(Encoder(), max_batch_size=64, max_wait=0.2)
+        results = {}
+        
+        def encode(i):
+            results[i] = batcher.encode(['x' * i, 'water'])
+        
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(1, 6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertLess(len(calls), 5)
+        self.assertEqual(sum(calls), 10)
+        for i, vectors in results.items():
+            self.assertEqual(len(vectors), 2)
+            self.assertEqual(vectors[0][0], float(i % 7 + 1))
+
+
+@skipUnless(
+    os.path.exists(os.path.join(settings.EMBEDDING_ONNX_MODEL_DIR, 'encoder.json')),
+    "ONNX model not exported (manage.py export_onnx_encoder)"
+)
+class OnnxEncoderParityTest(SimpleTestCase):
+    """Test the quantized ONNX backend against the torch embeddings"""
+    
+    texts = [
+        "pothole on main road",
+        "no water supply for three days in ward 12",
+        "सड़क पर गड्ढा",
+        "",
+    ]
+    
+    def test_embeddings_match_torch(self):
+        """Test ONNX embeddings are near-identical to sentence-transformers output"""
+        model_name = settings.EMBEDDING_MODEL_NAME
+        torch_out = create_local_encoder(model_name, 'torch').encode(self.texts)
+        onnx_out = create_local_encoder(model_name, 'onnx', settings.EMBEDDING_ONNX_MODEL_DIR).encode(self.texts)
+        
+        self.assertEqual(onnx_out.shape, torch_out.shape)
+        cosine = (torch_out * onnx_out).sum(axis=1) / (
+            np.linalg.norm(torch_out, axis=1) * np.linalg.norm(onnx_out, axis=1)
+        )
+        self.assertGreater(cosine.min(), 0.98)
+
+
+class QueryEmbeddingCacheTest(SimpleTestCase):
+    """Test the in-process query embedding cache"""
+    
+    def setUp(self):
+        self.service = FakeSearchService()
+        self.cache = QueryEmbeddingCache(max_size=2)
+    
+    def test_repeated_query_skips_inference(self):
+        """Test normalized repeats are served from the cache"""
+        first = self.cache.get_or_compute("Water Supply", self.service.generate_embedding)
+        second = self.cache.get_or_compute("  water   supply ", self.service.generate_embedding)
+        
+        self.assertEqual(self.service.encoded, ["water supply"])
+        self.assertEqual(list(first), list(second))
+        self.assertEqual(self.cache.stats()['local_hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache stays within max_size"""
+        for query in ["pothole", "garbage", "pothole", "street light"]:
+            self.cache.get_or_compute(query, self.service.generate_embedding)
+        
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.assertIsNone(self.cache.get("garbage"))
+        self.assertIsNotNone(self.cache.get("pothole"))
+    
+    def test_redis_error_is_a_miss(self):
+        """Test an unreachable shared tier costs inference, not the request"""
+        class BrokenRedis:
+            def get(self, key):
+                raise ConnectionError("Redis is down")
+            
+            set = get
+        
+        self.cache._redis = BrokenRedis()
+        self.cache.get_or_compute("pothole", self.service.generate_embedding)
+        
+        self.assertEqual(self.service.encoded, ["pothole"])
+        self.assertEqual(self.cache.stats()['redis_errors'], 2)
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the caches use, shared by several caches"""
+    
+    def __init__(self):
+        self.values = {}
+    
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+    
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+class SearchResultCacheTest(SimpleTestCase):
+    """Test the search result cache and its write-driven invalidation"""
+    
+    def setUp(self):
+        self.cache = SearchResultCache(max_size=10)
+        self.embedding = [0.5] * 384
+        self.calls = 0
+    
+    def search(self):
+        self.calls += 1
+        return [{'id': 1, 'similarity': 0.9}]
+    
+    def test_repeated_search_is_served_from_cache(self):
+        """Test the second identical search skips the lookup"""
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        results = self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'id': 1, 'similarity': 0.9}])
+        self.assertEqual(self.cache.stats()['hit_ratio'], 0.5)
+    
+    def test_write_invalidates_only_its_source(self):
+        """Test a solution write leaves cached issue results valid"""
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        self.cache.get_or_compute('issues', self.embedding, (10, 0.7), self.search)
+        
+        self.cache.invalidate('solutions')
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        self.cache.get_or_compute('issues', self.embedding, (10, 0.7), self.search)
+        
+        self.assertEqual(self.calls, 3)
+    
+    def test_write_on_another_worker_invalidates(self):
+        """Test an invalidation by another process's cache reaches this one through Redis"""
+        self.cache._redis = FakeRedis()
+        other_worker = SearchResultCache(max_size=10)
+        other_worker._redis = self.cache._redis
+        
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        other_worker.invalidate('solutions')
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        
+        self.assertEqual(self.calls, 2)
+    
+    def test_write_during_search_is_not_cached_as_fresh(self):
+        """Test results computed while a write happened are not served afterwards"""
+        def search_racing_write():
+            self.cache.invalidate('solutions')
+            return self.search()
+        
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), search_racing_write)
+        self.cache.get_or_compute('solutions', self.embedding, (10, 0.7), self.search)
+        
+        self.assertEqual(self.calls, 2)
+
+
+class GenerationCacheTest(SimpleTestCase):
+    """Test LLM generations are reused for equivalent requests"""
+    
+    def setUp(self):
+        self.client = LLMClient(use_ollama=True, cache=GenerationCache(max_size=10))
+        self.prompts = []
+        self.client.generate = self.fake_generate
+    
+    def fake_generate(self, prompt):
+        self.prompts.append(prompt)
+        return f"answer {len(self.prompts)}"
+    
+    def test_equivalent_inputs_share_generation(self):
+        """Test whitespace differences do not cause a second generation"""
+        first = self.client.generate_rti_query("Road repair  budget", "PWD")
+        second = self.client.generate_rti_query("Road repair budget\n", "PWD")
+        
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.prompts), 1)
+    
+    def test_templates_do_not_share_entries(self):
+        """Test the same input to different prompts is generated separately"""
+        self.client.simplify_jargon("Section 4(1)(b) disclosure")
+        self.client.summarize_document("Section 4(1)(b) disclosure")
+        
+        self.assertEqual(len(self.prompts), 2)
+    
+    def test_empty_generation_is_not_cached(self):
+        """Test an empty answer is retried on the next request"""
+        self.client.generate = lambda prompt: self.prompts.append(prompt) or ''
+        self.client.simplify_jargon("Gazette notification")
+        self.client.simplify_jargon("Gazette notification")
+        
+        self.assertEqual(len(self.prompts), 2)
+
+
+@override_settings(SUMMARY_CHUNK_CHARS=400, SUMMARY_MAP_CONCURRENCY=2)
+class MapReduceSummaryTest(SimpleTestCase):
+    """Test long documents are summarized chunk by chunk"""
+    
+    def setUp(self):
+        self.client = LLMClient(use_ollama=True, cache=GenerationCache(max_size=100))
+        self.prompts = []
+        self.client.generate = self.fake_generate
+        self.paragraphs = [
+            f"Clause {i}. Bidders must submit the earnest money deposit of Rs. {i * 1000} "
+            f"before the closing date stated in schedule {i}, along with form {i}-B."
+            for i in range(30)
+        ]
+    
+    def fake_generate(self, prompt):
+        self.prompts.append(prompt)
+        return f"- point {len(self.prompts)}"
+    
+    def test_whole_document_is_summarized(self):
+        """Test every chunk is summarized and the last clause reaches the model"""
+        document = '\n\n'.join(self.paragraphs)
+        chunks = chunk_document(document, 400)
+        self.client.summarize_document(document)
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(self.prompts), len(chunks) + 1)  # map + final combine
+        self.assertTrue(any("Clause 29." in prompt for prompt in self.prompts))
+    
+    def test_edited_document_only_resummarizes_changed_chunks(self):
+        """Test unchanged chunks are served from the generation cache"""
+        self.client.summarize_document('\n\n'.join(self.paragraphs))
+        first_run = len(self.prompts)
+        
+        self.paragraphs[20] += " The deadline is extended by two weeks."
+        self.client.summarize_document('\n\n'.join(self.paragraphs))
+        
+        # The changed chunk and the final combine step
+        self.assertEqual(len(self.prompts) - first_run, 2)
+
+
+class SingleFlightTest(SimpleTestCase):
+    """Test concurrent identical generations share one upstream call"""
+    
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.client = LLMClient(use_ollama=True, single_flight=self.single_flight)
+        self.release = threading.Event()
+        self.prompts = []
+        self.client.generate = self.fake_generate
+    
+    def fake_generate(self, prompt):
+        self.prompts.append(prompt)
+        self.release.wait(timeout=5)
+        return "Only registered societies may apply."
+    
+    def run_concurrently(self, texts):
+        results = [None] * len(texts)
+        
+        def request(i):
+            results[i] = self.client.simplify_jargon(texts[i])
+        
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        return threads, results
+    
+    def test_identical_requests_are_coalesced(self):
+        """Test followers wait for the leader's generation instead of starting their own"""
+        threads, results = self.run_concurrently(["Eligibility under Rule 12(3)"] * 5)
+        for _ in range(500):
+            if self.single_flight.stats()['coalesced'] == 4:
+                break
+            threading.Event().wait(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(self.prompts), 1)
+        self.assertEqual(set(results), {"Only registered societies may apply."})
+    
+    def test_different_requests_are_not_coalesced(self):
+        """Test distinct inputs each get their own generation"""
+        self.release.set()
+        threads, _ = self.run_concurrently(["Rule 12(3)", "Rule 14(1)"])
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(self.prompts), 2)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    """Test requests skip a failing backend once its circuit opens"""
+    
+    def setUp(self):
+        self.breakers = {
+            'ollama': CircuitBreaker('ollama', window=10, min_calls=3, open_seconds=60),
+            'openai': CircuitBreaker('openai', window=10, min_calls=3, open_seconds=60),
+        }
+        self.client = LLMClient(use_ollama=True, breakers=self.breakers)
+        self.client.openai_client = object()
+        self.calls = []
+        self.client._call_ollama = self.failing_ollama
+        self.client._call_openai = lambda prompt: self.calls.append('openai') or "fallback answer"
+    
+    def failing_ollama(self, prompt):
+        self.calls.append('ollama')
+        raise ConnectionError("ollama unavailable")
+    
+    def test_open_circuit_routes_straight_to_fallback(self):
+        """Test Ollama is not called again after it trips its breaker"""
+        for _ in range(3):
+            self.assertEqual(self.client.generate("prompt"), "fallback answer")
+        self.assertEqual(self.breakers['ollama'].state, CircuitBreaker.OPEN)
+        
+        self.calls.clear()
+        self.assertEqual(self.client.generate("prompt"), "fallback answer")
+        self.assertEqual(self.calls, ['openai'])
+    
+    def test_successful_trial_closes_circuit(self):
+        """Test a half-open breaker closes after one successful call"""
+        breaker = CircuitBreaker('ollama', min_calls=2, open_seconds=0)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # Only one trial call at a time
+        breaker.record_success(0.5)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_rejected_trial_is_released(self):
+        """Test a half-open trial rejected by the queue does not keep the backend blocked"""
+        breaker = CircuitBreaker('ollama', min_calls=2, open_seconds=0)
+        breaker.record_failure()
+        breaker.record_failure()
+        client = LLMClient(use_ollama=True, breakers={'ollama': breaker}, admission=RejectingAdmission())
+        client.openai_client = None
+        
+        with self.assertRaises(AdmissionRejected):
+            client.generate("prompt")
+        with self.assertRaises(AdmissionRejected):
+            list(client.generate_stream("prompt"))
+        
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+
+class LLMMetricsTest(SimpleTestCase):
+    """Test LLM requests are accounted per operation and backend"""
+    
+    def setUp(self):
+        self.metrics = LLMMetrics()
+        self.client = LLMClient(
+            use_ollama=True,
+            cache=GenerationCache(max_size=10),
+            breakers={'ollama': CircuitBreaker('ollama'), 'openai': CircuitBreaker('openai')},
+            metrics=self.metrics
+        )
+        self.client.openai_client = object()
+        self.client._call_ollama = self.failing_ollama
+        self.client._call_openai = self.fake_openai
+    
+    def failing_ollama(self, prompt):
+        raise ConnectionError("ollama unavailable")
+    
+    def fake_openai(self, prompt):
+        report_usage({'prompt_tokens': 40, 'completion_tokens': 12})
+        return "Under Section 6(1) of the RTI Act, 2005..."
+    
+    def test_fallback_tokens_and_cache_hits(self):
+        """Test a failed-over generation and its cached repeat are both accounted"""
+        self.client.generate_rti_query("Drain cleaning", "Municipal Corporation")
+        self.client.generate_rti_query("Drain cleaning", "Municipal Corporation")
+        
+        stats = self.metrics.stats()
+        operation = stats['operations']['generate_rti_query/v1']
+        self.assertEqual(operation['requests'], 2)
+        self.assertEqual(operation['cache_hits'], 1)
+        self.assertEqual(operation['fallbacks'], 1)
+        self.assertEqual(operation['completion_tokens'], 12)
+        self.assertEqual(stats['backends']['ollama']['errors'], 1)
+        self.assertEqual(stats['backends']['openai']['prompt_tokens'], 40)
+
+
+class AdmissionControllerTest(SimpleTestCase):
+    """Test the LLM queue bounds concurrency and serves interactive work first"""
+    
+    def setUp(self):
+        self.admission = AdmissionController(max_concurrent=1, max_queue=2, max_wait=5)
+        self.order = []
+    
+    def queue_call(self, priority, name):
+        def run():
+            with self.admission.slot(priority):
+                self.order.append(name)
+        thread = threading.Thread(target=run)
+        thread.start()
+        for _ in range(500):
+            if self.admission.stats()['queue_depth'] == self.expected_depth:
+                break
+            threading.Event().wait(0.01)
+        return thread
+    
+    def test_higher_priority_is_served_first(self):
+        """Test a queued interactive call overtakes queued bulk calls"""
+        with self.admission.slot(0):
+            self.expected_depth = 1
+            bulk = self.queue_call(2, 'summarize-document')
+            self.expected_depth = 2
+            interactive = self.queue_call(0, 'simplify-jargon')
+        bulk.join()
+        interactive.join()
+        
+        self.assertEqual(self.order, ['simplify-jargon', 'summarize-document'])
+    
+    def test_full_queue_rejects_with_retry_after(self):
+        """Test callers beyond the queue bound are turned away immediately"""
+        with self.admission.slot(0):
+            self.expected_depth = 1
+            first = self.queue_call(2, 'a')
+            self.expected_depth = 2
+            second = self.queue_call(2, 'b')
+            
+            with self.assertRaises(AdmissionRejected) as rejected:
+                with self.admission.slot(0):
+                    pass
+        first.join()
+        second.join()
+        
+        self.assertGreaterEqual(rejected.exception.retry_after, 1)
+        self.assertEqual(self.admission.stats()['rejected_full'], 1)
+
+
+class StreamingGenerationTest(SimpleTestCase):
+    """Test streamed LLM output and its SSE relay"""
+    
+    def setUp(self):
+        self.client = LLMClient(use_ollama=True, cache=GenerationCache(max_size=10))
+        self.streams = 0
+        self.client.generate_stream = self.fake_stream
+    
+    def fake_stream(self, prompt, call=None):
+        self.streams += 1
+        yield "Pay the "
+        yield "fee online."
+    
+    def test_completed_stream_is_cached(self):
+        """Test a finished stream is replayed from the cache as one chunk"""
+        first = list(self.client.simplify_jargon("Remit the prescribed fee", stream=True))
+        second = list(self.client.simplify_jargon("Remit the prescribed fee", stream=True))
+        
+        self.assertEqual(first, ["Pay the ", "fee online."])
+        self.assertEqual(second, ["Pay the fee online."])
+        self.assertEqual(self.streams, 1)
+    
+    def test_sse_events(self):
+        """Test chunks become token events followed by the full text"""
+        response = sse_response(iter(["Pay the ", "fee online."]), 'simplified_text')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(body.count('event: token'), 2)
+        self.assertIn('event: done\ndata: {"simplified_text": "Pay the fee online."}', body)
+
+
+class AsyncLLMClientTest(SimpleTestCase):
+    """Test the async client shares prompts and cache entries with the sync one"""
+    
+    def setUp(self):
+        self.cache = GenerationCache(max_size=10)
+        self.prompts = []
+    
+    async def fake_generate(self, prompt):
+        self.prompts.append(prompt)
+        return "Ask the ward office for the records."
+    
+    def test_async_generation_is_reused_by_sync_client(self):
+        """Test both clients resolve the same request to one cache entry"""
+        async_client = AsyncLLMClient(use_ollama=True, cache=self.cache)
+        async_client.generate = self.fake_generate
+        sync_client = LLMClient(use_ollama=True, cache=self.cache)
+        sync_client.generate = lambda prompt: self.fail("sync client should hit the cache")
+        
+        first = asyncio.run(async_client.generate_rti_query("Drain cleaning", "Municipal Corporation"))
+        second = sync_client.generate_rti_query("Drain  cleaning", "Municipal Corporation")
+        
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.prompts), 1)
+
+
+class ClusterEdgesTest(SimpleTestCase):
+    """Test kNN-graph clustering with union-find"""
+    
+    def test_connected_components(self):
+        """Test chained edges merge and disjoint edges stay apart"""
+        clusters = cluster_edges([
+            (1, 2, 0.9),
+            (2, 1, 0.9),
+            (2, 3, 0.84),
+            (10, 11, 0.95),
+        ])
+        
+        self.assertEqual(len(clusters), 2)
+        self.assertEqual(clusters[0]['issue_ids'], [1, 2, 3])
+        self.assertEqual(clusters[0]['count'], 3)
+        self.assertAlmostEqual(clusters[0]['avg_similarity'], 0.87)
+        self.assertEqual(clusters[1]['issue_ids'], [10, 11])
+    
+    def test_average_is_mean_of_all_edges(self):
+        """Test avg_similarity is not a running pairwise average"""
+        clusters = cluster_edges([(1, 2, 0.9), (1, 3, 0.9), (1, 4, 0.6)])
+        self.assertAlmostEqual(clusters[0]['avg_similarity'], 0.8)
+
+
+class ReciprocalRankFusionTest(SimpleTestCase):
+    """Test rank fusion for hybrid search"""
+    
+    def test_items_found_by_both_sources_rank_first(self):
+        """Test agreement between sources outweighs a single top rank"""
+        fused = reciprocal_rank_fusion({
+            'lexical': [1, 2, 3],
+            'vector': [4, 2, 3],
+        })
+        
+        self.assertEqual([item_id for item_id, _, _ in fused][:2], [2, 3])
+        self.assertEqual(fused[0][2], ['lexical', 'vector'])
+    
+    def test_single_source(self):
+        """Test fusion of one source keeps its order"""
+        fused = reciprocal_rank_fusion({'vector': [7, 8]})
+        self.assertEqual([item_id for item_id, _, _ in fused], [7, 8])
+
+
+class FakeMeiliIndex:
+    """MeiliSearch client and index stand-in returning fixed hits"""
+    
+    def __init__(self, ids):
+        self.ids = ids
+    
+    def index(self, name):
+        return self
+    
+    def search(self, query, options):
+        return {'hits': [{'id': item_id} for item_id in self.ids]}
+
+
+class HybridSearchTest(TestCase):
+    """Test hybrid search keeps to its latency budget"""
+    
+    def setUp(self):
+        category = Category.objects.create(name="Water", slug="water")
+        self.solution = Solution.objects.create(title="Fix leak", description="Call the Jal Board", category=category)
+        self.meili_client = hybrid_search._meili_client
+        hybrid_search._meili_client = FakeMeiliIndex([self.solution.id])
+    
+    def tearDown(self):
+        hybrid_search._meili_client = self.meili_client
+    
+    def test_slow_encoding_counts_against_budget(self):
+        """Test a query encoding over the budget drops the vector source instead of stalling"""
+        services = semantic_search._search_services
+        model_name = versioning.get_active_version().model_name
+        previous = services.get(model_name)
+        services[model_name] = SemanticSearchService(encoder=SlowEncoder(FakeSearchService(), 0.5))
+        try:
+            started = time.monotonic()
+            response = hybrid_search.hybrid_search_solutions("water leak", timeout_ms=100)
+        finally:
+            if previous is None:
+                services.pop(model_name, None)
+            else:
+                services[model_name] = previous
+        
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(response['sources'], {'vector': 'timeout', 'lexical': 'ok'})
+        self.assertEqual([result['id'] for result in response['results']], [self.solution.id])
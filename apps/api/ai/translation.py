@@ -1,6 +1,10 @@
 """
 Bhashini API client for Indian language translation
 """
+import asyncio
+import weakref
+
+import httpx
 import requests
 from django.conf import settings
 
@@ -142,8 +146,84 @@ class BhashiniClient:
             return texts
 
 
-# Singleton instance
+class AsyncBhashiniClient:
+    """
+    Async Bhashini client for the ASGI views
+    
+    Same endpoints and fallbacks as BhashiniClient, over a pooled
+    httpx.AsyncClient so waiting translations do not hold worker threads.
+    """
+    
+    BASE_URL = BhashiniClient.BASE_URL
+    LANGUAGES = BhashiniClient.LANGUAGES
+    
+    def __init__(self, api_key=None):
+        self.api_key = api_key or settings.BHASHINI_API_KEY
+        headers = {}
+        if self.api_key:
+            headers = {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            }
+        self.http = httpx.AsyncClient(headers=headers)
+    
+    async def _post(self, path, payload, timeout):
+        response = await self.http.post(f'{self.BASE_URL}/{path}', json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def translate(self, text, source_lang='en', target_lang='hi'):
+        """Translate text from source language to target language (see BhashiniClient.translate)"""
+        if not self.api_key:
+            return text
+        
+        try:
+            data = await self._post('translation', {
+                'input': text,
+                'sourceLanguage': source_lang,
+                'targetLanguage': target_lang
+            }, timeout=10)
+            return data.get('output', text)
+        
+        except Exception as e:
+            print(f"Translation error: {e}")
+            return text
+    
+    async def detect_language(self, text):
+        """Detect the language of input text (see BhashiniClient.detect_language)"""
+        if not self.api_key:
+            return 'en'
+        
+        try:
+            data = await self._post('language-detection', {'input': text}, timeout=10)
+            return data.get('language', 'en')
+        
+        except Exception as e:
+            print(f"Language detection error: {e}")
+            return 'en'
+    
+    async def batch_translate(self, texts, source_lang='en', target_lang='hi'):
+        """Translate multiple texts in a single request (see BhashiniClient.batch_translate)"""
+        if not self.api_key:
+            return texts
+        
+        try:
+            data = await self._post('batch-translation', {
+                'inputs': texts,
+                'sourceLanguage': source_lang,
+                'targetLanguage': target_lang
+            }, timeout=30)
+            return data.get('outputs', texts)
+        
+        except Exception as e:
+            print(f"Batch translation error: {e}")
+            return texts
+
+
+# Singleton instances
 _bhashini_client = None
+# Async clients hold connections bound to an event loop, so there is one per loop
+_async_bhashini_clients = weakref.WeakKeyDictionary()
 
 def get_bhashini_client():
     """Get or create Bhashini client instance"""
@@ -151,3 +231,13 @@ def get_bhashini_client():
     if _bhashini_client is None:
         _bhashini_client = BhashiniClient()
     return _bhashini_client
+
+
+def get_async_bhashini_client():
+    """Get or create the async Bhashini client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_bhashini_clients.get(loop)
+    if client is None:
+        client = AsyncBhashiniClient()
+        _async_bhashini_clients[loop] = client
+    return client
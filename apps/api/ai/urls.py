@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     TranslateView,
@@ -7,13 +8,29 @@ from .views import (
     DraftComplaintView,
     SummarizeDocumentView,
     GenerateRTIQueryView,
+    LLMStatsView,
+    LLMJobView,
 )
 from .search_views import (
     SemanticSearchView,
+    BatchSemanticSearchView,
     SimilarSolutionsView,
     IssueClustersView,
+    SearchCacheStatsView,
 )
 
+# Under ASGI the upstream-bound endpoints are served by async views
+if settings.AI_ASYNC_VIEWS:
+    from .async_views import (
+        AsyncTranslateView as TranslateView,
+        AsyncDetectLanguageView as DetectLanguageView,
+        AsyncSimplifyJargonView as SimplifyJargonView,
+        AsyncDraftComplaintView as DraftComplaintView,
+        AsyncSummarizeDocumentView as SummarizeDocumentView,
+        AsyncGenerateRTIQueryView as GenerateRTIQueryView,
+        AsyncLLMJobEventsView,
+    )
+
 urlpatterns = [
     path('translate/', TranslateView.as_view(), name='translate'),
     path('detect-language/', DetectLanguageView.as_view(), name='detect-language'),
@@ -22,9 +39,18 @@ urlpatterns = [
     path('draft-complaint/', DraftComplaintView.as_view(), name='draft-complaint'),
     path('summarize-document/', SummarizeDocumentView.as_view(), name='summarize-document'),
     path('generate-rti/', GenerateRTIQueryView.as_view(), name='generate-rti'),
+    path('llm/stats/', LLMStatsView.as_view(), name='llm-stats'),
+    path('jobs/<uuid:job_id>/', LLMJobView.as_view(), name='llm-job'),
     
     # Semantic search
     path('search/', SemanticSearchView.as_view(), name='semantic-search'),
+    path('search/batch/', BatchSemanticSearchView.as_view(), name='semantic-search-batch'),
+    path('search/cache-stats/', SearchCacheStatsView.as_view(), name='search-cache-stats'),
     path('similar-solutions/<int:solution_id>/', SimilarSolutionsView.as_view(), name='similar-solutions'),
     path('issue-clusters/', IssueClustersView.as_view(), name='issue-clusters'),
 ]
+
+if settings.AI_ASYNC_VIEWS:
+    urlpatterns.append(
+        path('jobs/<uuid:job_id>/events/', AsyncLLMJobEventsView.as_view(), name='llm-job-events')
+    )
@@ -0,0 +1,289 @@
+"""
+Embedding model versioning
+Re-embeds into shadow columns while search keeps serving, then swaps them in atomically
+"""
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EmbeddingVersion
+from .quantization import INDEX_PREFIXES, PRECISIONS, drop_index_sql, index_name
+from .result_cache import get_result_cache
+
+ACTIVE_COLUMN = 'embedding'
+NEXT_COLUMN = 'embedding_next'
+
+_active_version = {'version': None, 'checked_at': 0.0}
+
+
+def get_active_version():
+    """
+    The version whose vectors are in the embedding columns
+    
+    Looked up at most every EMBEDDING_VERSION_CHECK_SECONDS so every worker
+    follows a cutover without a restart. Without any active row (fresh
+    install) the model from settings is used.
+    """
+    now = time.monotonic()
+    if _active_version['version'] is None or now - _active_version['checked_at'] > settings.EMBEDDING_VERSION_CHECK_SECONDS:
+        version = EmbeddingVersion.objects.filter(status='active').first()
+        if version is None:
+            version = EmbeddingVersion(
+                model_name=settings.EMBEDDING_MODEL_NAME,
+                dimensions=settings.EMBEDDING_DIMENSIONS,
+                status='active'
+            )
+        _active_version['version'] = version
+        _active_version['checked_at'] = now
+    return _active_version['version']
+
+
+def get_building_version():
+    """The version being re-embedded into the shadow columns, or None"""
+    return EmbeddingVersion.objects.filter(status='building').first()
+
+
+def column_model_name(column):
+    """
+    Model whose vectors belong in an embedding column, read from the database
+    
+    Unlike get_active_version this is never cached, so a write can check it
+    has not been overtaken by a cutover in another process.
+    
+    Returns:
+        Model name, or None for the shadow column when no version is building
+    """
+    status = 'active' if column == ACTIVE_COLUMN else 'building'
+    version = EmbeddingVersion.objects.filter(status=status).values_list('model_name', flat=True).first()
+    if version is None and column == ACTIVE_COLUMN:
+        return settings.EMBEDDING_MODEL_NAME
+    return version
+
+
+def next_index_name(table):
+    return f"{INDEX_PREFIXES[table]}_next_hnsw_idx"
+
+
+def start_version(model_name, dimensions, service_url=''):
+    """
+    Register a new embedding model and add empty shadow columns for it
+    
+    Args:
+        model_name: Sentence transformer model name
+        dimensions: Embedding dimensions of the model
+        service_url: Embedding server running the model (blank: in-process)
+    
+    Returns:
+        The new EmbeddingVersion (status 'building')
+    """
+    if get_building_version() is not None:
+        raise ValueError("Another embedding version is already building")
+    if model_name == get_active_version().model_name:
+        raise ValueError(f"{model_name} is already the active embedding model")
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in INDEX_PREFIXES:
+            # Drops the previous version's vectors left behind by the last cutover
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {NEXT_COLUMN}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {NEXT_COLUMN}_hash")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {NEXT_COLUMN} vector({int(dimensions)})")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {NEXT_COLUMN}_hash varchar(40) NOT NULL DEFAULT ''")
+        
+        EmbeddingVersion.objects.filter(model_name=model_name).delete()
+        return EmbeddingVersion.objects.create(
+            model_name=model_name,
+            dimensions=dimensions,
+            service_url=service_url,
+            status='building'
+        )
+
+
+def build_next_index(m=16, ef_construction=64):
+    """
+    Build the HNSW indexes on the shadow columns without blocking writes
+    
+    Best run once the re-embed job is done, so rows are not inserted into a
+    live graph one by one. Must run outside a transaction.
+    """
+    with connection.cursor() as cursor:
+        for table in INDEX_PREFIXES:
+            cursor.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {next_index_name(table)}
+                ON {table} USING hnsw ({NEXT_COLUMN} vector_cosine_ops)
+                WITH (m = {int(m)}, ef_construction = {int(ef_construction)})
+            """)
+
+
+def version_progress():
+    """
+    Re-embed coverage of the shadow columns
+    
+    Returns:
+        Dict of table -> {'total', 'embedded', 'indexed'}
+    """
+    progress = {}
+    with connection.cursor() as cursor:
+        for table in INDEX_PREFIXES:
+            cursor.execute(f"SELECT count(*), count({NEXT_COLUMN}) FROM {table}")
+            total, embedded = cursor.fetchone()
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [next_index_name(table)])
+            progress[table] = {'total': total, 'embedded': embedded, 'indexed': cursor.fetchone()[0]}
+    return progress
+
+
+def _catch_up(column, version, since, search_service=None, batch_size=512):
+    """Re-embed the rows of column updated since a datetime whose hash is out of date"""
+    # Imported here: both modules import this one
+    from .embeddings import EMBEDDING_TARGETS, EmbeddingBackfill
+    from .semantic_search import get_search_service
+    
+    search_service = search_service or get_search_service(version)
+    return {
+        target: EmbeddingBackfill(
+            target, batch_size=batch_size, updated_since=since,
+            search_service=search_service, column=column
+        ).run()
+        for target in EMBEDDING_TARGETS
+    }
+
+
+def catch_up_version(search_service=None, batch_size=512):
+    """
+    Re-embed shadow rows whose text changed since the re-embed job reached them
+    
+    Only the periodic backfill's recent-edit window is dual-written to the
+    shadow column, so a row edited earlier in a long rollout keeps a vector of
+    its old text. Only rows updated since the version started are scanned,
+    and those whose shadow hash still matches are skipped.
+    
+    Args:
+        search_service: SemanticSearchService of the building version (default: looked up)
+        batch_size: Rows fetched, encoded and written per round trip
+    
+    Returns:
+        Dict of target -> backfill stats
+    """
+    version = get_building_version()
+    if version is None:
+        raise ValueError("No embedding version is building")
+    return _catch_up(NEXT_COLUMN, version, version.created_at, search_service, batch_size)
+
+
+def _swap_columns(cursor):
+    """Exchange the embedding and shadow columns (and their indexes) of every table"""
+    for table in INDEX_PREFIXES:
+        active_index = index_name(table, 'float32')
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {ACTIVE_COLUMN} TO {ACTIVE_COLUMN}_swap")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {NEXT_COLUMN} TO {ACTIVE_COLUMN}")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {ACTIVE_COLUMN}_swap TO {NEXT_COLUMN}")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {ACTIVE_COLUMN}_hash TO {ACTIVE_COLUMN}_swap_hash")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {NEXT_COLUMN}_hash TO {ACTIVE_COLUMN}_hash")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {ACTIVE_COLUMN}_swap_hash TO {NEXT_COLUMN}_hash")
+        cursor.execute(f"ALTER INDEX {active_index} RENAME TO {active_index}_swap")
+        cursor.execute(f"ALTER INDEX {next_index_name(table)} RENAME TO {active_index}")
+        cursor.execute(f"ALTER INDEX {active_index}_swap RENAME TO {next_index_name(table)}")
+        
+        # Reduced-precision indexes are built for one dimension; rebuild them
+        # with `manage.py embedding_index create` after the cutover
+        for precision, spec in PRECISIONS.items():
+            if spec['index']:
+                cursor.execute(drop_index_sql(table, precision, concurrently=False))
+
+
+def activate_version(force=False, search_service=None):
+    """
+    Atomically switch search to the building version
+    
+    Rows edited during the rollout are caught up first (catch_up_version).
+    Columns and indexes are then renamed in one short transaction, so readers
+    see either the old or the new vectors, never a mix. Rows edited between
+    the catch-up and the swap are recent, so the periodic backfill re-embeds
+    them. The previous vectors stay in the shadow columns for rollback_version.
+    
+    Args:
+        force: Activate even if some rows are not re-embedded yet
+        search_service: SemanticSearchService of the building version for the catch-up
+    
+    Returns:
+        The activated EmbeddingVersion
+    """
+    version = get_building_version()
+    if version is None:
+        raise ValueError("No embedding version is building")
+    
+    for table, progress in version_progress().items():
+        if not progress['indexed']:
+            raise ValueError(f"{table} has no index on {NEXT_COLUMN}; run build_next_index first")
+    
+    catch_up_version(search_service)
+    
+    for table, progress in version_progress().items():
+        if progress['embedded'] < progress['total'] and not force:
+            raise ValueError(f"{table}: only {progress['embedded']} of {progress['total']} rows re-embedded")
+    
+    previous = get_active_version()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Fail fast instead of queueing every reader behind the rename locks
+        cursor.execute("SET LOCAL lock_timeout = '5s'")
+        _swap_columns(cursor)
+        
+        if previous.pk is None:
+            # Record the settings-defined model so it can be rolled back to
+            previous.save()
+        EmbeddingVersion.objects.filter(pk=previous.pk).update(status='retired')
+        version.status = 'active'
+        version.activated_at = timezone.now()
+        version.save(update_fields=['status', 'activated_at'])
+    
+    _active_version['version'] = None
+    for source in ('issues', 'solutions'):
+        get_result_cache().invalidate(source)
+    return version
+
+
+def rollback_version(search_service=None):
+    """
+    Swap the previously active version back in while its vectors are still in the shadow columns
+    
+    Rows edited since the cutover were only embedded with the rolled back
+    model, so they are re-embedded with the previous one after the swap.
+    
+    Args:
+        search_service: SemanticSearchService of the previous version for the catch-up
+    
+    Returns:
+        The re-activated EmbeddingVersion
+    """
+    current = get_active_version()
+    previous = EmbeddingVersion.objects.filter(status='retired').order_by('-activated_at', '-created_at').first()
+    if previous is None or current.pk is None:
+        raise ValueError("No previous embedding version to roll back to")
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [next_index_name('issues_issue')])
+        if not cursor.fetchone()[0]:
+            raise ValueError("The previous version's vectors were already dropped")
+        cursor.execute("SET LOCAL lock_timeout = '5s'")
+        _swap_columns(cursor)
+        
+        EmbeddingVersion.objects.filter(pk=current.pk).update(status='retired')
+        previous.status = 'active'
+        previous.activated_at = timezone.now()
+        previous.save(update_fields=['status', 'activated_at'])
+    
+    _active_version['version'] = None
+    for source in ('issues', 'solutions'):
+        get_result_cache().invalidate(source)
+    _catch_up(ACTIVE_COLUMN, previous, current.activated_at, search_service)
+    return previous
+
+
+def drop_shadow_columns():
+    """Free the shadow columns once a cutover is final (or abandon a building version)"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in INDEX_PREFIXES:
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {NEXT_COLUMN}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {NEXT_COLUMN}_hash")
+        EmbeddingVersion.objects.filter(status='building').delete()
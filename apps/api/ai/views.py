@@ -1,12 +1,25 @@
+from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from .translation import get_bhashini_client
 from .voice import get_whisper_client, transcribe_audio_bytes
-from .llm import get_llm_client
+from .llm import (
+    get_llm_client,
+    get_generation_cache,
+    get_single_flight,
+    get_circuit_breakers,
+    get_admission_controller,
+    get_llm_metrics,
+)
+from .admission import AdmissionRejected, set_llm_priority
+from .jobs import job_payload, submit_job, submitted_payload, wants_job
+from .models import LLMJob
+from .streaming import EventStreamRenderer, sse_response, wants_stream
 from .serializers import (
     TranslationRequestSerializer,
     TranslationResponseSerializer,
@@ -22,9 +35,30 @@ from .serializers import (
     DocumentSummaryResponseSerializer,
     RTIQueryRequestSerializer,
     RTIQueryResponseSerializer,
+    LLMJobOptionsSerializer,
+    LLMJobSubmittedSerializer,
 )
 
 
+def llm_busy_response(e):
+    """429 for a request the LLM queue turned away, with when to retry"""
+    return Response(
+        {'error': str(e), 'retry_after': e.retry_after},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(e.retry_after)}
+    )
+
+
+def job_response(request, kind, data):
+    """Submit the generation as a job and answer 202 with where to follow it"""
+    options = LLMJobOptionsSerializer(data=request.data)
+    options.is_valid(raise_exception=True)
+    
+    job = submit_job(kind, data, options.validated_data.get('callback_url', ''))
+    payload = submitted_payload(request, job)
+    return Response(payload, status=status.HTTP_202_ACCEPTED, headers={'Location': payload['status_url']})
+
+
 class TranslateView(APIView):
     """
     Translate text between Indian languages using Bhashini
@@ -137,7 +171,11 @@ class VoiceToTextView(APIView):
 class SimplifyJargonView(APIView):
     """
     Simplify government jargon using LLM
+    
+    Streams the output as Server-Sent Events with ?stream=true or
+    Accept: text/event-stream.
     """
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer]
     
     @swagger_auto_schema(
         request_body=JargonSimplificationRequestSerializer,
@@ -151,7 +189,11 @@ class SimplifyJargonView(APIView):
         language = serializer.validated_data['language']
         
         try:
+            set_llm_priority('simplify-jargon')
             client = get_llm_client()
+            if wants_stream(request):
+                return sse_response(client.simplify_jargon(text, language, stream=True), 'simplified_text')
+            
             simplified = client.simplify_jargon(text, language)
             
             return Response({
@@ -159,6 +201,9 @@ class SimplifyJargonView(APIView):
                 'simplified_text': simplified
             })
         
+        except AdmissionRejected as e:
+            return llm_busy_response(e)
+        
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -169,22 +214,36 @@ class SimplifyJargonView(APIView):
 class DraftComplaintView(APIView):
     """
     Generate a formal complaint letter using LLM
+    
+    Streams the output as Server-Sent Events with ?stream=true or
+    Accept: text/event-stream; runs as a background job with ?job=true.
     """
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer]
     
     @swagger_auto_schema(
         request_body=ComplaintDraftRequestSerializer,
-        responses={200: ComplaintDraftResponseSerializer}
+        responses={200: ComplaintDraftResponseSerializer, 202: LLMJobSubmittedSerializer}
     )
     def post(self, request):
         serializer = ComplaintDraftRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if wants_job(request):
+            return job_response(request, 'draft-complaint', serializer.validated_data)
+        
         try:
+            set_llm_priority('draft-complaint')
             client = get_llm_client()
+            if wants_stream(request):
+                return sse_response(client.draft_complaint_letter(serializer.validated_data, stream=True), 'letter')
+            
             letter = client.draft_complaint_letter(serializer.validated_data)
             
             return Response({'letter': letter})
         
+        except AdmissionRejected as e:
+            return llm_busy_response(e)
+        
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -195,25 +254,34 @@ class DraftComplaintView(APIView):
 class SummarizeDocumentView(APIView):
     """
     Summarize long government documents using LLM
+    
+    Runs as a background job with ?job=true.
     """
     
     @swagger_auto_schema(
         request_body=DocumentSummaryRequestSerializer,
-        responses={200: DocumentSummaryResponseSerializer}
+        responses={200: DocumentSummaryResponseSerializer, 202: LLMJobSubmittedSerializer}
     )
     def post(self, request):
         serializer = DocumentSummaryRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if wants_job(request):
+            return job_response(request, 'summarize-document', serializer.validated_data)
+        
         document_text = serializer.validated_data['document_text']
         max_points = serializer.validated_data['max_points']
         
         try:
+            set_llm_priority('summarize-document')
             client = get_llm_client()
             summary = client.summarize_document(document_text, max_points)
             
             return Response({'summary': summary})
         
+        except AdmissionRejected as e:
+            return llm_busy_response(e)
+        
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -224,27 +292,66 @@ class SummarizeDocumentView(APIView):
 class GenerateRTIQueryView(APIView):
     """
     Generate an RTI query template using LLM
+    
+    Runs as a background job with ?job=true.
     """
     
     @swagger_auto_schema(
         request_body=RTIQueryRequestSerializer,
-        responses={200: RTIQueryResponseSerializer}
+        responses={200: RTIQueryResponseSerializer, 202: LLMJobSubmittedSerializer}
     )
     def post(self, request):
         serializer = RTIQueryRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if wants_job(request):
+            return job_response(request, 'generate-rti', serializer.validated_data)
+        
         topic = serializer.validated_data['topic']
         department = serializer.validated_data['department']
         
         try:
+            set_llm_priority('generate-rti')
             client = get_llm_client()
             query = client.generate_rti_query(topic, department)
             
             return Response({'query': query})
         
+        except AdmissionRejected as e:
+            return llm_busy_response(e)
+        
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class LLMStatsView(APIView):
+    """
+    LLM request accounting, generation cache, coalescing, circuit breaker and queue counters of this worker process
+    """
+    
+    @swagger_auto_schema(responses={200: 'LLM layer counters'})
+    def get(self, request):
+        cache = get_generation_cache()
+        single_flight = get_single_flight()
+        admission = get_admission_controller()
+        return Response({
+            'ai_requests': get_llm_metrics().stats(),
+            'generation_cache': cache.stats() if cache else None,
+            'single_flight': single_flight.stats() if single_flight else None,
+            'circuit_breakers': {name: breaker.stats() for name, breaker in get_circuit_breakers().items()},
+            'queue': admission.stats() if admission else None,
+        })
+
+
+class LLMJobView(APIView):
+    """
+    Status of a background LLM job, with its result once finished
+    """
+    
+    @swagger_auto_schema(responses={200: 'Job status, result (under the endpoint response key) or error'})
+    def get(self, request, job_id):
+        job = get_object_or_404(LLMJob, pk=job_id)
+        return Response(job_payload(job))
@@ -113,7 +113,32 @@ METRICS_CONFIG = {
     },
     'ai_requests': {
         'type': 'counter',
-        'description': 'AI service requests by type'
+        'description': 'LLM requests by operation (cache hits, single-flight shares, fallbacks, errors, '
+                       'prompt/completion tokens, latency and time-to-first-token p50/p95) and calls by backend'
+    },
+    'query_embedding_cache': {
+        'type': 'counter',
+        'description': 'Search query embedding cache hits (local/redis) and misses'
+    },
+    'search_result_cache': {
+        'type': 'gauge',
+        'description': 'Semantic search result cache hit ratio, hits, misses and invalidations'
+    },
+    'llm_generation_cache': {
+        'type': 'counter',
+        'description': 'LLM generation cache hits (local/redis) and misses'
+    },
+    'llm_single_flight': {
+        'type': 'counter',
+        'description': 'LLM generations led vs coalesced into an identical in-flight call (in-process/remote)'
+    },
+    'llm_circuit_breakers': {
+        'type': 'gauge',
+        'description': 'LLM backend circuit state, window error rate and p95 latency (ollama/openai)'
+    },
+    'llm_queue': {
+        'type': 'gauge',
+        'description': 'LLM admission queue depth by priority, slots in use, rejections and wait p50/p95'
     },
     'translation_requests': {
         'type': 'counter',
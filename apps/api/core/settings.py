@@ -125,3 +125,144 @@ MEILI_MASTER_KEY = os.environ.get('MEILI_MASTER_KEY', 'dev_master_key_change_in_
 # AI Services
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 BHASHINI_API_KEY = os.environ.get('BHASHINI_API_KEY', '')
+
+# Semantic search (pgvector)
+# HNSW candidate list size per query; higher improves recall at some latency cost
+SEMANTIC_SEARCH_EF_SEARCH = int(os.environ.get('SEMANTIC_SEARCH_EF_SEARCH', 40))
+
+# Periodic tasks (run the worker with -B or a separate celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'backfill-embeddings': {
+        'task': 'ai.tasks.backfill_embeddings_task',
+        'schedule': 300.0,
+        'kwargs': {'updated_within_minutes': 10},
+    },
+    'purge-llm-jobs': {
+        'task': 'ai.tasks.purge_llm_jobs_task',
+        'schedule': 600.0,
+    },
+    'refresh-solution-digests': {
+        'task': 'ai.tasks.refresh_solution_digests_task',
+        'schedule': 3600.0,
+    },
+}
+
+# Embedding model. Set EMBEDDING_SERVICE_URL (unix:///path or tcp://127.0.0.1:port)
+# to share one model across workers via `manage.py run_embedding_server`;
+# leave empty to load the model in-process (development).
+EMBEDDING_MODEL_NAME = os.environ.get('EMBEDDING_MODEL_NAME', 'all-MiniLM-L6-v2')
+# Dimensions of EMBEDDING_MODEL_NAME, used for the embedding columns until a
+# version is activated with `manage.py embedding_version`
+EMBEDDING_DIMENSIONS = int(os.environ.get('EMBEDDING_DIMENSIONS', 384))
+EMBEDDING_SERVICE_URL = os.environ.get('EMBEDDING_SERVICE_URL', '')
+
+# Query embedding cache: in-process LRU plus optional shared Redis tier
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get('QUERY_EMBEDDING_CACHE_SIZE', 10000))
+QUERY_EMBEDDING_CACHE_REDIS_URL = os.environ.get('QUERY_EMBEDDING_CACHE_REDIS_URL', '')
+
+# Neighbours kept per solution in the precomputed similar-solutions table
+SIMILAR_SOLUTIONS_K = int(os.environ.get('SIMILAR_SOLUTIONS_K', 20))
+
+# Neighbours kept per issue in the precomputed kNN graph that issue clusters are read from
+ISSUE_NEIGHBOURS_K = int(os.environ.get('ISSUE_NEIGHBOURS_K', 10))
+
+# Hybrid (MeiliSearch + vector) search latency budget shared by both sources
+HYBRID_SEARCH_TIMEOUT_MS = int(os.environ.get('HYBRID_SEARCH_TIMEOUT_MS', 800))
+
+# Geo-constrained semantic search: rank every issue in the radius exactly when
+# fewer than this many are nearby, otherwise filter HNSW candidates by distance
+GEO_SEARCH_SPATIAL_FIRST_MAX_ROWS = int(os.environ.get('GEO_SEARCH_SPATIAL_FIRST_MAX_ROWS', 2000))
+GEO_SEARCH_MAX_VECTOR_CANDIDATES = int(os.environ.get('GEO_SEARCH_MAX_VECTOR_CANDIDATES', 1000))
+
+# Which HNSW index serves semantic search: float32 (default), halfvec or binary.
+# halfvec/binary indexes are built with `manage.py embedding_index create`.
+EMBEDDING_INDEX_PRECISION = os.environ.get('EMBEDDING_INDEX_PRECISION', 'float32')
+
+# In-process embedding backend: torch (sentence-transformers) or onnx (ONNX Runtime,
+# no torch import). The onnx model is exported with `manage.py export_onnx_encoder`.
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch')
+EMBEDDING_ONNX_MODEL_DIR = os.environ.get('EMBEDDING_ONNX_MODEL_DIR', str(BASE_DIR / 'models' / 'onnx'))
+
+# Maximum searches accepted by one /api/ai/search/batch/ request
+BATCH_SEARCH_MAX_QUERIES = int(os.environ.get('BATCH_SEARCH_MAX_QUERIES', 20))
+
+# How often each worker re-reads the active embedding version, i.e. the longest
+# a worker keeps encoding queries with the old model after a cutover
+EMBEDDING_VERSION_CHECK_SECONDS = int(os.environ.get('EMBEDDING_VERSION_CHECK_SECONDS', 10))
+
+# Duplicate check when an issue is reported: open issues of the same category
+# within this radius and above this similarity are offered instead
+DUPLICATE_ISSUE_RADIUS_M = float(os.environ.get('DUPLICATE_ISSUE_RADIUS_M', 150))
+DUPLICATE_ISSUE_SIMILARITY = float(os.environ.get('DUPLICATE_ISSUE_SIMILARITY', 0.85))
+DUPLICATE_CHECK_TIMEOUT_MS = int(os.environ.get('DUPLICATE_CHECK_TIMEOUT_MS', 300))
+
+# Semantic search result cache (per process); writes to issues and solutions
+# invalidate it through Redis counters shared by all workers, since re-embeds run
+# in Celery and edits on other workers. Without Redis only the writing process
+# is invalidated, so only set it empty with a single process (development).
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get('SEARCH_RESULT_CACHE_SIZE', 5000))
+SEARCH_RESULT_CACHE_TTL = int(os.environ.get('SEARCH_RESULT_CACHE_TTL', 3600))
+SEARCH_RESULT_CACHE_REDIS_URL = os.environ.get(
+    'SEARCH_RESULT_CACHE_REDIS_URL', os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+)
+
+# LLM generation cache for simplification, summaries, action steps and RTI
+# queries (0 disables); Redis makes entries shared across workers
+LLM_CACHE_SIZE = int(os.environ.get('LLM_CACHE_SIZE', 1000))
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 24 * 3600))
+LLM_CACHE_REDIS_URL = os.environ.get('LLM_CACHE_REDIS_URL', '')
+
+# Ollama: pooled keep-alive connections, separate connect/read timeouts, and
+# how long the model stays loaded between requests
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', 20))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', 3))
+OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', 30))
+OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+
+# Serve translation and LLM endpoints with async views (set when running under
+# ASGI, e.g. `uvicorn core.asgi:application`); upstream waits then hold no thread
+AI_ASYNC_VIEWS = os.environ.get('AI_ASYNC_VIEWS', 'False') == 'True'
+
+# Coalesce identical LLM generations in flight at the same time into one call;
+# with Redis, across workers too (the lock TTL must exceed the slowest generation)
+LLM_SINGLE_FLIGHT = os.environ.get('LLM_SINGLE_FLIGHT', 'True') == 'True'
+LLM_SINGLE_FLIGHT_REDIS_URL = os.environ.get('LLM_SINGLE_FLIGHT_REDIS_URL', '')
+LLM_SINGLE_FLIGHT_LOCK_TTL = float(os.environ.get('LLM_SINGLE_FLIGHT_LOCK_TTL', 60))
+
+# Circuit breaker per LLM backend: over the last WINDOW calls (at least MIN_CALLS),
+# an error rate or slow-call rate at the threshold opens the circuit for OPEN_SECONDS
+# and requests go straight to the other backend
+LLM_BREAKER_WINDOW = int(os.environ.get('LLM_BREAKER_WINDOW', 20))
+LLM_BREAKER_MIN_CALLS = int(os.environ.get('LLM_BREAKER_MIN_CALLS', 5))
+LLM_BREAKER_ERROR_RATE = float(os.environ.get('LLM_BREAKER_ERROR_RATE', 0.5))
+LLM_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('LLM_BREAKER_SLOW_CALL_SECONDS', 15))
+LLM_BREAKER_SLOW_CALL_RATE = float(os.environ.get('LLM_BREAKER_SLOW_CALL_RATE', 0.8))
+LLM_BREAKER_OPEN_SECONDS = float(os.environ.get('LLM_BREAKER_OPEN_SECONDS', 30))
+
+# Hedging: race OpenAI against an Ollama call still running after Ollama's recent
+# p95 latency (never earlier than the minimum delay). Costs extra OpenAI calls.
+LLM_HEDGE = os.environ.get('LLM_HEDGE', 'False') == 'True'
+LLM_HEDGE_MIN_DELAY = float(os.environ.get('LLM_HEDGE_MIN_DELAY', 2))
+
+# Map-reduce summarization: chunk size (characters per prompt), chunks summarized
+# concurrently per document, and the longest document accepted
+SUMMARY_CHUNK_CHARS = int(os.environ.get('SUMMARY_CHUNK_CHARS', 3000))
+SUMMARY_MAP_CONCURRENCY = int(os.environ.get('SUMMARY_MAP_CONCURRENCY', 4))
+SUMMARY_MAX_DOCUMENT_CHARS = int(os.environ.get('SUMMARY_MAX_DOCUMENT_CHARS', 200000))
+
+# Admission control in front of Ollama, per worker process: generations running at
+# once (0 disables), requests allowed to wait, and the longest wait before a 429
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))
+LLM_QUEUE_SIZE = int(os.environ.get('LLM_QUEUE_SIZE', 50))
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 20))
+
+# LLM jobs (?job=true on draft-complaint, summarize-document and generate-rti):
+# hosts allowed as webhook callback URLs (empty disables webhooks), how long an
+# event stream follows a job (served under ASGI only), how long finished jobs are
+# kept, and after how long a job still running is failed as lost with its worker
+LLM_JOB_WEBHOOK_HOSTS = [host for host in os.environ.get('LLM_JOB_WEBHOOK_HOSTS', '').split(',') if host]
+LLM_JOB_EVENTS_TIMEOUT = float(os.environ.get('LLM_JOB_EVENTS_TIMEOUT', 600))
+LLM_JOB_EVENTS_POLL_INTERVAL = float(os.environ.get('LLM_JOB_EVENTS_POLL_INTERVAL', 1))
+LLM_JOB_RETENTION_DAYS = int(os.environ.get('LLM_JOB_RETENTION_DAYS', 7))
+LLM_JOB_RUNNING_TIMEOUT = int(os.environ.get('LLM_JOB_RUNNING_TIMEOUT', 900))
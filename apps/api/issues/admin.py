@@ -8,6 +8,7 @@ class IssueAdmin(GISModelAdmin):
     list_display = ['title', 'category', 'status', 'reported_by', 'assigned_to', 'created_at']
     list_filter = ['status', 'category', 'created_at']
     search_fields = ['title', 'description', 'address']
+    exclude = ['embedding', 'embedding_hash']
     readonly_fields = ['created_at', 'updated_at', 'resolved_at', 'upvotes', 'views']
     date_hierarchy = 'created_at'
     gis_widget_kwargs = {
@@ -0,0 +1,116 @@
+"""
+Near-duplicate detection for newly reported issues
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from ai.embeddings import content_hash, issue_embedding_text, write_embeddings
+from ai.neighbours import refresh_issue_neighbours
+from ai.semantic_search import get_search_service
+from ai.versioning import get_active_version
+from .models import Issue
+
+logger = logging.getLogger(__name__)
+
+# Encoding (and the first model load) runs here so a report waits at most its budget
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='issue-embed')
+
+
+def embed_issue(title, description, timeout_ms=None):
+    """
+    Embed the text of a new issue, failing open
+    
+    An encoding still running after timeout_ms is left to finish in the
+    background (warming the model for the next report); the issue is then
+    embedded by the backfill.
+    
+    Args:
+        title: Title of the new issue
+        description: Description of the new issue
+        timeout_ms: Longest wait for the embedding (default: settings.DUPLICATE_CHECK_TIMEOUT_MS)
+    
+    Returns:
+        (search_service, embedding, text_hash); all None if the model could
+        not be loaded, encoding failed or exceeded timeout_ms
+    """
+    timeout_ms = timeout_ms or settings.DUPLICATE_CHECK_TIMEOUT_MS
+    text = issue_embedding_text({'title': title, 'description': description})
+    
+    def encode():
+        search_service = get_search_service(version)
+        return search_service, search_service.generate_embedding(text)
+    
+    try:
+        # Looked up here: the version check reads the database, the worker thread only encodes
+        version = get_active_version()
+        search_service, embedding = _executor.submit(encode).result(timeout=timeout_ms / 1000)
+    except FutureTimeoutError:
+        logger.warning("Issue embedding skipped, encoding exceeded %s ms", timeout_ms)
+        return None, None, None
+    except Exception as e:
+        logger.warning("Issue embedding skipped, encoding failed: %s", e)
+        return None, None, None
+    return search_service, embedding, content_hash(text)
+
+
+def store_issue_embedding(issue, search_service, embedding, text_hash):
+    """
+    Store the embedding of a new issue right away, failing open
+    
+    The next report of the same problem is then caught without waiting for
+    the backfill, which embeds the issue instead if this write fails.
+    """
+    try:
+        # write_embeddings also invalidates cached issue search results
+        if write_embeddings(Issue, [(issue.pk, embedding, text_hash)], search_service.model_name):
+            refresh_issue_neighbours([issue.pk])
+    except Exception as e:
+        logger.warning("Embedding of issue %s left to the backfill: %s", issue.pk, e)
+
+
+def check_duplicates(title, description, category_id, location):
+    """
+    Find open issues nearby that look like the one being reported
+    
+    Fails open: if loading the model, encoding or the lookup errors or
+    together exceed DUPLICATE_CHECK_TIMEOUT_MS, no duplicates are reported
+    and the issue can still be created.
+    
+    Args:
+        title: Title of the new issue
+        description: Description of the new issue
+        category_id: Category of the new issue
+        location: Point of the new issue
+    
+    Returns:
+        (duplicates, search_service, embedding, text_hash); the last three are
+        None if encoding failed
+    """
+    deadline = time.monotonic() + settings.DUPLICATE_CHECK_TIMEOUT_MS / 1000
+    search_service, embedding, text_hash = embed_issue(title, description)
+    if embedding is None:
+        return [], None, None, None
+    
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        logger.warning("Duplicate check skipped, encoding used the whole budget")
+        return [], search_service, embedding, text_hash
+    
+    try:
+        duplicates = search_service.find_duplicate_issues(
+            embedding,
+            category_id,
+            location.y,
+            location.x,
+            radius_m=settings.DUPLICATE_ISSUE_RADIUS_M,
+            threshold=settings.DUPLICATE_ISSUE_SIMILARITY,
+            timeout_ms=remaining_ms
+        )
+    except Exception as e:
+        logger.warning("Duplicate check skipped: %s", e)
+        duplicates = []
+    
+    return duplicates, search_service, embedding, text_hash
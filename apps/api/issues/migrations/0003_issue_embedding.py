@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-16 10:12
+
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.db import migrations
+from pgvector.django import VectorExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0002_issue_downvotes'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.AddField(
+            model_name='issue',
+            name='embedding',
+            field=pgvector.django.vector.VectorField(blank=True, dimensions=384, help_text='Sentence embedding of title and description', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='issue_embedding_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0003_issue_embedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='embedding_hash',
+            field=models.CharField(blank=True, help_text='Hash of the text the embedding was generated from', max_length=40),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-16 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0004_issue_embedding_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 = most similar')),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='issues.issue')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='issues.issue')),
+            ],
+            options={
+                'ordering': ['issue', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('issue', 'rank'), name='unique_issue_neighbour_rank')],
+            },
+        ),
+    ]
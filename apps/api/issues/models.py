@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.auth.models import User
+from pgvector.django import VectorField, HnswIndex
 
 
 class Issue(models.Model):
@@ -13,6 +15,7 @@ class Issue(models.Model):
         ('resolved', 'Resolved'),
         ('closed', 'Closed'),
     ]
+    OPEN_STATUSES = ['reported', 'acknowledged', 'in_progress']
     
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -41,11 +44,22 @@ class Issue(models.Model):
     downvotes = models.IntegerField(default=0)
     views = models.IntegerField(default=0)
     
+    # Semantic search
+    embedding = VectorField(dimensions=settings.EMBEDDING_DIMENSIONS, null=True, blank=True, help_text="Sentence embedding of title and description")
+    embedding_hash = models.CharField(max_length=40, blank=True, help_text="Hash of the text the embedding was generated from")
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'category']),
             models.Index(fields=['created_at']),
+            HnswIndex(
+                name='issue_embedding_hnsw_idx',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
         ]
     
     def __str__(self):
@@ -67,6 +81,25 @@ class IssueUpdate(models.Model):
         ordering = ['-created_at']
 
 
+class IssueNeighbour(models.Model):
+    """
+    Precomputed nearest neighbours of an issue by embedding similarity
+    """
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+    rank = models.PositiveSmallIntegerField(help_text="1 = most similar")
+    
+    class Meta:
+        ordering = ['issue', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['issue', 'rank'], name='unique_issue_neighbour_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.issue_id} -> {self.neighbour_id} ({self.similarity:.2f})"
+
+
 class IssueCluster(models.Model):
     """
     Detected clusters of similar issues in a geographic area
@@ -7,6 +7,7 @@ from django.contrib.gis.db.models.functions import Distance
 from django.utils import timezone
 from django.db.models import Count, Q
 from .models import Issue, IssueUpdate, IssueCluster
+from .duplicates import check_duplicates, embed_issue, store_issue_embedding
 from .serializers import (
     IssueListSerializer,
     IssueDetailSerializer,
@@ -85,10 +86,62 @@ class IssueViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        """
+        Report an issue
+        
+        With ?check_duplicates=true, an issue that looks like an open issue
+        reported nearby is not created: the likely duplicates are returned
+        with 409 Conflict so the client can upvote one of them instead, and
+        resubmitting with allow_duplicate=true creates it anyway. Clients
+        that do not opt in can check a draft with the duplicates action.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        data = serializer.validated_data
+        check = str(request.query_params.get('check_duplicates', '')).lower() in ('1', 'true', 'yes')
+        allow_duplicate = str(request.data.get('allow_duplicate', '')).lower() in ('1', 'true', 'yes')
+        if check and not allow_duplicate:
+            duplicates, search_service, embedding, text_hash = check_duplicates(
+                data['title'], data['description'], data['category'].id, data['location']
+            )
+            if duplicates:
+                return Response(
+                    {
+                        'detail': 'Similar open issues were already reported nearby',
+                        'duplicates': duplicates
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+        else:
+            search_service, embedding, text_hash = embed_issue(data['title'], data['description'])
+        
+        self.perform_create(serializer)
+        if embedding is not None:
+            store_issue_embedding(serializer.instance, search_service, embedding, text_hash)
+        
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+    
     def perform_create(self, serializer):
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(reported_by=user)
     
+    @action(detail=False, methods=['post'])
+    def duplicates(self, request):
+        """
+        Check a draft report for duplicates without creating it
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        data = serializer.validated_data
+        duplicates, _, _, _ = check_duplicates(
+            data['title'], data['description'], data['category'].id, data['location']
+        )
+        return Response({'count': len(duplicates), 'duplicates': duplicates})
+    
     def retrieve(self, request, *args, **kwargs):
         """Increment view count on retrieve"""
         instance = self.get_object()
@@ -101,7 +154,7 @@ class IssueViewSet(viewsets.ModelViewSet):
         """Upvote an issue"""
         issue = self.get_object()
         issue.upvotes += 1
-        issue.save()
+        issue.save(update_fields=['upvotes'])
         return Response({'upvotes': issue.upvotes, 'downvotes': issue.downvotes})
 
     @action(detail=True, methods=['post'])
@@ -109,7 +162,7 @@ class IssueViewSet(viewsets.ModelViewSet):
         """Downvote an issue"""
         issue = self.get_object()
         issue.downvotes += 1
-        issue.save()
+        issue.save(update_fields=['downvotes'])
         return Response({'upvotes': issue.upvotes, 'downvotes': issue.downvotes})
     
     @action(detail=True, methods=['post'])
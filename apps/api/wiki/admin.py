@@ -14,6 +14,7 @@ class SolutionAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'language', 'success_rate', 'is_verified', 'created_at']
     list_filter = ['category', 'language', 'is_verified']
     search_fields = ['title', 'description']
+    exclude = ['embedding', 'embedding_hash']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
 
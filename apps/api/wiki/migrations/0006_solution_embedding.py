@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-16 10:12
+
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.db import migrations
+from pgvector.django import VectorExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0005_solution_related_issues'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.AddField(
+            model_name='solution',
+            name='embedding',
+            field=pgvector.django.vector.VectorField(blank=True, dimensions=384, help_text='Sentence embedding of title and description', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='solution_embedding_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
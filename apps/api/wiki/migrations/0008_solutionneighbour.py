@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-16 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0007_solution_embedding_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolutionNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 = most similar')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wiki.solution')),
+                ('solution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='wiki.solution')),
+            ],
+            options={
+                'ordering': ['solution', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('solution', 'rank'), name='unique_solution_neighbour_rank')],
+            },
+        ),
+    ]
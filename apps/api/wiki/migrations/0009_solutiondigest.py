@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-16 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0008_solutionneighbour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolutionDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(help_text='Language the digest was generated for', max_length=10)),
+                ('simplified_text', models.TextField(blank=True)),
+                ('action_steps', models.JSONField(default=list)),
+                ('source_updated_at', models.DateTimeField(help_text='Solution.updated_at the digest was generated from')),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('solution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='digest', to='wiki.solution')),
+            ],
+        ),
+    ]
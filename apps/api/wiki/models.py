@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.auth.models import User
+from pgvector.django import VectorField, HnswIndex
 
 
 class Solution(models.Model):
@@ -20,11 +22,20 @@ class Solution(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_verified = models.BooleanField(default=False)
+    embedding = VectorField(dimensions=settings.EMBEDDING_DIMENSIONS, null=True, blank=True, help_text="Sentence embedding of title and description")
+    embedding_hash = models.CharField(max_length=40, blank=True, help_text="Hash of the text the embedding was generated from")
     
     class Meta:
         ordering = ['-success_rate', '-created_at']
         indexes = [
             models.Index(fields=['language', 'category']),
+            HnswIndex(
+                name='solution_embedding_hnsw_idx',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
         ]
     
     def __str__(self):
@@ -113,3 +124,37 @@ class SolutionSuggestion(models.Model):
 
     def __str__(self):
         return f"Suggestion for: {self.solution.title}"
+
+
+class SolutionNeighbour(models.Model):
+    """
+    Precomputed nearest neighbours of a solution by embedding similarity
+    """
+    solution = models.ForeignKey(Solution, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Solution, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+    rank = models.PositiveSmallIntegerField(help_text="1 = most similar")
+
+    class Meta:
+        ordering = ['solution', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['solution', 'rank'], name='unique_solution_neighbour_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.solution_id} -> {self.neighbour_id} ({self.similarity:.2f})"
+
+
+class SolutionDigest(models.Model):
+    """
+    Precomputed plain-language version and action steps of a solution
+    """
+    solution = models.OneToOneField(Solution, on_delete=models.CASCADE, related_name='digest')
+    language = models.CharField(max_length=10, help_text="Language the digest was generated for")
+    simplified_text = models.TextField(blank=True)
+    action_steps = models.JSONField(default=list)
+    source_updated_at = models.DateTimeField(help_text="Solution.updated_at the digest was generated from")
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Digest of {self.solution_id} ({self.language})"
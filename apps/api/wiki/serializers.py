@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Solution, Category, Template, SuccessPath, SolutionSuggestion
+from .models import Solution, SolutionDigest, Category, Template, SuccessPath, SolutionSuggestion
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -38,6 +38,14 @@ class SolutionSuggestionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'status', 'created_at']
 
 
+class SolutionDigestSerializer(serializers.ModelSerializer):
+    """Precomputed plain-language text and action steps"""
+    
+    class Meta:
+        model = SolutionDigest
+        fields = ['language', 'simplified_text', 'action_steps', 'generated_at']
+
+
 class SolutionListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for list views"""
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -59,6 +67,7 @@ class SolutionDetailSerializer(serializers.ModelSerializer):
     success_paths = SuccessPathSerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     related_issues = serializers.StringRelatedField(many=True, read_only=True)
+    digest = serializers.SerializerMethodField()
     
     class Meta:
         model = Solution
@@ -66,5 +75,12 @@ class SolutionDetailSerializer(serializers.ModelSerializer):
                   'success_rate', 'upvotes', 'language', 'category', 'category_id', 
                   'related_issues',
                   'created_by_name', 'created_at', 'updated_at', 'is_verified',
-                  'success_paths']
+                  'success_paths', 'digest']
         read_only_fields = ['created_at', 'updated_at', 'success_rate', 'upvotes']
+    
+    def get_digest(self, obj):
+        """Precomputed digest, or None until the batch job has processed the latest edit"""
+        digest = getattr(obj, 'digest', None)
+        if digest is None or digest.source_updated_at != obj.updated_at or digest.language != obj.language:
+            return None
+        return SolutionDigestSerializer(digest).data
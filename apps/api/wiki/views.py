@@ -29,7 +29,7 @@ class SolutionViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for civic solutions
     """
-    queryset = Solution.objects.select_related('category', 'created_by').prefetch_related('success_paths')
+    queryset = Solution.objects.select_related('category', 'created_by', 'digest').prefetch_related('success_paths')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'problem_keywords']
     ordering_fields = ['success_rate', 'created_at']
@@ -97,7 +97,7 @@ class SolutionViewSet(viewsets.ModelViewSet):
         solution.upvotes += 1
         # Update success rate as a derived metric if needed, OR just use upvotes
         # For this logic, we'll keep success_rate as is or maybe it should be manual
-        solution.save()
+        solution.save(update_fields=['upvotes'])
         return Response({'upvotes': solution.upvotes, 'success_rate': solution.success_rate})
 
     @action(detail=True, methods=['post'])
@@ -105,7 +105,7 @@ class SolutionViewSet(viewsets.ModelViewSet):
         """Mark solution as less helpful"""
         solution = self.get_object()
         solution.upvotes -= 1
-        solution.save()
+        solution.save(update_fields=['upvotes'])
         return Response({'upvotes': solution.upvotes, 'success_rate': solution.success_rate})
 
 